@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+import asyncio
+
+from communication import Communication
+
+
+class AsyncCommunication(Communication):
+    """
+    Communication for robots running an asyncio event loop
+
+    sendDiscoveredPath(...) and sendPathSelected(...) return futures that are resolved by the
+    matching answer of the mothership, pathUnveiled and target messages are moved from the inbox
+    into the queue messages as (type, message) tuples. paho still receives on its own thread, every
+    message is handed over to the event loop, so the futures and the queue are only touched from there
+
+    The fields and getters of Communication keep working as before, drain(...) always returns
+    nothing because the messages are moved to the queue as soon as they arrive
+    """
+
+    def __init__(self, mqtt_client, logger, loop=None):
+        """
+        Must be called on the thread running loop, without loop it must be called from a coroutine
+        and the running event loop is used
+        :param mqtt_client: paho.mqtt.client.Client
+        :param logger: logging.Logger
+        :param loop: asyncio.AbstractEventLoop
+        """
+        # Set up before connecting, messages may arrive as soon as the client is started
+        self.loop = loop if loop is not None else asyncio.get_running_loop()
+        self.messages = asyncio.Queue()
+        self.pendingPathSelect = None
+
+        super().__init__(mqtt_client, logger)
+
+    def messageHandled(self, payload):
+        super().messageHandled(payload)
+
+        if payload['from'] == 'server' and payload['type'] in ('pathSelect', 'pathUnveiled', 'target'):
+            self.loop.call_soon_threadsafe(self.__deliver, payload['type'], payload['payload'])
+
+    def sendDiscoveredPath(self, startX, startY, startDirection, endX, endY, endDirection, status, unittest=False):
+        """
+        Sends the discovered path to the mothership, see Communication.reportPath(...)
+        :return: asyncio.Future, resolved with the corrected path as messages.PathMsg
+        """
+        future = self.reportPath(startX, startY, startDirection, endX, endY, endDirection, status, unittest)
+        return asyncio.wrap_future(future, loop=self.loop)
+
+    def sendPathSelected(self, startX, startY, startDirection, unittest=False, timeout=3):
+        """
+        Sends selected path to mothership, see Communication.sendPathSelected(...)
+        The mothership only answers if the robot has to take another path, so the future is resolved
+        with startDirection if no answer arrived within timeout seconds
+        :param timeout: Float
+        :return: asyncio.Future, resolved with the direction the robot has to take
+        """
+        if self.pendingPathSelect is not None:
+            self.pendingPathSelect.cancel()
+
+        future = self.loop.create_future()
+        self.pendingPathSelect = future
+        self.loop.call_later(timeout, self.__resolve, future, startDirection)
+
+        super().sendPathSelected(startX, startY, startDirection, unittest)
+        return future
+
+    # Helper methods, only called on the event loop
+    def __deliver(self, messageType, payload):
+
+        if messageType in ('pathUnveiled', 'target'):
+
+            # Other messages may have been put into the inbox since this one, they are moved as well
+            # and the calls scheduled for them find nothing left
+            messages = [(sequence, messageType, message) for messageType in ('pathUnveiled', 'target')
+                        for sequence, message in self.inbox.drain(messageType)]
+
+            for sequence, messageType, message in sorted(messages, key=lambda entry: entry[0]):
+                self.messages.put_nowait((messageType, message))
+
+        elif messageType == 'pathSelect':
+            if self.pendingPathSelect is not None:
+                self.__resolve(self.pendingPathSelect, payload['startDirection'])
+                self.pendingPathSelect = None
+
+    @staticmethod
+    def __resolve(future, result):
+
+        if not future.done():
+            future.set_result(result)
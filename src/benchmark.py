@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+
+# Offline benchmarks for the planning code, run with:
+#   python3 benchmark.py [--output results.json] [benchmark names ...]
+# Attention: Do not import the ev3dev.ev3 module in this file
+import argparse
+import json
+import logging
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+from colorclassifier import ColorClassifier
+from communication import Communication
+from compactplanet import CompactPlanet
+from loopback import LoopbackBroker, LoopbackClient
+import messages
+from messages import decodeMessage, decodePayload
+from planet import Direction, Planet
+from planner import Planner
+from simulator import Mothership, Simulator, generatePlanet
+
+
+def gridPlanet(width: int, height: int, seed: int = 0, planetClass=Planet):
+
+    """
+    Returns a Planet (or planetClass) where every node of a width x height grid is
+    connected to its northern and eastern neighbour with a random weight
+    """
+
+    rng = random.Random(seed)
+    planet = planetClass()
+
+    for x in range(width):
+        for y in range(height):
+
+            if x + 1 < width:
+                planet.add_path(((x, y), Direction.EAST), ((x + 1, y), Direction.WEST), rng.randint(1, 10))
+
+            if y + 1 < height:
+                planet.add_path(((x, y), Direction.NORTH), ((x, y + 1), Direction.SOUTH), rng.randint(1, 10))
+
+    return planet
+
+
+def timeShortestPath(planet: Planet, start, target, repeat: int = 3):
+
+    """
+    Returns the best wall time in seconds of an uncached planet.shortest_path(start, target)
+    """
+
+    best = None
+
+    for i in range(repeat):
+        if isinstance(planet, Planet):
+            planet.shortestPathTrees.clear()
+        begin = time.perf_counter()
+        planet.shortest_path(start, target)
+        elapsed = time.perf_counter() - begin
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def benchShortestPath():
+
+    print("shortest_path, corner to corner on random grids")
+    rows = []
+
+    for size in [25, 50, 100, 150]:
+        planet = gridPlanet(size, size)
+        elapsed = timeShortestPath(planet, (0, 0), (size - 1, size - 1))
+        print("  %6d nodes: %8.2f ms" % (size * size, elapsed * 1000))
+        rows.append({"nodes": size * size, "seconds": elapsed})
+
+    return rows
+
+
+def benchRepeatedQueries():
+
+    print("shortest_path, one start node to 500 targets (frontier backtracking)")
+    rows = []
+
+    for size in [25, 50, 100]:
+        planet = gridPlanet(size, size)
+        rng = random.Random(size)
+        targets = [(rng.randrange(size), rng.randrange(size)) for i in range(500)]
+
+        begin = time.perf_counter()
+        for target in targets:
+            planet.shortest_path((0, 0), target)
+        elapsed = time.perf_counter() - begin
+
+        print("  %6d nodes: %8.2f ms" % (size * size, elapsed * 1000))
+        rows.append({"nodes": size * size, "seconds": elapsed})
+
+    return rows
+
+
+def benchAstar():
+
+    print("shortest_path, Dijkstra against A* between random node pairs (node expansions)")
+    rows = []
+
+    for size in [25, 50, 100]:
+        planet = gridPlanet(size, size)
+        rng = random.Random(size)
+        pairs = [((rng.randrange(size), rng.randrange(size)), (rng.randrange(size), rng.randrange(size))) for i in range(20)]
+
+        results = []
+        for astar in [False, True]:
+            planet.expansions = 0
+            begin = time.perf_counter()
+            for start, target in pairs:
+                planet.shortestPathTrees.clear()
+                planet.shortest_path(start, target, astar=astar)
+            results.append((time.perf_counter() - begin, planet.expansions))
+
+        print("  %6d nodes: Dijkstra %8.2f ms %8d expansions, A* %8.2f ms %8d expansions" % (
+              size * size, results[0][0] * 1000, results[0][1], results[1][0] * 1000, results[1][1]))
+        rows.append({"nodes": size * size, "dijkstraSeconds": results[0][0], "dijkstraExpansions": results[0][1],
+                     "astarSeconds": results[1][0], "astarExpansions": results[1][1]})
+
+    return rows
+
+
+def benchMemory():
+
+    print("Planet against CompactPlanet on a 100x100 grid (memory per edge, allocations per expansion)")
+    rows = []
+
+    for planetClass in [Planet, CompactPlanet]:
+
+        tracemalloc.start()
+        planet = gridPlanet(100, 100, planetClass=planetClass)
+        size = tracemalloc.get_traced_memory()[0]
+        edges = 2 * 100 * 99
+
+        planet.expansions = 0
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        planet.shortest_path((0, 0), (99, 99))
+        peak = tracemalloc.get_traced_memory()[1] - before
+        expansions = planet.expansions
+        tracemalloc.stop()
+
+        # Timed without tracemalloc, it slows down allocations a lot
+        elapsed = timeShortestPath(planet, (0, 0), (99, 99))
+
+        print("  %-13s %6.0f bytes/edge, %6.0f bytes/expansion, %8.2f ms" % (
+              planetClass.__name__, size / edges, peak / expansions, elapsed * 1000))
+        rows.append({"backend": planetClass.__name__, "bytesPerEdge": size / edges,
+                     "bytesPerExpansion": peak / expansions, "seconds": elapsed})
+
+    return rows
+
+
+def benchReplan():
+
+    print("Replanning after a path on the route is blocked, Planner against a new shortest_path")
+    rows = []
+
+    for size in [25, 50, 100]:
+        planet = gridPlanet(size, size)
+        target = (size - 1, size - 1)
+        planner = Planner(planet, target)
+        start = (0, 0)
+        plannerTime, searchTime, plannerExpansions, searchExpansions = 0, 0, 0, 0
+
+        for i in range(10):
+            route = planner.route(start)
+            if route is None or len(route) < 2:
+                break
+
+            # Drive one path and find an obstacle on the next one
+            start = planet.paths[route[0][0]][route[0][1]][0]
+            planet.updateWeight(*route[1])
+
+            expansions = planner.expansions
+            begin = time.perf_counter()
+            planner.route(start)
+            plannerTime += time.perf_counter() - begin
+            plannerExpansions += planner.expansions - expansions
+
+            planet.shortestPathTrees.clear()
+            expansions = planet.expansions
+            begin = time.perf_counter()
+            planet.shortest_path(start, target)
+            searchTime += time.perf_counter() - begin
+            searchExpansions += planet.expansions - expansions
+
+        print("  %6d nodes: Planner %8.2f ms %8d expansions, shortest_path %8.2f ms %8d expansions" % (
+              size * size, plannerTime * 1000, plannerExpansions, searchTime * 1000, searchExpansions))
+        rows.append({"nodes": size * size, "plannerSeconds": plannerTime, "plannerExpansions": plannerExpansions,
+                     "searchSeconds": searchTime, "searchExpansions": searchExpansions})
+
+    return rows
+
+
+# Planets for the exploration benchmark, keyword arguments for simulator.generatePlanet(...)
+SCENARIOS = {
+    "grid":    dict(missing=0.0, blocked=0.0, loops=0),
+    "sparse":  dict(missing=0.45, blocked=0.05, loops=0),
+    "loops":   dict(missing=0.2, blocked=0.05, loops=-1),
+    "blocked": dict(missing=0.1, blocked=0.3, loops=3),
+}
+
+
+def timed(function, timings):
+
+    """
+    Returns a wrapper of function that appends the wall time of every call to timings
+    """
+
+    def wrapper(*args, **kwargs):
+        begin = time.perf_counter()
+        result = function(*args, **kwargs)
+        timings.append(time.perf_counter() - begin)
+        return result
+
+    return wrapper
+
+
+def benchExploration(seeds: int = 5):
+
+    print("Exploration of generated planets, %d planets each (per decision: mean / max wall time)" % seeds)
+    rows = []
+
+    for scenario in sorted(SCENARIOS):
+        for size in [5, 10, 20, 30]:
+
+            # A fresh copy for every size, the number of loops depends on it
+            options = dict(SCENARIOS[scenario])
+            if options["loops"] < 0:
+                options["loops"] = size * size // 2
+
+            decisions, discoverySteps, queueUpdates = [], [], []
+            # expansions are the nodes expanded by the searches the explorer plans with, unlike the
+            # wall times they only change with the planning code, not with the machine
+            row = {"scenario": scenario, "nodes": size * size, "loops": options["loops"], "planets": seeds,
+                   "completed": 0, "distance": 0, "obstacles": 0, "expansions": 0}
+
+            for seed in range(seeds):
+                planet = generatePlanet(size, size, seed=seed, withTarget=False, **options)
+                simulator = Simulator(planet, mothership=Mothership(planet, unveilProbability=0.1, seed=seed))
+                explorer = simulator.explorer
+
+                # Explorer calls these through self, so instance attributes take precedence
+                explorer.getNextDirection = timed(explorer.getNextDirection, decisions)
+                explorer.getDiscoveryStep = timed(explorer.getDiscoveryStep, discoverySteps)
+                explorer.updateQueue = timed(explorer.updateQueue, queueUpdates)
+
+                result = simulator.run()
+                row["completed"] += result.result == "explorationCompleted" and len(result.missingPaths) == 0
+                row["distance"] += result.distance
+                row["obstacles"] += result.obstacles
+                row["expansions"] += explorer.planet.expansions
+
+            row.update({
+                "decisions": len(decisions),
+                "expansionsPerDecision": row["expansions"] / max(len(decisions), 1),
+                "decisionSeconds": sum(decisions),
+                "maxDecisionSeconds": max(decisions, default=0),
+                "discoveryStepSeconds": sum(discoverySteps),
+                "updateQueueSeconds": sum(queueUpdates),
+            })
+            rows.append(row)
+
+            print("  %-8s %5d nodes: %6d decisions %8.3f / %8.3f ms, %7d distance, %8d expansions (%7.1f per decision), %d/%d completed" % (
+                  scenario, size * size, row["decisions"], row["decisionSeconds"] * 1000 / max(row["decisions"], 1),
+                  row["maxDecisionSeconds"] * 1000, row["distance"], row["expansions"], row["expansionsPerDecision"],
+                  row["completed"], seeds))
+
+    return rows
+
+
+def benchDecode(count: int = 20000):
+
+    print("Decoding a burst of %d pathUnveiled messages with %s (per message: wall time, memory kept)" % (
+          count, messages.loads.__module__))
+    rng = random.Random(0)
+    rows = []
+
+    burst = [json.dumps({"from": "server", "type": "pathUnveiled", "payload": {
+        "startX": rng.randrange(100), "startY": rng.randrange(100), "startDirection": rng.choice(list(Direction)),
+        "endX": rng.randrange(100), "endY": rng.randrange(100), "endDirection": rng.choice(list(Direction)),
+        "pathStatus": "free", "pathWeight": rng.randint(1, 10)}}).encode('utf-8') for i in range(count)]
+
+    # Parsing alone is the lower bound for both ways of decoding
+    decoders = [
+        ("parse only", lambda message: decodeMessage(message)['payload']),
+        ("list", lambda message: list(json.loads(message.decode('utf-8'))['payload'].values())),
+        ("PathUnveiledMsg", lambda message: decodePayload('pathUnveiled', decodeMessage(message)['payload'])),
+    ]
+
+    for name, decode in decoders:
+
+        # Same steps as Communication.on_message, the decoded messages are kept like in the inbox
+        begin = time.perf_counter()
+        decoded = [decode(message) for message in burst]
+        elapsed = time.perf_counter() - begin
+
+        tracemalloc.start()
+        decoded = [decode(message) for message in burst]
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        print("  %-16s %6.2f us/message, %5.0f bytes/message" % (name, elapsed * 1e6 / count, size / count))
+        rows.append({"record": name, "parser": messages.loads.__module__, "secondsPerMessage": elapsed / count, "bytesPerMessage": size / count})
+
+    return rows
+
+
+def benchThroughput(count: int = 20000):
+
+    print("%d pathUnveiled messages through Communication.on_message over the loopback broker" % count)
+    rows = []
+
+    for level in [logging.WARNING, logging.DEBUG]:
+
+        broker = LoopbackBroker()
+        mothership = LoopbackClient(broker)
+        mothership.connect()
+        client = LoopbackClient(broker)
+
+        # The records are counted, not written
+        logger = logging.getLogger('RoboLab.benchmark')
+        logger.propagate = False
+        logger.setLevel(level)
+        logger.handlers = [logging.NullHandler()]
+        communication = Communication(client, logger)
+
+        latencies = []
+        handler = client.on_message
+
+        def timedHandler(client, data, message):
+            handler(client, data, message)
+            latencies.append(time.perf_counter() - message.timestamp)
+
+        client.on_message = timedHandler
+
+        messages = [json.dumps({"from": "server", "type": "pathUnveiled", "payload": {
+            "startX": i, "startY": 0, "startDirection": 90, "endX": i + 1, "endY": 0, "endDirection": 270,
+            "pathStatus": "free", "pathWeight": 1}}) for i in range(count)]
+
+        begin = time.perf_counter()
+        for message in messages:
+            mothership.publish('explorer/113', message, qos=1)
+
+        drained = 0
+        while drained < count:
+            communication.wait_for('pathUnveiled', 1)
+            drained += len(communication.drain('pathUnveiled'))
+        elapsed = time.perf_counter() - begin
+        client.loop_stop()
+
+        latencies.sort()
+        row = {"logLevel": logging.getLevelName(level), "messagesPerSecond": count / elapsed,
+               "medianLatencySeconds": latencies[len(latencies) // 2],
+               "p99LatencySeconds": latencies[len(latencies) * 99 // 100]}
+        rows.append(row)
+
+        print("  logging %-7s %8.0f messages/s, latency median %8.2f ms, 99%% %8.2f ms" % (
+              row["logLevel"], row["messagesPerSecond"], row["medianLatencySeconds"] * 1000,
+              row["p99LatencySeconds"] * 1000))
+
+    return rows
+
+
+def benchColors(count: int = 200000):
+
+    print("Classifying %d samples of a drive over the planet (per sample: wall time, memory allocated)" % count)
+    rng = random.Random(0)
+    rows = []
+
+    blue, red = (49, 180, 93), (159, 61, 13)
+    colors = [blue, red, (38, 77, 15), (285, 503, 200), (160, 290, 100)]
+    samples = []
+    for i in range(count):
+        r, g, b = [channel + rng.randint(-20, 20) for channel in rng.choice(colors)]
+        samples.append((r, g, b, (0.299*r**2 + 0.587*g**2 + 0.114*b**2) ** 0.5))
+
+    def lambdas(samples):
+        # What lineFollower did in every iteration before
+        for r, g, b, brightness in samples:
+            isBlue = lambda r, g, b: r in range(blue[0] - 30, blue[0] + 30) and g in range(blue[1] - 30, blue[1] + 30) and b in range(blue[2] - 30, blue[2] + 30)
+            isRed = lambda r, g, b: r in range(red[0] - 30, red[0] + 30) and g in range(red[1] - 30, red[1] + 30) and b in range(red[2] - 30, red[2] + 30)
+            isRed(r, g, b) or isBlue(r, g, b)
+
+    classifier = ColorClassifier(blue, red, 62, 424, debounce=2)
+
+    def classify(samples):
+        update = classifier.update
+        for r, g, b, brightness in samples:
+            update(r, g, b, brightness)
+
+    for name, run in [("lambdas", lambdas), ("ColorClassifier", classify)]:
+
+        begin = time.perf_counter()
+        run(samples)
+        elapsed = time.perf_counter() - begin
+
+        # Allocations that are freed right away count too, they are what keeps the garbage collector busy
+        first = samples[:1000]
+        tracemalloc.start()
+        run(first)
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print("  %-16s %6.3f us/sample, peak %6d bytes for 1000 samples" % (name, elapsed * 1e6 / count, allocated))
+        rows.append({"classifier": name, "secondsPerSample": elapsed / count, "peakBytesPer1000Samples": allocated})
+
+    return rows
+
+
+BENCHMARKS = {
+    "shortestPath": benchShortestPath,
+    "repeatedQueries": benchRepeatedQueries,
+    "astar": benchAstar,
+    "memory": benchMemory,
+    "replan": benchReplan,
+    "exploration": benchExploration,
+    "decode": benchDecode,
+    "throughput": benchThroughput,
+    "colors": benchColors,
+}
+
+
+def currentCommit():
+
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmarks for the planning code")
+    parser.add_argument("benchmarks", nargs="*", help="benchmarks to run, all by default: " + ", ".join(sorted(BENCHMARKS)))
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    arguments = parser.parse_args()
+
+    for name in arguments.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark: " + name)
+
+    results = {
+        "commit": currentCommit(),
+        "python": platform.python_version(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": dict()
+    }
+
+    for name in arguments.benchmarks or sorted(BENCHMARKS):
+        results["benchmarks"][name] = BENCHMARKS[name]()
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
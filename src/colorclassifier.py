@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+
+
+# Colors returned by ColorClassifier, compare them with "is"
+BLUE = 'blue'
+RED = 'red'
+BLACK = 'black'
+WHITE = 'white'
+UNKNOWN = 'unknown'
+
+
+class ColorClassifier:
+    """
+    Tells the colors of the planet apart, built once from the calibrated values of driving.Driving
+
+    A sample is blue or red if every channel is within tolerance of the calibrated color, like the
+    range(...) tests this replaces. Otherwise it is black or white if its brightness is in the
+    quarter of the calibrated black-white range next to that color, anything in between (the edge
+    of the line) is unknown. All bounds are computed in the constructor, so classify(...) only
+    compares numbers: it takes constant time and doesn't allocate
+
+    update(...) debounces the samples of a moving robot: a color is only reported once it has been
+    seen in debounce samples in a row, until then the previously reported color stays
+    """
+
+    def __init__(self, blue, red, brightnessBlack, brightnessWhite, tolerance=30, debounce=1):
+        """
+        :param blue: (r, g, b) Tuple, calibrated raw rgb data
+        :param red: (r, g, b) Tuple, calibrated raw rgb data
+        :param brightnessBlack: Float
+        :param brightnessWhite: Float
+        :param tolerance: Integer, the largest difference per channel is tolerance - 1
+        :param debounce: Integer, samples in a row
+        """
+        # Lower bound inclusive, upper bound exclusive, like range(color - tolerance, color + tolerance)
+        self.rBlueLow, self.gBlueLow, self.bBlueLow = [channel - tolerance for channel in blue]
+        self.rBlueHigh, self.gBlueHigh, self.bBlueHigh = [channel + tolerance for channel in blue]
+        self.rRedLow, self.gRedLow, self.bRedLow = [channel - tolerance for channel in red]
+        self.rRedHigh, self.gRedHigh, self.bRedHigh = [channel + tolerance for channel in red]
+
+        quarter = (brightnessWhite - brightnessBlack) / 4
+        self.blackLimit = brightnessBlack + quarter
+        self.whiteLimit = brightnessWhite - quarter
+
+        self.debounce = debounce
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the debounced color, for example after the robot has been moved
+        """
+        self.color = UNKNOWN
+        self.candidate = UNKNOWN
+        self.count = 0
+
+    def classify(self, r, g, b, brightness):
+        """
+        Returns the color of a single sample
+        :param r: Integer
+        :param g: Integer
+        :param b: Integer
+        :param brightness: Float, sensor.brightness(r, g, b)
+        :return: BLUE, RED, BLACK, WHITE or UNKNOWN
+        """
+        if self.rBlueLow <= r < self.rBlueHigh and self.gBlueLow <= g < self.gBlueHigh and self.bBlueLow <= b < self.bBlueHigh:
+            return BLUE
+
+        if self.rRedLow <= r < self.rRedHigh and self.gRedLow <= g < self.gRedHigh and self.bRedLow <= b < self.bRedHigh:
+            return RED
+
+        if brightness <= self.blackLimit:
+            return BLACK
+
+        if brightness >= self.whiteLimit:
+            return WHITE
+
+        return UNKNOWN
+
+    def update(self, r, g, b, brightness):
+        """
+        Classifies the next sample of the robot and returns the debounced color
+        :return: BLUE, RED, BLACK, WHITE or UNKNOWN
+        """
+        color = self.classify(r, g, b, brightness)
+
+        if color is self.candidate:
+            # Capped, so the counter stays a small int
+            if self.count < self.debounce:
+                self.count += 1
+        else:
+            self.candidate = color
+            self.count = 1
+
+        if self.count >= self.debounce:
+            self.color = color
+
+        return self.color
@@ -4,7 +4,14 @@
 import json
 import platform
 import ssl
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from logqueue import PrettyJSON
+from messagequeue import MessageQueue
+from messages import decodeMessage, decodePayload
 
 # Fix: SSL certificate problem on macOS
 if all(platform.mac_ver()):
@@ -36,18 +43,31 @@ class Communication:
         self.client.username_pw_set(Communication.groupID, password=Communication.pw)  # set username and password
         self.client.connect(Communication.url, Communication.port)  # establish initial connection
         self.client.subscribe('explorer/113', qos=1)  # subscribe to mothership
-        self.client.loop_start()  # start listening to incoming message
         self.planetName = ''
         self.planetMessage = None
         self.pathMessage = None
         self.correctedDirection = None
-        self.pathUnveiledMessages = []
-        self.targetMessage = None
         self.doneMessage = ''
         self.debugMessage = ''
         self.listOfErrors = ''
 
+        # Notified by on_message whenever a message has been handled, see wait_for(...)
+        self.messageArrived = threading.Condition()
+
+        # pathUnveiled and target messages, read them with drain(...)
+        self.inbox = MessageQueue(['pathUnveiled', 'target'])
+
+        # Paths reported with reportPath(...) that haven't been answered yet, oldest first
+        # (startX, startY, startDirection) -> concurrent.futures.Future
+        self.pendingPaths = OrderedDict()
+        self.pendingPathsLock = threading.Lock()
+
+        # (startX, startY, startDirection) of the path sent with sendDiscoveredPath(...), only its answer
+        # becomes pathMessage while it is awaited
+        self.awaitedPath = None
+
         self.logger = logger
+        self.client.loop_start()  # start listening to incoming message, only after everything is set up
 
     # DO NOT EDIT THE METHOD SIGNATURE
     def on_message(self, client, data, message):
@@ -58,8 +78,8 @@ class Communication:
         :param message: Object
         :return: void
         """
-        payload = json.loads(message.payload.decode('utf-8'))  # convert JSON Object to dict
-        self.logger.debug(json.dumps(payload, indent=2))
+        payload = decodeMessage(message.payload)  # convert JSON Object to dict
+        self.logger.debug('%s', PrettyJSON(payload))  # only serialized if the record is written
 
         if payload['from'] == 'client':
             pass  # ignore echoing message from the robot
@@ -69,15 +89,15 @@ class Communication:
                 # ensure that malicious messages cannot alter self.planetName
                 if self.planetName == '':
                     self.planetName = payload['payload']['planetName']
-                self.planetMessage = list(payload['payload'].values())
+                self.planetMessage = decodePayload('planet', payload['payload'])
             elif payload['type'] == 'path':
-                self.pathMessage = list(payload['payload'].values())
+                self.__answerPath(decodePayload('path', payload['payload']))
             elif payload['type'] == 'pathSelect':
                 self.correctedDirection = payload['payload']['startDirection']
             elif payload['type'] == 'pathUnveiled':
-                self.pathUnveiledMessages.append(list(payload['payload'].values()))
+                self.inbox.put('pathUnveiled', decodePayload('pathUnveiled', payload['payload']))
             elif payload['type'] == 'target':
-                self.targetMessage = list(payload['payload'].values())
+                self.inbox.put('target', decodePayload('target', payload['payload']))
             elif payload['type'] == 'done':
                 self.doneMessage = payload['payload']['message']
         else:  # payload['from'] == 'debug': (only used in development phase, for testing)
@@ -89,6 +109,38 @@ class Communication:
                 self.debugMessage = payload['payload']['message']
                 self.listOfErrors = payload['payload']['errors']
 
+        self.messageHandled(payload)
+
+    def messageHandled(self, payload):
+        """
+        Called by on_message after a message has been handled, wakes up everyone in wait_for(...)
+        :param payload: dict (the decoded message)
+        :return: void
+        """
+        with self.messageArrived:
+            self.messageArrived.notify_all()
+
+    def wait_for(self, messageType, timeout):
+        """
+        Blocks until a message of the given type is available or timeout seconds have passed
+        Messages are available until the corresponding field is reset, e.g. pathMessage = None,
+        or until they are drained
+        :param messageType: String ('planet', 'path', 'pathSelect', 'pathUnveiled', 'target' or 'done')
+        :param timeout: Float
+        :return: Boolean, True if the message is available
+        """
+        available = {
+            'planet': lambda: self.planetMessage is not None,
+            'path': lambda: self.pathMessage is not None,
+            'pathSelect': lambda: self.correctedDirection is not None,
+            'pathUnveiled': lambda: self.inbox.pending('pathUnveiled') > 0,
+            'target': lambda: self.inbox.pending('target') > 0,
+            'done': lambda: self.doneMessage != ''
+        }[messageType]
+
+        with self.messageArrived:
+            return self.messageArrived.wait_for(available, timeout)
+
     # getter Methods
     def getPlanetMessage(self):
         return self.planetMessage
@@ -99,15 +151,18 @@ class Communication:
     def getCorrectedDirection(self):
         return self.correctedDirection
 
-    def getPathUnveiledMessages(self):
-        return self.pathUnveiledMessages
-
-    def getTargetMessage(self):
-        return self.targetMessage
-
     def getDoneMessage(self):
         return self.doneMessage
 
+    def drain(self, messageType):
+        """
+        Removes and returns all messages of the given type that arrived since the last call, oldest first
+        Every message is returned exactly once, even if more messages arrive while draining
+        :param messageType: String ('pathUnveiled' or 'target')
+        :return: List of (sequence, message) tuples, sequence numbers grow in order of arrival across all types
+        """
+        return self.inbox.drain(messageType)
+
     # DO NOT EDIT THE METHOD SIGNATURE
     #
     # In order to keep the logging working you must provide a topic string and
@@ -119,8 +174,8 @@ class Communication:
         :param message: Object
         :return: void
         """
-        self.logger.debug('Send to: ' + topic)
-        self.logger.debug(json.dumps(message, indent=2))
+        self.logger.debug('Send to: %s', topic)
+        self.logger.debug('%s', PrettyJSON(message))
         message_json = json.dumps(message)  # convert message to JSON Object
         self.client.publish(topic, payload=message_json, qos=1)  # topic is here the specified channel
 
@@ -157,7 +212,7 @@ class Communication:
 
     def sendDiscoveredPath(self, startX, startY, startDirection, endX, endY, endDirection, status, unittest=False):
         """
-        Sends the discovered path to the mothership
+        Sends the discovered path to the mothership, the answer is available as pathMessage
         :param startX: Integer
         :param startY: Integer
         :param startDirection: Integer
@@ -168,22 +223,49 @@ class Communication:
         :param unittest: Boolean
         :return: void
         """
-        discoveredPath = {"from": "client",
-                          "type": "path",
-                          "payload": {
-                             "startX": startX,
-                             "startY": startY,
-                             "startDirection": startDirection,
-                             "endX": endX,
-                             "endY": endY,
-                             "endDirection": endDirection,
-                             "pathStatus": status
-                                      }
-                           }
-        if not unittest:
-            self.send_message('planet/' + self.planetName + '/113', discoveredPath)
-        else:
-            self.send_message('comtest/113', discoveredPath)  # special channel for testing
+        with self.pendingPathsLock:
+            self.awaitedPath = (startX, startY, startDirection)
+
+        self.__sendPath(startX, startY, startDirection, endX, endY, endDirection, status, unittest)
+
+    def reportPath(self, startX, startY, startDirection, endX, endY, endDirection, status, unittest=False):
+        """
+        Sends the discovered path to the mothership without waiting for the answer, several paths can be
+        reported before the first answer arrives. Answers are matched by startX, startY and startDirection
+        :return: concurrent.futures.Future, resolved with the corrected path as messages.PathMsg
+        """
+        future = Future()
+        key = (startX, startY, startDirection)
+
+        # Only the latest report of the same path gets the answer, also if it has been sent with sendDiscoveredPath(...)
+        with self.pendingPathsLock:
+            if key in self.pendingPaths:
+                self.pendingPaths.pop(key).cancel()
+            if key == self.awaitedPath:
+                self.awaitedPath = None
+            self.pendingPaths[key] = future
+
+        # Subclasses may send all paths through reportPath(...), so don't call their sendDiscoveredPath(...)
+        self.__sendPath(startX, startY, startDirection, endX, endY, endDirection, status, unittest)
+        return future
+
+    def deferPath(self):
+        """
+        Stops waiting for the answer to the path sent with sendDiscoveredPath(...) without sending it again,
+        the answer resolves the returned future instead of becoming pathMessage
+        :return: concurrent.futures.Future or None if the answer is pathMessage already
+        """
+        with self.pendingPathsLock:
+            if self.awaitedPath is None:
+                return None
+
+            future = Future()
+            if self.awaitedPath in self.pendingPaths:
+                self.pendingPaths.pop(self.awaitedPath).cancel()
+            self.pendingPaths[self.awaitedPath] = future
+            self.awaitedPath = None
+
+        return future
 
     def sendPathSelected(self, startX, startY, startDirection, unittest=False):
         """
@@ -239,6 +321,47 @@ class Communication:
         else:
             self.send_message('comtest/113', explorationCompleted)  # special channel for testing
 
+    # Helper methods
+    def __sendPath(self, startX, startY, startDirection, endX, endY, endDirection, status, unittest):
+
+        discoveredPath = {"from": "client",
+                          "type": "path",
+                          "payload": {
+                             "startX": startX,
+                             "startY": startY,
+                             "startDirection": startDirection,
+                             "endX": endX,
+                             "endY": endY,
+                             "endDirection": endDirection,
+                             "pathStatus": status
+                                      }
+                           }
+        if not unittest:
+            self.send_message('planet/' + self.planetName + '/113', discoveredPath)
+        else:
+            self.send_message('comtest/113', discoveredPath)  # special channel for testing
+
+    def __answerPath(self, pathMessage):
+
+        key = (pathMessage.startX, pathMessage.startY, pathMessage.startDirection)
+        future = None
+
+        # Answers are only matched by their start, a late or unrelated answer must not resolve another path
+        with self.pendingPathsLock:
+            if key == self.awaitedPath:
+                self.awaitedPath = None
+                self.pathMessage = pathMessage
+            elif key in self.pendingPaths:
+                future = self.pendingPaths.pop(key)
+            elif self.awaitedPath is None:
+                self.pathMessage = pathMessage
+            else:
+                self.logger.debug('Dropped the answer for path %s, another path is awaited', key)
+
+        # Once the future is running it can't be cancelled anymore
+        if future is not None and future.set_running_or_notify_cancel():
+            future.set_result(pathMessage)
+
     # DO NOT EDIT THE METHOD SIGNATURE OR BODY
     #
     # This helper method encapsulated the original "on_message" method and handles
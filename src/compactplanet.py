@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+from array import array
+from heapq import heappush, heappop
+from typing import List, Tuple, Dict, Union
+
+from planet import Direction, Weight
+
+
+class CompactPlanet:
+
+    """
+    Alternative to planet.Planet with the same add_path / get_paths / shortest_path interface
+
+    Nodes are interned to integer ids and every node owns four slots (one per direction,
+    slot = direction // 90) in flat arrays, so adding a path doesn't allocate tuples and
+    searches only touch integers
+    """
+
+    SLOTS = 4
+
+    # Marks a slot without a known path, real weights are never 0
+    NO_PATH = 0
+
+    def __init__(self):
+        """ Initializes the data structure """
+
+        self.ids = dict()         # (x, y) -> node id
+        self.xs = array('l')      # node id -> x
+        self.ys = array('l')      # node id -> y
+
+        # Node id * 4 + slot -> end node id, end slot and weight of the path leaving in that direction
+        self.ends = array('l')
+        self.endSlots = array('b')
+        self.weights = array('l')
+
+        # Number of nodes expanded by all searches so far, for benchmarks
+        self.expansions = 0
+
+
+    def __len__(self):
+        return len(self.xs)
+
+
+    def __intern(self, node: Tuple[int, int]) -> int:
+
+        """
+        Returns the id of node, new nodes get four empty slots
+        """
+
+        nodeId = self.ids.get(node)
+        if nodeId is not None:
+            return nodeId
+
+        nodeId = len(self.xs)
+        self.ids[node] = nodeId
+        self.xs.append(node[0])
+        self.ys.append(node[1])
+
+        for i in range(CompactPlanet.SLOTS):
+            self.ends.append(-1)
+            self.endSlots.append(0)
+            self.weights.append(CompactPlanet.NO_PATH)
+
+        return nodeId
+
+
+    @staticmethod
+    def __directionSlot(direction) -> int:
+
+        """
+        Returns the slot of direction, like planet.Planet it raises ValueError for anything
+        that isn't a Direction, which would otherwise end up in the slot of another node
+        """
+
+        return Direction(direction) // 90
+
+
+    def add_path(self, start: Tuple[Tuple[int, int], Direction], target: Tuple[Tuple[int, int], Direction],
+                 weight: int):
+
+        """
+        Adds a bidirectional path defined between the start and end coordinates to the map and assigns the weight to it
+
+        Example:
+            add_path(((0, 3), Direction.NORTH), ((0, 3), Direction.WEST), 1)
+        :param start: 2-Tuple
+        :param target: 2-Tuple
+        :param weight: Integer
+        :return: void
+        """
+
+        # Checked before any node is interned, so an invalid direction changes nothing
+        dirSlot1 = self.__directionSlot(start[1])
+        dirSlot2 = self.__directionSlot(target[1])
+
+        node1 = self.__intern(start[0])
+        node2 = self.__intern(target[0])
+        slot1 = node1 * CompactPlanet.SLOTS + dirSlot1
+        slot2 = node2 * CompactPlanet.SLOTS + dirSlot2
+
+        self.ends[slot1] = node2
+        self.endSlots[slot1] = dirSlot2
+        self.weights[slot1] = weight
+
+        self.ends[slot2] = node1
+        self.endSlots[slot2] = dirSlot1
+        self.weights[slot2] = weight
+
+
+    def updateWeight(self, node1: Tuple[int, int], dir1: Direction):
+
+        """
+        If an obstacle has been found, this method attempts to update the weight of
+        the corresponding path
+        If there is no corresponding, it does nothing
+        """
+
+        # Like planet.Planet, an invalid direction has no corresponding path
+        try:
+            dirSlot1 = self.__directionSlot(dir1)
+        except ValueError:
+            return
+
+        nodeId = self.ids.get(node1)
+        if nodeId is None:
+            return
+
+        slot1 = nodeId * CompactPlanet.SLOTS + dirSlot1
+        if self.weights[slot1] == CompactPlanet.NO_PATH:
+            return
+
+        slot2 = self.ends[slot1] * CompactPlanet.SLOTS + self.endSlots[slot1]
+        self.weights[slot1] = -1
+        self.weights[slot2] = -1
+
+
+    def get_paths(self) -> Dict[Tuple[int, int], Dict[Direction, Tuple[Tuple[int, int], Direction, Weight]]]:
+
+        """
+        Returns all paths in the same structure as planet.Planet.get_paths()
+        The dictionary is built on every call, changing it does not change the planet
+
+        :return: Dict
+        """
+
+        paths = dict()
+        directions = list(Direction)
+
+        for node, nodeId in self.ids.items():
+            pathsFromNode = dict()
+
+            for slot in range(CompactPlanet.SLOTS):
+                index = nodeId * CompactPlanet.SLOTS + slot
+                if self.weights[index] == CompactPlanet.NO_PATH:
+                    continue
+
+                endId = self.ends[index]
+                pathsFromNode[directions[slot]] = ((self.xs[endId], self.ys[endId]),
+                                                   directions[self.endSlots[index]], self.weights[index])
+
+            paths[node] = pathsFromNode
+
+        return paths
+
+
+    def shortest_path(self, start: Tuple[int, int], target: Tuple[int, int]) -> Union[None, List[Tuple[Tuple[int, int], Direction]]]:
+
+        """
+        Returns a shortest path between two nodes, see planet.Planet.shortest_path(...)
+
+        :param start: 2-Tuple
+        :param target: 2-Tuple
+        :return: 2-Tuple[List, Direction]
+        """
+
+        if start == target:
+            return []
+
+        startId = self.ids.get(start)
+        targetId = self.ids.get(target)
+        if startId is None or targetId is None:
+            return None
+
+        # Implementation of Dijkstra's algorithm with lazy deletion, entries that
+        # are worse than the known distance of their node are skipped when popped
+        size = len(self.xs)
+        distance = [-1] * size
+        predecessorSlot = array('l', [-1]) * size
+        settled = bytearray(size)
+
+        ends = self.ends
+        weights = self.weights
+
+        distance[startId] = 0
+        queue = [(0, startId)]
+
+        while queue:
+            currentDistance, currentNode = heappop(queue)
+            if settled[currentNode]:
+                continue
+
+            settled[currentNode] = 1
+            self.expansions += 1
+
+            if currentNode == targetId:
+                break
+
+            base = currentNode * CompactPlanet.SLOTS
+            for index in range(base, base + CompactPlanet.SLOTS):
+
+                weight = weights[index]
+                if weight <= 0:
+                    continue
+
+                neighbour = ends[index]
+                newDistance = currentDistance + weight
+
+                if not settled[neighbour] and (distance[neighbour] < 0 or newDistance < distance[neighbour]):
+                    distance[neighbour] = newDistance
+                    predecessorSlot[neighbour] = index
+                    heappush(queue, (newDistance, neighbour))
+
+        if not settled[targetId]:
+            return None
+
+        # Walk back along the predecessor slots
+        directions = list(Direction)
+        path = []
+        node = targetId
+
+        while node != startId:
+            index = predecessorSlot[node]
+            node = index // CompactPlanet.SLOTS
+            path.append(((self.xs[node], self.ys[node]), directions[index % CompactPlanet.SLOTS]))
+
+        path.reverse()
+        return path
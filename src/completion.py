@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+from typing import Tuple
+
+from frontier import Frontier
+from planet import Planet
+
+
+class CompletionTracker:
+
+    """
+    Knows at any time whether there is still something to explore
+    for explorer.Explorer
+
+    Listens to the planet and to the frontier and keeps the number of frontier paths per connected
+    part of the map up to date, where nodes are connected by free paths
+
+    Every update is O(1) (amortized, using union-find), except for a path that stops being free.
+    That can split a part of the map, so the parts are built again on the next query. This only
+    happens when an obstacle is found or the mothership corrects a path
+
+    Call detach() once the tracker isn't needed anymore
+    """
+
+    def __init__(self, planet: Planet, frontier: Frontier):
+
+        self.planet = planet
+        self.frontier = frontier
+
+        self.__rebuild()
+        self.planet.listeners.append(self.__pathChanged)
+        self.frontier.listeners.append(self.__frontierChanged)
+
+
+    def detach(self):
+
+        """
+        Stops listening to the planet and the frontier
+        """
+
+        if self.__pathChanged in self.planet.listeners:
+            self.planet.listeners.remove(self.__pathChanged)
+        if self.__frontierChanged in self.frontier.listeners:
+            self.frontier.listeners.remove(self.__frontierChanged)
+
+
+    def openFrontier(self, node: Tuple[int, int]):
+
+        """
+        Returns the number of frontier paths that can be reached from node over free paths,
+        0 means that there is nothing left to explore from node
+        """
+
+        if self.dirty:
+            self.__rebuild()
+
+        return self.openPaths.get(self.__find(node), 0)
+
+
+    # Helper methods for union-find
+
+    def __rebuild(self):
+
+        self.parent = dict()
+        self.openPaths = dict()
+        self.dirty = False
+
+        for node, pathsFromNode in self.planet.paths.items():
+            for endNode, endDirection, weight in pathsFromNode.values():
+                if weight > 0:
+                    self.__union(node, endNode)
+
+        for node, directions in self.frontier.pathsByNode.items():
+            root = self.__find(node)
+            self.openPaths[root] = self.openPaths.get(root, 0) + len(directions)
+
+
+    def __find(self, node):
+
+        parent = self.parent.setdefault(node, node)
+        if parent == node:
+            return node
+
+        root = parent
+        while self.parent[root] != root:
+            root = self.parent[root]
+
+        # Path compression
+        while node != root:
+            self.parent[node], node = root, self.parent[node]
+
+        return root
+
+
+    def __union(self, node1, node2):
+
+        root1 = self.__find(node1)
+        root2 = self.__find(node2)
+
+        if root1 == root2:
+            return
+
+        self.parent[root2] = root1
+        self.openPaths[root1] = self.openPaths.get(root1, 0) + self.openPaths.pop(root2, 0)
+
+
+    # Listeners
+
+    def __pathChanged(self, node, direction, oldPath, newPath):
+
+        # A free path that has been blocked or now leads somewhere else may have split the map
+        if oldPath is not None and oldPath[2] > 0 and (newPath[2] <= 0 or newPath[0] != oldPath[0]):
+            self.dirty = True
+
+        if not self.dirty and newPath[2] > 0:
+            self.__union(node, newPath[0])
+
+
+    def __frontierChanged(self, path, added):
+
+        if not self.dirty:
+            root = self.__find(path[0])
+            self.openPaths[root] = self.openPaths.get(root, 0) + (1 if added else -1)
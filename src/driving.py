@@ -1,12 +1,14 @@
 # This file includes all driving related things
+# Attention: Do not import the ev3dev.ev3 module in this file, the devices come from hardware.EV3Hardware
 
-import ev3dev.ev3 as ev3
-import time
 import math
 
+from hardware import EV3Hardware
 import sensor
 import odometry
 import explorer
+from colorclassifier import BLUE, RED, ColorClassifier
+from scheduler import LoopScheduler
 
 
 DEBUGPRINTS = False  # Allows to easily switch debug prints in the console on or off
@@ -15,16 +17,27 @@ DEBUGPRINTS = False  # Allows to easily switch debug prints in the console on or
 PI2 = math.pi / 2
 PI4 = math.pi / 4
 
+# Iterations per second of the PID in lineFollower, kd and ki depend on it
+CONTROL_FREQUENCY = 50
+
+# Seconds after which the distance of the background sampler is too old to drive on
+MAX_DISTANCE_AGE = 0.15
+
+# Samples in a row that must show red or blue before lineFollower stops on a node
+NODE_DEBOUNCE = 2
+
 
 class Driving:
 
     shutdown = False
 
     # Defining initial behaviour, setting everything up
-    def __init__(self, communication):
+    # hardware defaults to the EV3, simev3.SimulatedEV3 drives a simulated robot instead
+    def __init__(self, communication, mapStore=None, hardware=None, calibrate=True):
 
-        self.lm = ev3.LargeMotor("outA")  # lm = left motor
-        self.rm = ev3.LargeMotor("outD")  # rm = right motor
+        self.hardware = hardware or EV3Hardware()
+        self.lm = self.hardware.largeMotor("outA")  # lm = left motor
+        self.rm = self.hardware.largeMotor("outD")  # rm = right motor
         self.resetMotors()
         self.shutdown = False  # Boolean False if driving
         self.obstacleFound = False  # Boolean False if no obstacle has been detected
@@ -32,10 +45,11 @@ class Driving:
         self.prevtickr = 0
 
         # Initialization for various needed classes
-        self.sensor = sensor.Sensor()
-        self.sound = ev3.Sound()
-        self.explorer = explorer.Explorer(communication)
+        self.sensor = sensor.Sensor(self.hardware)
+        self.sound = self.hardware.sound()
+        self.explorer = explorer.Explorer(communication, mapStore=mapStore)
         self.odo = odometry.Odometry()
+        self.loop = LoopScheduler(CONTROL_FREQUENCY, clock=self.hardware.clock, sleep=self.hardware.sleep)  # Keeps the loop times of all lineFollower runs
 
         # List for the scanned directions on a node
         self.scannedDirections = []
@@ -43,14 +57,20 @@ class Driving:
         # Calibrate the sensor or use standard values if calibration is disabled
         self.rBlue, self.gBlue, self.bBlue = (49, 180, 93)
         self.rRed, self.gRed, self.bRed = (159, 61, 13)
+        self.brightnessBlack, self.brightnessWhite = (62, 424)
         self.initialOffset = 220
 
         # Can be disabled for debugging, fallback to the values above
-        self.calibrateSensor()
+        if calibrate:
+            self.calibrateSensor()
+
+        # Built once from the calibrated values, lineFollower classifies every sample with it
+        self.classifier = ColorClassifier((self.rBlue, self.gBlue, self.bBlue), (self.rRed, self.gRed, self.bRed),
+                                          self.brightnessBlack, self.brightnessWhite, debounce=NODE_DEBOUNCE)
 
     # Allows to wait until a button is pressed (to confirm an action)
     def buttonPressed(self):
-        btn = ev3.Button()
+        btn = self.hardware.button()
 
         while not btn.any():
             pass
@@ -139,12 +159,28 @@ class Driving:
         olderror = 0
 
         self.shutdown = False
+        self.sensor.startSampling()
+        self.classifier.reset()
+        self.loop.start()
 
         while not self.shutdown:
 
+            # Waits for the next period, so the PID always gets the same sample period
+            self.loop.tick()
+
             # Brightness-values: black = (38, 77, 15) -> 62, white = (285, 503, 200) -> 424
-            r, g, b = self.sensor.getColor()
-            brightness = self.sensor.getBrightness()
+            # One read of each sensor per iteration
+            r, g, b, brightness, distance = self.sensor.sample()
+
+            # The distance comes from the background sampler, without a recent one the robot could hit an obstacle
+            if self.sensor.distances.age() > MAX_DISTANCE_AGE:
+
+                if DEBUGPRINTS: print("No recent distance, waiting for the ultrasonic sensor")
+
+                self.stopMotors()
+                continue
+
+            color = self.classifier.update(r, g, b, brightness)
 
             # Changes target speed and offset depending on the brightness
             if 100 < brightness < 370:
@@ -177,7 +213,7 @@ class Driving:
             self.run(-self.powerl, -self.powerr)
 
             # Checks for obstacles
-            if self.sensor.obstacleTest() < 10:
+            if distance < 10:
 
                 self.stopMotors()
                 self.shutdown = True
@@ -187,7 +223,7 @@ class Driving:
 
                 # Backs the robot up a little
                 self.run(100, 100)
-                time.sleep(1)
+                self.hardware.sleep(1)
                 self.stopMotors()
 
                 if DEBUGPRINTS: print("Ouch! Obstacle detected!")
@@ -199,12 +235,8 @@ class Driving:
                 self.turnToPath(self.odo.gamma - PI2)
                 self.lineFollower()
 
-            # Sets the values for blue and red nodes
-            isBlue = lambda r, g, b: r in range(self.rBlue - 30, self.rBlue + 30) and g in range(self.gBlue - 30, self.gBlue + 30) and b in range(self.bBlue - 30, self.bBlue + 30)
-            isRed = lambda r, g, b: r in range(self.rRed - 30, self.rRed + 30) and g in range(self.gRed - 30, self.gRed + 30) and b in range(self.bRed - 30, self.bRed + 30)
-
             # Checks if a red or blue node is detected and performs an action
-            if isRed(r, g, b) or isBlue(r, g, b):
+            if color is RED or color is BLUE:
 
                 self.stopMotors()
                 self.shutdown = True
@@ -218,6 +250,8 @@ class Driving:
 
                 if correctedOdoData is None:
                     print("We're finished. Hooray! (In case we're not, just pretend we are.)")
+                    print("Control loop:", self.loop.summary())
+                    self.sensor.stopSampling()
                     self.sound.play('/home/robot/src/sounds/mission-passed.wav').wait()
                     return
 
@@ -240,11 +274,13 @@ class Driving:
                     self.newDir = self.explorer.getNextDirection(None)
                     self.run(-100, -100)
 
-                    time.sleep(1)
+                    self.hardware.sleep(1)
                     self.stopMotors()
 
                 if self.newDir is None:
                     print("We're finished. Hooray! (In case we're not, just pretend we are.)")
+                    print("Control loop:", self.loop.summary())
+                    self.sensor.stopSampling()
                     self.sound.play('/home/robot/src/sounds/mission-passed.wav').wait()
                     return
 
@@ -386,7 +422,7 @@ class Driving:
 
         # Move to the center of the node
         self.run(-100, -100)
-        time.sleep(1.2)
+        self.hardware.sleep(1.2)
         self.stopMotors()
 
         # Creates a local variable, used to determine how far the robot should turn
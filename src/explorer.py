@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 
 from typing import Tuple
-from time import sleep
-from planet import Planet, Direction
+from completion import CompletionTracker
+from frontier import Frontier
+from planet import Planet, Direction, manhattan
+from planner import Planner
 
 
 class Explorer:
@@ -21,10 +23,21 @@ class Explorer:
     """
 
 
-    def __init__(self, communication):
+    def __init__(self, communication, responseTime=3, mapStore=None):
+
+        """
+        responseTime is the longest time in seconds to wait for an answer of the mothership,
+        waiting ends as soon as the answer arrives
+
+        If a mapStore.MapStore is given, the explorer starts with the map of the last run on the
+        same planet and saves its map when it is done
+        """
 
         self.planet = Planet()
         self.communication = communication
+        self.responseTime = responseTime
+        self.mapStore = mapStore
+        self.planetName = None
 
         # REMOVE BEFORE EXAM, for debugging only!!
         #self.communication.sendTestPlanet("Fassaden")
@@ -33,19 +46,36 @@ class Explorer:
         self.target = None
         self.visitedNodes = set()
 
+        # Keeps the route to the target up to date across nodes while paths are added or blocked
+        self.targetPlanner = None
+
         self.poppedPath = None
         self.currentRoute = []
-        self.DFSqueue = []
+        self.DFSqueue = Frontier()
+
+        # Nodes whose paths changed or that have been visited since the last call of updateQueue(...),
+        # only DFSqueue entries that start or end at them have to be checked again
+        self.changedNodes = set()
+        self.planet.listeners.append(self.__pathChanged)
+
+        # Tells without searching whether anything reachable is left in DFSqueue
+        self.completion = CompletionTracker(self.planet, self.DFSqueue)
+
+        # Known paths that have been driven and reported without waiting for the answer,
+        # as (future, start node, exit direction, end node, end direction, weight)
+        self.pendingReports = []
+
+        # Ends (node, direction) of paths whose answer didn't arrive in time, their weight is an estimate until
+        # the answer arrives or the path changes otherwise. They are saved as paths to be driven again
+        self.unconfirmedPaths = set()
 
 
     # Methods to be called by the Driving class
 
     def onNodeReached(self, node: Tuple[int, int], entranceDirection: Direction, obstacleFound: bool):
         
-        # Reset communication
-        self.communication.targetMessage = None
+        # Reset communication, pathUnveiled and target messages stay queued until they are drained
         self.communication.correctedDirection = None
-        self.communication.pathUnveiledMessages = [] 
 
         previousNode = self.currentNode
         self.currentNode = node
@@ -58,7 +88,8 @@ class Explorer:
             self.__resetRoute()
 
         if self.currentNode == self.target:
-            self.target = None
+            self.__setTarget(None)
+            self.__saveMap()
             self.communication.targetReached()
             return None
 
@@ -76,9 +107,10 @@ class Explorer:
         try:
             if len(self.planet.paths[self.currentNode]) == 4:
 
-                self.DFSqueue = [(self.currentNode, direction) for direction in
-                                 [Direction.SOUTH, Direction.NORTH, Direction.EAST, Direction.WEST]
-                                ] + self.DFSqueue
+                self.DFSqueue.pushAll([(self.currentNode, direction) for direction in
+                                       [Direction.SOUTH, Direction.NORTH, Direction.EAST, Direction.WEST]
+                                      ])
+                self.changedNodes.add(self.currentNode)
                 return True
 
         except: pass
@@ -93,9 +125,11 @@ class Explorer:
         otherwise it is a list that contains the directions of discovered Paths
         """
 
+        self.__testPathsConfirmed()
         self.__testTargetChanged()
         self.__testPathUnveiled()
         self.visitedNodes.add(self.currentNode)
+        self.changedNodes.add(self.currentNode)
 
         nextDirection = self.__computeNextDirection(scannedDirections)
         if nextDirection is None:
@@ -104,8 +138,7 @@ class Explorer:
         self.exitDirection = nextDirection
         self.__doPathSelectedMessage()
 
-        try: self.DFSqueue.remove((self.currentNode, self.exitDirection))
-        except: pass
+        self.DFSqueue.discard((self.currentNode, self.exitDirection))
         return self.exitDirection
 
 
@@ -117,31 +150,65 @@ class Explorer:
         if previousNode is None:
 
             self.communication.sendReady()
-            sleep(3)
+            self.communication.wait_for('planet', self.responseTime)
 
             name, x, y, o = self.communication.getPlanetMessage()
             self.currentNode = (x, y)
             self.entranceDirection = Direction(o)
             self.communication.subscribePlanet()
+            self.__warmStart(name)
             return
 
 
         rotate = lambda dir: (dir + 180) % 360
+        knownPath = self.planet.paths.get(previousNode, dict()).get(self.exitDirection)
+
+        # The end of a known free path is known, so planning can go on while the mothership confirms it
+        if not obstacleFound and knownPath is not None and knownPath[2] > 0:
+
+            endNode, endDirection, weight = knownPath
+            future = self.communication.reportPath(*previousNode, self.exitDirection, *endNode, endDirection, "free")
+            self.pendingReports.append((future, previousNode, self.exitDirection, endNode, endDirection, weight))
+
+            if endNode != self.currentNode or rotate(endDirection) != self.entranceDirection:
+                self.currentNode = endNode
+                self.entranceDirection = Direction(rotate(endDirection))
+                self.__resetRoute()
+
+            return
+
+        self.communication.pathMessage = None
 
         if obstacleFound:
-            self.communication.sendDiscoveredPath(
-                *self.currentNode, self.exitDirection, *self.currentNode, rotate(self.entranceDirection), "blocked")
+            path = (*self.currentNode, self.exitDirection, *self.currentNode, rotate(self.entranceDirection), "blocked")
 
         else:
-            self.communication.sendDiscoveredPath(
-                *previousNode, self.exitDirection, *self.currentNode, rotate(self.entranceDirection), "free")
+            path = (*previousNode, self.exitDirection, *self.currentNode, rotate(self.entranceDirection), "free")
+
+        self.communication.sendDiscoveredPath(*path)
+
+        # Without the answer go on with the path odometry measured, the answer is applied like
+        # the answer for a known path when it arrives, see __testPathsConfirmed()
+        future = None
+        if not self.communication.wait_for('path', self.responseTime):
+            future = self.communication.deferPath()
 
+        if future is not None:
+
+            start = previousNode, self.exitDirection
+            end = self.currentNode, Direction(rotate(self.entranceDirection))
+            weight = -1 if obstacleFound else self.__estimateWeight(previousNode, self.currentNode)
+
+            self.planet.add_path(start, end, weight)
+            self.pendingReports.append((future, *start, *end, weight))
+            if not obstacleFound:
+                self.unconfirmedPaths.update([start, end])
+            return
 
-        sleep(3)
         pathMessage = self.communication.getPathMessage()
-        Xc, Yc = pathMessage[3:5]
-        weight = pathMessage[7]
-        Dc = Direction(rotate(pathMessage[5]))
+        Xc, Yc = pathMessage.endX, pathMessage.endY
+        weight = pathMessage.pathWeight
+        Dc = Direction(rotate(pathMessage.endDirection))
 
         if (Xc, Yc) != self.currentNode or Dc != self.entranceDirection:
             self.currentNode = (Xc, Yc)
@@ -154,7 +221,9 @@ class Explorer:
     def __doPathSelectedMessage(self):
 
         self.communication.sendPathSelected(*self.currentNode, self.exitDirection)
-        sleep(3)
+
+        # The mothership only answers if it wants us to take another path
+        self.communication.wait_for('pathSelect', self.responseTime)
         Dc = self.communication.getCorrectedDirection()
 
         if Dc is not None and Dc != self.exitDirection:
@@ -174,26 +243,138 @@ class Explorer:
             self.__resetRoute()
 
 
+    def __warmStart(self, planetName):
+
+        self.planetName = planetName
+        storedMap = self.mapStore.load(planetName) if self.mapStore is not None else None
+
+        if storedMap is None:
+            return
+
+        for node, pathsFromNode in storedMap.planet.paths.items():
+            for direction, (endNode, endDirection, weight) in pathsFromNode.items():
+
+                # Obstacles may be somewhere else this time, so paths blocked by one are driven again
+                if weight == -1 and endNode != node:
+                    if node in storedMap.visitedNodes:
+                        self.DFSqueue.push((node, direction))
+
+                # Known paths are confirmed by the mothership when they are driven, see __doPathMessage(...)
+                elif direction not in self.planet.paths.get(node, dict()):
+                    self.planet.add_path((node, direction), (endNode, endDirection), weight)
+
+                # E.g. the target, the last run ended there before it was scanned
+                if weight > 0 and endNode not in storedMap.visitedNodes:
+                    self.DFSqueue.push((node, direction))
+
+        self.visitedNodes.update(storedMap.visitedNodes)
+        self.DFSqueue.pushAll(path for path in storedMap.frontier if path not in self.DFSqueue)
+        self.changedNodes.update(node for node, direction in self.DFSqueue)
+
+
+    def __saveMap(self):
+
+        if self.mapStore is None or self.planetName is None:
+            return
+
+        # The DFS step we are on has been taken out of the queue already
+        frontier = list(self.DFSqueue)
+        if self.poppedPath is not None and self.poppedPath not in self.DFSqueue:
+            frontier.insert(0, self.poppedPath)
+
+        # Estimated weights must not be taken for known ones in the next run, the paths are driven again instead
+        planet = self.planet
+        if len(self.unconfirmedPaths) > 0:
+            planet = Planet()
+            planet.paths = {node: {direction: path for direction, path in pathsFromNode.items()
+                                   if (node, direction) not in self.unconfirmedPaths}
+                            for node, pathsFromNode in self.planet.paths.items()}
+            frontier.extend(path for path in sorted(self.unconfirmedPaths) if path not in frontier)
+
+        self.mapStore.save(self.planetName, planet, self.visitedNodes, frontier)
+
+
+    def __estimateWeight(self, startNode, endNode):
+
+        # Odometry tells how many grid steps the path covers, the confirmed paths what a step costs on this planet
+        weights = steps = 0
+        for node, pathsFromNode in self.planet.paths.items():
+            for direction, (pathEnd, pathEndDirection, weight) in pathsFromNode.items():
+                if weight > 0 and manhattan(node, pathEnd) > 0 and (node, direction) not in self.unconfirmedPaths:
+                    weights += weight
+                    steps += manhattan(node, pathEnd)
+
+        stepWeight = weights / steps if steps > 0 else 1
+        return max(1, round(manhattan(startNode, endNode) * stepWeight))
+
+
+    def __testPathsConfirmed(self):
+
+        pendingReports = []
+
+        for report in self.pendingReports:
+
+            future, startNode, startDirection, endNode, endDirection, weight = report
+            if not future.done():
+                pendingReports.append(report)
+                continue
+
+            if future.cancelled():
+                continue
+
+            pathMessage = future.result()
+            self.unconfirmedPaths.difference_update([(startNode, startDirection), (endNode, endDirection)])
+            correctedEnd = (pathMessage.endX, pathMessage.endY), Direction(pathMessage.endDirection)
+
+            # Only a correction of the known path means that the route has to be planned again
+            if correctedEnd != (endNode, endDirection) or pathMessage.pathWeight != weight:
+
+                self.planet.add_path((startNode, startDirection), correctedEnd, pathMessage.pathWeight)
+                self.__resetRoute()
+
+                # We are still standing at the end of the path
+                if endNode == self.currentNode and Direction((endDirection + 180) % 360) == self.entranceDirection:
+                    self.currentNode = correctedEnd[0]
+                    self.entranceDirection = Direction((correctedEnd[1] + 180) % 360)
+
+        self.pendingReports = pendingReports
+
+
     def __testTargetChanged(self):
  
-        newTarget = self.communication.getTargetMessage()
-        if newTarget is None:
+        # Only the latest target counts
+        newTargets = self.communication.drain('target')
+        if len(newTargets) == 0:
             return
 
-        self.target = tuple(newTarget)
+        sequence, newTarget = newTargets[-1]
+        self.__setTarget(tuple(newTarget))
 
         if self.currentNode == self.target:
-            self.target = None
+            self.__setTarget(None)
+            self.__saveMap()
             self.communication.targetReached()
         else: 
             self.__resetRoute()
 
 
+    def __setTarget(self, target):
+
+        if target is not None and target == self.target:
+            return
+
+        if self.targetPlanner is not None:
+            self.targetPlanner.detach()
+
+        self.target = target
+        self.targetPlanner = Planner(self.planet, target) if target is not None else None
+
+
     def __testPathUnveiled(self):
 
-        newPaths = self.communication.getPathUnveiledMessages()
+        newPaths = self.communication.drain('pathUnveiled')
 
-        for newPath in newPaths:
+        for sequence, newPath in newPaths:
 
             Xs, Ys, Ds, Xe, Ye, De, status, weight = newPath
             Ds = Direction(Ds)
@@ -203,10 +384,8 @@ class Explorer:
 
             if weight == -1:
 
-                try:
-                    self.DFSqueue.remove(((Xs, Ys), Ds))
-                    self.DFSqueue.remove(((Xe, Ye), De))
-                except: pass
+                self.DFSqueue.discard(((Xs, Ys), Ds))
+                self.DFSqueue.discard(((Xe, Ye), De))
 
             else:
                 self.pathsForQueue.append(((Xs, Ys), Ds))
@@ -218,14 +397,19 @@ class Explorer:
 
         if len(self.currentRoute) == 0:
 
-            nextDiscoveryStep = self.getDiscoveryStep()
+            # If nothing reachable is left to explore, there is no need to search for it
+            if self.completion.openFrontier(self.currentNode) == 0:
+                nextDiscoveryStep = None
+            else:
+                nextDiscoveryStep = self.getDiscoveryStep()
 
 
             if self.target is not None:
 
-                routeToTarget = self.planet.shortest_path(self.currentNode, self.target)
+                routeToTarget = self.targetPlanner.route(self.currentNode)
 
                 if routeToTarget is None and nextDiscoveryStep is None:
+                    self.__saveMap()
                     self.communication.explorationCompleted()
                     return None
                     
@@ -234,13 +418,17 @@ class Explorer:
                 
                 else:
                     self.currentRoute = routeToTarget
+
+                    # Undo the DFS step
+                    if nextDiscoveryStep is not None:
+                        self.DFSqueue.push(self.poppedPath)
                     self.poppedPath = None
-                    self.DFSqueue = self.oldDFSqueue[:]
 
 
             else:
 
                 if nextDiscoveryStep is None:
+                    self.__saveMap()
                     self.communication.explorationCompleted()
                     return None
 
@@ -257,11 +445,24 @@ class Explorer:
             # This is done to protect DFS from a bug in Driving.scanNodes()
             # This bug is almost definitely gone by now
             scannedDirections = set(scannedDirections)
-            self.DFSqueue = [(self.currentNode, direction) for direction in scannedDirections] + self.DFSqueue
+            self.DFSqueue.pushAll([(self.currentNode, direction) for direction in scannedDirections])
+            self.changedNodes.add(self.currentNode)
+
+        self.DFSqueue.pushAll([x for x in self.pathsForQueue if x not in self.DFSqueue])
+        self.changedNodes.update(node for node, direction in self.pathsForQueue)
 
-        # Filter out paths that are no longer of interest to us
-        self.DFSqueue = [x for x in self.pathsForQueue if x not in self.DFSqueue] + self.DFSqueue
-        self.DFSqueue = list(filter(self.__pathIsInteresting, self.DFSqueue))
+        # Filter out paths that are no longer of interest to us, only paths that start or end
+        # at a changed node can have become uninteresting
+        for node in self.changedNodes:
+
+            candidates = [(node, direction) for direction in self.DFSqueue.directionsFrom(node)]
+            candidates += [path[:2] for path in self.planet.paths.get(node, dict()).values()]
+
+            for path in candidates:
+                if path in self.DFSqueue and not self.__pathIsInteresting(path):
+                    self.DFSqueue.discard(path)
+
+        self.changedNodes = set()
 
 
     # Method for computing the next DFS step
@@ -271,6 +472,8 @@ class Explorer:
         """
         Uses a modified version of DFS to get a route through the graph that 
         includes every node that has not yet been visited while using low-cost routes
+        If there are no unexplored paths at the current node, the closest node with 
+        unexplored paths is chosen
 
         Calling this method advances the DFS by one step
         """
@@ -278,29 +481,27 @@ class Explorer:
         if len(self.DFSqueue) == 0:
             return None
 
-        self.oldDFSqueue = self.DFSqueue[:]
-        pathsFromCurrentNode = [(node, direction) for (node, direction) in self.DFSqueue if node == self.currentNode]
+        directionsFromCurrentNode = self.DFSqueue.directionsFrom(self.currentNode)
 
-        if len(pathsFromCurrentNode) > 0:
+        if len(directionsFromCurrentNode) > 0:
 
-            nextPath = pathsFromCurrentNode[0]
+            nextPath = self.currentNode, directionsFromCurrentNode[0]
             self.poppedPath = nextPath
-            self.DFSqueue.remove(nextPath)
+            self.DFSqueue.discard(nextPath)
             return [nextPath]
 
-        for i in range(len(self.DFSqueue)):
-
-            self.DFSqueue = self.oldDFSqueue[:]
-            nextPath = self.DFSqueue.pop(i)
-            self.poppedPath = nextPath
+        # Backtrack to the closest node that still has unexplored paths
+        closest = self.planet.shortest_path_to_any(self.currentNode, self.DFSqueue.nodes())
 
-            node = nextPath[0]
-            backtrackingPath = self.planet.shortest_path(self.currentNode, node)
+        if closest is None:
+            return None
 
-            if backtrackingPath is not None:
-                return backtrackingPath + [nextPath]
+        backtrackingPath, node = closest
+        nextPath = node, self.DFSqueue.directionsFrom(node)[0]
+        self.poppedPath = nextPath
+        self.DFSqueue.discard(nextPath)
 
-        return None
+        return backtrackingPath + [nextPath]
 
 
     def __pathIsInteresting(self, path):
@@ -327,8 +528,13 @@ class Explorer:
         return True
 
 
+    def __pathChanged(self, node, direction, oldPath, newPath):
+        self.changedNodes.add(node)
+        self.unconfirmedPaths.discard((node, direction))
+
+
     def __resetRoute(self):
         self.currentRoute = []
 
         if self.poppedPath is not None:
-            self.DFSqueue.insert(0, self.poppedPath)
\ No newline at end of file
+            self.DFSqueue.push(self.poppedPath)
\ No newline at end of file
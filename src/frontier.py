@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+from collections import OrderedDict
+from typing import Tuple
+
+from planet import Direction
+
+
+class Frontier:
+
+    """
+    Paths the explorer still wants to drive, in DFS order
+    for explorer.Explorer
+
+    Paths are (node, direction) tuples. The most recently pushed path is the front, iterating
+    goes from the front to the back. Membership tests, push and removal are O(1), the paths
+    leaving a node can be looked up without scanning the other ones
+    """
+
+    def __init__(self):
+
+        # Both are ordered from the back to the front, the front is at the end
+        self.paths = OrderedDict()
+        self.pathsByNode = dict()
+
+        # Called as listener(path, added) whenever a path is added to or removed from the frontier
+        self.listeners = []
+
+    def __contains__(self, path):
+        return path in self.paths
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return reversed(self.paths)
+
+    def push(self, path: Tuple[Tuple[int, int], Direction]):
+
+        """
+        Puts path at the front, paths that are already in the frontier are moved there
+        """
+
+        node, direction = path
+        pathsFromNode = self.pathsByNode.setdefault(node, OrderedDict())
+
+        if path in self.paths:
+            self.paths.move_to_end(path)
+            pathsFromNode.move_to_end(direction)
+        else:
+            self.paths[path] = None
+            pathsFromNode[direction] = None
+
+            for listener in self.listeners:
+                listener(path, True)
+
+    def pushAll(self, paths):
+
+        """
+        Puts paths at the front, keeping their order (paths[0] ends up in front)
+        """
+
+        for path in reversed(list(paths)):
+            self.push(path)
+
+    def discard(self, path: Tuple[Tuple[int, int], Direction]):
+
+        """
+        Removes path if it is in the frontier
+        """
+
+        if path not in self.paths:
+            return
+
+        node, direction = path
+        del self.paths[path]
+        del self.pathsByNode[node][direction]
+
+        if len(self.pathsByNode[node]) == 0:
+            del self.pathsByNode[node]
+
+        for listener in self.listeners:
+            listener(path, False)
+
+    def directionsFrom(self, node: Tuple[int, int]):
+
+        """
+        Returns the directions of all paths leaving node, front first
+        """
+
+        return list(reversed(self.pathsByNode.get(node, ())))
+
+    def nodes(self):
+
+        """
+        Returns every node with paths in the frontier once, ordered by their path closest to the front
+        """
+
+        nodes = OrderedDict()
+        for node, direction in self:
+            nodes[node] = None
+
+        return list(nodes)
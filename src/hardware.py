@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+# The only module that imports ev3dev.ev3, and only when EV3Hardware is created,
+# so driving.Driving and sensor.Sensor can run with simev3.SimulatedEV3 anywhere
+import time
+
+from sampler import BackgroundSampler
+
+
+class EV3Hardware:
+    """
+    The devices of the robot, used by driving.Driving and sensor.Sensor
+
+    A backend offers these methods, simev3.SimulatedEV3 offers the same ones:
+    - largeMotor(port): position, speed_sp, stop_action, command, reset() and stop() like ev3.LargeMotor
+    - colorSensor(): mode and bin_data(format) like ev3.ColorSensor
+    - ultrasonicSensor(): mode and distance_centimeters like ev3.UltrasonicSensor
+    - button(): any() like ev3.Button
+    - sound(): play(filename), which returns an object with wait(), like ev3.Sound
+    - clock() and sleep(seconds): the time the devices live in, the driving code never uses time directly
+    - sampler(read, interval): a sampler.BackgroundSampler for read() in that time
+    """
+
+    def __init__(self):
+        import ev3dev.ev3 as ev3
+        self.ev3 = ev3
+
+    def largeMotor(self, port):
+        return self.ev3.LargeMotor(port)
+
+    def colorSensor(self):
+        return self.ev3.ColorSensor()
+
+    def ultrasonicSensor(self):
+        return self.ev3.UltrasonicSensor()
+
+    def button(self):
+        return self.ev3.Button()
+
+    def sound(self):
+        return self.ev3.Sound()
+
+    def clock(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def sampler(self, read, interval):
+        return BackgroundSampler(read, interval, clock=self.clock)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class PrettyJSON:
+    """
+    Log argument that is only serialized if the record is actually written:
+    logger.debug('%s', PrettyJSON(message))
+    """
+    __slots__ = ['message']
+
+    def __init__(self, message):
+        self.message = message
+
+    def __str__(self):
+        return json.dumps(self.message, indent=2)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Puts records into a queue without formatting them
+
+    QueueHandler formats every record on the logging thread, that would serialize PrettyJSON
+    arguments on paho's thread or in the control loop. The arguments must not be changed after
+    they have been logged, which holds for the messages logged by Communication
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def startLogging(filename, level=logging.DEBUG, format='%(asctime)s: %(message)s'):
+    """
+    Sends all log records to filename through a background thread, file writes never block the caller
+    Returns the listener, call its stop() method before the program ends to write the remaining records
+    :param filename: String
+    :param level: Integer
+    :param format: String
+    :return: logging.handlers.QueueListener
+    """
+    fileHandler = logging.FileHandler(filename)
+    fileHandler.setFormatter(logging.Formatter(format))
+
+    records = queue.Queue()
+    listener = QueueListener(records, fileHandler)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(DeferredQueueHandler(records))
+
+    listener.start()
+    return listener
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+from itertools import count
+
+
+PublishInfo = namedtuple('PublishInfo', ['rc', 'mid'])
+
+logger = logging.getLogger('loopback')
+
+
+def topicMatches(topicFilter, topic):
+    """
+    Returns True if topic matches topicFilter, which may contain the MQTT wildcards + and #
+    :param topicFilter: String
+    :param topic: String
+    :return: Boolean
+    """
+    filterLevels = topicFilter.split('/')
+    topicLevels = topic.split('/')
+
+    for i, level in enumerate(filterLevels):
+        if level == '#':
+            return True
+        if i >= len(topicLevels) or (level != '+' and level != topicLevels[i]):
+            return False
+
+    return len(filterLevels) == len(topicLevels)
+
+
+class LoopbackMessage:
+    """
+    A message as seen by on_message, offers the fields of paho.mqtt.client.MQTTMessage
+    timestamp is the time.perf_counter() value of the publish call, for latency measurements
+    """
+    __slots__ = ['mid', 'topic', 'payload', 'qos', 'retain', 'dup', 'timestamp']
+
+    def __init__(self, mid, topic, payload, qos, retain=False, timestamp=0.0):
+        self.mid = mid
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+        self.dup = False
+        self.timestamp = timestamp
+
+
+class LoopbackBroker:
+    """
+    In-process stand-in for the mothership's MQTT broker
+
+    Clients subscribe to topic filters and get every message published to a matching topic with
+    the lower of the publish and the subscription QoS. QoS 1 messages are kept for clients with a
+    persistent session (clean_session=False) while they are disconnected and delivered once they
+    are connected again, QoS 0 messages only reach connected clients
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.mids = count(1)
+
+        # client -> {topic filter: QoS}
+        self.subscriptions = dict()
+
+    def subscribe(self, client, topicFilter, qos=0):
+        with self.lock:
+            self.subscriptions.setdefault(client, dict())[topicFilter] = qos
+
+    def unsubscribe(self, client, topicFilter):
+        with self.lock:
+            self.subscriptions.get(client, dict()).pop(topicFilter, None)
+
+    def disconnect(self, client):
+        if client.clean_session:
+            with self.lock:
+                self.subscriptions.pop(client, None)
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        """
+        Delivers payload to every client with a matching subscription
+        :param topic: String
+        :param payload: bytes
+        :param qos: Integer (0 or 1)
+        :param retain: Boolean (retained messages aren't stored)
+        :return: Integer, the message id
+        """
+        mid = next(self.mids)
+        timestamp = time.perf_counter()
+
+        with self.lock:
+            subscriptions = list(self.subscriptions.items())
+
+        for client, topicFilters in subscriptions:
+            matching = [subscriptionQos for topicFilter, subscriptionQos in topicFilters.items()
+                        if topicMatches(topicFilter, topic)]
+
+            if len(matching) > 0:
+                client.deliver(LoopbackMessage(mid, topic, payload, min(qos, max(matching)), retain, timestamp))
+
+        return mid
+
+
+class LoopbackClient:
+    """
+    Drop-in replacement for paho.mqtt.client.Client that talks to a LoopbackBroker, for tests
+    and benchmarks of Communication without a network
+
+    Like with paho, on_message is called on a background thread after loop_start(), or on the
+    calling thread by loop(...). Exceptions raised by on_message are logged and kept in errors,
+    loop(...) raises them again unless suppress_exceptions is set, the background thread goes on
+    """
+
+    def __init__(self, broker, client_id='', clean_session=True, userdata=None):
+        self.broker = broker
+        self.client_id = client_id
+        self.clean_session = clean_session
+        self.userdata = userdata
+        self.on_message = None
+        self.suppress_exceptions = False
+        self.errors = []
+
+        self.connected = False
+        self.messages = queue.Queue()
+        self.thread = None
+        self.running = False
+
+    # Setup calls of Communication.__init__, there is nothing to encrypt or authenticate
+    def tls_set(self, *args, **kwargs):
+        pass
+
+    def username_pw_set(self, username, password=None):
+        pass
+
+    def connect(self, host='localhost', port=1883, keepalive=60):
+        self.connected = True
+        return 0
+
+    def disconnect(self):
+        self.connected = False
+        self.broker.disconnect(self)
+
+        # A new session starts without the messages of the old one
+        if self.clean_session:
+            while not self.messages.empty():
+                self.messages.get_nowait()
+
+        return 0
+
+    def is_connected(self):
+        return self.connected
+
+    def subscribe(self, topic, qos=0):
+        self.broker.subscribe(self, topic, qos)
+        return 0, next(self.broker.mids)
+
+    def unsubscribe(self, topic):
+        self.broker.unsubscribe(self, topic)
+        return 0, next(self.broker.mids)
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+
+        return PublishInfo(0, self.broker.publish(topic, payload, qos, retain))
+
+    def deliver(self, message):
+        """
+        Called by the broker for every matching message
+        """
+        if self.connected or (message.qos > 0 and not self.clean_session):
+            self.messages.put(message)
+
+    def loop_start(self):
+        if self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.__run, daemon=True)
+            self.thread.start()
+
+    def loop_stop(self):
+        if self.thread is not None:
+            self.running = False
+            self.messages.put(None)  # wakes up the thread
+            self.thread.join()
+            self.thread = None
+
+    def loop(self, timeout=1.0):
+        """
+        Handles all waiting messages on the calling thread, waits up to timeout seconds for the first one
+        :return: Integer, the number of handled messages
+        """
+        handled = 0
+
+        while self.connected:
+            try:
+                message = self.messages.get(timeout=timeout if handled == 0 else 0)
+            except queue.Empty:
+                break
+
+            if message is not None:
+                error = self.__handle(message)
+                handled += 1
+
+                if error is not None and not self.suppress_exceptions:
+                    raise error
+
+        return handled
+
+    # Helper methods
+    def __run(self):
+
+        while self.running:
+            message = self.messages.get()
+
+            if message is None:
+                continue
+
+            # Messages that arrive while disconnected wait for the next connect
+            while not self.connected and self.running:
+                time.sleep(0.01)
+
+            if not self.connected:
+                self.messages.put(message)
+                continue
+
+            self.__handle(message)
+
+    def __handle(self, message):
+
+        """
+        Calls on_message, returns the exception it raised or None
+        """
+
+        if self.on_message is None:
+            return None
+
+        try:
+            self.on_message(self, self.userdata, message)
+        except Exception as error:
+            logger.exception('on_message failed for a message on %s', message.topic)
+            self.errors.append(error)
+            return error
+
+        return None
@@ -8,6 +8,8 @@ import uuid
 import signal
 
 from communication import Communication
+from logqueue import startLogging
+from mapstore import MapStore
 from odometry import Odometry
 from sensor import Sensor
 from driving import Driving
@@ -29,18 +31,24 @@ def run():
                          protocol=mqtt.MQTTv311  # Define MQTT protocol version
                          )
     log_file = os.path.realpath(__file__) + '/../../logs/project.log'
-    logging.basicConfig(filename=log_file,  # Define log file
-                        level=logging.DEBUG,  # Define default mode
-                        format='%(asctime)s: %(message)s'  # Define default logging format
-                        )
+    # Written by a background thread, so file writes never block the mqtt thread or the control loop
+    log_listener = startLogging(log_file,  # Define log file
+                                level=logging.DEBUG,  # Define default mode
+                                format='%(asctime)s: %(message)s'  # Define default logging format
+                                )
     logger = logging.getLogger('RoboLab')
 
     # THE EXECUTION OF ALL CODE SHALL BE STARTED FROM WITHIN THIS FUNCTION.
     # ADD YOUR OWN IMPLEMENTATION HEREAFTER.
 
-    communication = Communication(client, logger)
-    d = Driving(communication)
-    d.lineFollower()
+    try:
+        communication = Communication(client, logger)
+        # Maps of earlier runs, a planet that has been explored before is only checked again
+        map_store = MapStore(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'maps'))
+        d = Driving(communication, map_store)
+        d.lineFollower()
+    finally:
+        log_listener.stop()  # write the remaining records
 
 
 # DO NOT EDIT
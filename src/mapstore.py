@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+import json
+import os
+
+from planet import Direction, Planet
+
+
+class StoredMap:
+    """
+    What the explorer knew about a planet at the end of a run
+    """
+
+    def __init__(self, planet: Planet, visitedNodes=(), frontier=()):
+        self.planet = planet
+        self.visitedNodes = set(visitedNodes)  # Nodes that have been scanned
+        self.frontier = list(frontier)          # (node, direction) paths that were still to be driven, front first
+
+
+class MapStore:
+    """
+    Planets explored in earlier runs, one JSON file per planet name in directory:
+
+        {
+            "name": "Fassaden",
+            "paths": [[0, 0, 90, 2, 1, 270, 3], [0, 0, 0, 0, 0, 0, -1], ...],
+            "visited": [[0, 0], [2, 1], ...],
+            "frontier": [[2, 1, 0], ...]
+        }
+
+    every path is [startX, startY, startDirection, endX, endY, endDirection, weight]
+    """
+
+    def __init__(self, directory: str):
+        # Without normalising, a path like .../src/main.py/../../maps would be opened through main.py
+        self.directory = os.path.normpath(directory)
+
+    def filename(self, planetName: str):
+
+        # Planet names come from the mothership, they must not point outside of directory
+        safeName = "".join(c if c.isalnum() or c in "-_" else "_" for c in planetName)
+        return os.path.join(self.directory, safeName + ".json")
+
+    def load(self, planetName: str):
+
+        """
+        Returns the StoredMap of planetName or None if the planet hasn't been saved yet,
+        a map that can't be read is ignored the same way and the run starts cold
+        """
+
+        try:
+            with open(self.filename(planetName)) as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            planet = Planet()
+            for x1, y1, d1, x2, y2, d2, weight in data["paths"]:
+                planet.add_path(((x1, y1), Direction(d1)), ((x2, y2), Direction(d2)), weight)
+
+            return StoredMap(planet,
+                             [tuple(node) for node in data.get("visited", [])],
+                             [((x, y), Direction(d)) for x, y, d in data.get("frontier", [])])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+
+    def save(self, planetName: str, planet: Planet, visitedNodes=(), frontier=()):
+
+        """
+        Writes the paths of planet, the scanned nodes and the paths still to be driven
+        """
+
+        paths = []
+        for node, pathsFromNode in planet.paths.items():
+            for direction, (endNode, endDirection, weight) in pathsFromNode.items():
+                if (node, direction) <= (endNode, endDirection):
+                    paths.append([*node, int(direction), *endNode, int(endDirection), weight])
+
+        data = {
+            "name": planetName,
+            "paths": sorted(paths),
+            "visited": sorted(list(node) for node in visitedNodes),
+            "frontier": [[*node, int(direction)] for node, direction in frontier]
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Written to a temporary file first, so a crash can't leave half a map behind
+        filename = self.filename(planetName)
+        with open(filename + ".tmp", 'w') as file:
+            json.dump(data, file)
+        os.replace(filename + ".tmp", filename)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+from collections import deque
+from itertools import count
+
+
+class MessageQueue:
+    """
+    Messages by type, filled by paho's network thread and drained by the main thread
+
+    Every message gets a sequence number that is unique across all types and, with a single
+    producing thread like paho's, grows in order of arrival. put(...) and drain(...) only use
+    deque.append, deque.popleft and next(count), which are atomic in CPython, so no lock is
+    needed: a message put while another thread drains the same type is either part of the
+    drained messages or stays for the next drain, it is never lost or handed out twice
+    """
+
+    def __init__(self, messageTypes=()):
+        """
+        :param messageTypes: Iterable of Strings, types that are known from the start
+        """
+        self.sequence = count()
+        self.queues = dict((messageType, deque()) for messageType in messageTypes)
+
+    def put(self, messageType, message):
+        """
+        Appends message to the queue of messageType
+        :param messageType: String
+        :param message: Object
+        :return: Integer, the sequence number of the message
+        """
+        sequence = next(self.sequence)
+
+        # setdefault is atomic for dicts with str keys, two threads always get the same deque
+        self.queues.setdefault(messageType, deque()).append((sequence, message))
+        return sequence
+
+    def drain(self, messageType):
+        """
+        Removes and returns all messages of messageType in order of arrival
+        :param messageType: String
+        :return: List of (sequence, message) tuples
+        """
+        queue = self.queues.get(messageType)
+        messages = []
+
+        if queue is None:
+            return messages
+
+        while True:
+            try:
+                messages.append(queue.popleft())
+            except IndexError:
+                return messages
+
+    def pending(self, messageType):
+        """
+        Returns the number of messages of messageType that haven't been drained yet
+        :param messageType: String
+        :return: Integer
+        """
+        return len(self.queues.get(messageType, ()))
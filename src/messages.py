@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+from collections import namedtuple
+from operator import itemgetter
+
+# ujson parses messages several times faster, it is used if it is installed
+try:
+    from ujson import loads
+except ImportError:
+    from json import loads
+
+
+# Records for the messages of the mothership. They are namedtuples, so they have no __dict__
+# (__slots__ is empty) and can still be unpacked like lists: name, x, y, o = planetMessage
+PlanetMsg = namedtuple('PlanetMsg', ['planetName', 'startX', 'startY', 'startOrientation'])
+PathMsg = namedtuple('PathMsg', ['startX', 'startY', 'startDirection', 'endX', 'endY', 'endDirection',
+                                 'pathStatus', 'pathWeight'])
+PathUnveiledMsg = namedtuple('PathUnveiledMsg', PathMsg._fields)
+TargetMsg = namedtuple('TargetMsg', ['targetX', 'targetY'])
+
+
+RECORDS = {
+    'planet': PlanetMsg,
+    'path': PathMsg,
+    'pathUnveiled': PathUnveiledMsg,
+    'target': TargetMsg
+}
+
+# Type -> (record, getter), the getter picks the fields by name in one C call,
+# so the order of the keys in the payload doesn't matter
+DECODERS = dict((messageType, (record, itemgetter(*record._fields))) for messageType, record in RECORDS.items())
+
+
+def decodeMessage(data):
+    """
+    Returns the dict for a message as it arrives from paho
+    :param data: bytes, JSON encoded in UTF-8
+    :return: dict
+    """
+    return loads(data.decode('utf-8'))
+
+
+def decodePayload(messageType, payload):
+    """
+    Returns the record for the payload of a server message
+    :param messageType: String ('planet', 'path', 'pathUnveiled' or 'target')
+    :param payload: dict, the decoded 'payload' field of the message
+    :return: PlanetMsg, PathMsg, PathUnveiledMsg or TargetMsg
+    """
+    record, fields = DECODERS[messageType]
+    return record._make(fields(payload))
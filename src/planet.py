@@ -3,39 +3,162 @@
 # Attention: Do not import the ev3dev.ev3 module in this file
 from enum import IntEnum, unique
 from os import DirEntry
-from typing import List, Tuple, Dict, Union
+from typing import List, Tuple, Dict, Union, Callable
 
 from math import inf 
-from heapq import heappush, heappop
 
 
 class PriorityQueue:
 
     """ 
-    A simple priority queue
+    An indexed binary min-heap
     for planet.shortest_path(...)
+
+    Every item's position in the heap is tracked in self.index, which gives
+    O(1) membership tests and O(log n) decrease-key via update(...)
+    Items must be hashable and unique within the queue
     """
 
     def __init__(self):
         self.items = []
+        self.index = dict()
 
     def __contains__(self, item):
-        return any(y == item for x, y in self.items)
+        return item in self.index
+
+    def __len__(self):
+        return len(self.items)
 
     def empty(self):
         return len(self.items) == 0 
 
     def push(self, item, priority: int):
-        heappush(self.items, (priority, item))
+        self.items.append((priority, item))
+        self.index[item] = len(self.items) - 1
+        self.__siftUp(len(self.items) - 1)
 
     def pop(self):
-        return heappop(self.items)[1]
+        priority, item = self.items[0]
+        last = self.items.pop()
+        del self.index[item]
+
+        if len(self.items) > 0:
+            self.items[0] = last
+            self.index[last[1]] = 0
+            self.__siftDown(0)
+
+        return item
+
+    def remove(self, item):
+
+        position = self.index.pop(item)
+        last = self.items.pop()
+
+        if position < len(self.items):
+            self.items[position] = last
+            self.index[last[1]] = position
+            self.__siftUp(position)
+            self.__siftDown(self.index[last[1]])
+
+    def minPriority(self):
+        return self.items[0][0]
 
     def update(self, item, oldPriority: int, newPriority: int):
 
-        #self.items = filter(lambda x: x[1] != item, self.items)
-        self.items.remove((oldPriority, item))
-        self.push(item, newPriority)
+        """
+        Changes the priority of an item that is already in the queue
+        oldPriority is only kept for compatibility, the stored entry is looked up in self.index
+        """
+
+        position = self.index[item]
+        storedPriority = self.items[position][0]
+        self.items[position] = newPriority, item
+
+        if newPriority < storedPriority:
+            self.__siftUp(position)
+        else:
+            self.__siftDown(position)
+
+
+    # Heap helper methods, comparisons are done on priorities only so that
+    # items don't need to be orderable
+
+    def __siftUp(self, position: int):
+
+        items = self.items
+        entry = items[position]
+
+        while position > 0:
+            parent = (position - 1) >> 1
+            if items[parent][0] <= entry[0]:
+                break
+            items[position] = items[parent]
+            self.index[items[position][1]] = position
+            position = parent
+
+        items[position] = entry
+        self.index[entry[1]] = position
+
+    def __siftDown(self, position: int):
+
+        items = self.items
+        entry = items[position]
+        size = len(items)
+
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and items[child + 1][0] < items[child][0]:
+                child += 1
+            if entry[0] <= items[child][0]:
+                break
+            items[position] = items[child]
+            self.index[items[position][1]] = position
+            position = child
+
+        items[position] = entry
+        self.index[entry[1]] = position
+
+
+class ShortestPathTree:
+
+    """
+    State of Dijkstra's algorithm from a single start node
+    for planet.shortest_path(...)
+
+    The search is only advanced as far as queries need it, nodes in settled
+    have their final distance, the distances of all other nodes are tentative
+    """
+
+    def __init__(self, start):
+        self.start = start
+        self.queue = PriorityQueue()
+        self.queue.push(start, 0)
+        self.distance = {start: 0}
+        self.predecessor = {start: start}
+        self.settled = set()
+        # Distance of the node settled last, no node in the queue can be closer
+        self.radius = 0
+
+    def path(self, target):
+
+        """
+        Returns the route from start to a settled target or None if target hasn't been reached
+        """
+
+        if target not in self.settled:
+            return None
+
+        path = []
+        node = target
+
+        while node != self.start:
+            node, direction = self.predecessor[node]
+            path.append((node, direction))
+
+        path.reverse()
+        return path
 
 
 @unique
@@ -57,6 +180,11 @@ Value:  -1 if blocked path
 """
 
 
+def manhattan(node1: Tuple[int, int], node2: Tuple[int, int]) -> int:
+    """ Manhattan distance between two grid coordinates """
+    return abs(node1[0] - node2[0]) + abs(node1[1] - node2[1])
+
+
 class Planet:
 
     """
@@ -64,10 +192,29 @@ class Planet:
     it according to the specifications
     """
 
+    # Maximum number of shortest path trees kept in self.shortestPathTrees
+    TREE_CACHE_SIZE = 32
+
     def __init__(self):
         """ Initializes the data structure """
         self.paths = dict()
 
+        # Shortest path trees from previous queries, start node -> ShortestPathTree, least recently used first
+        # At most TREE_CACHE_SIZE trees are kept, the least recently used one is dropped for a new one
+        # A tree is dropped as soon as add_path(...) or updateWeight(...) changes an edge it depends on
+        self.shortestPathTrees = dict()
+
+        # Smallest weight per grid step (Manhattan distance) seen on any free path, used by the A* heuristic
+        # It is never raised again, a value that is too small keeps the heuristic admissible
+        self.minStepWeight = inf
+
+        # Number of nodes expanded by all searches so far, for benchmarks
+        self.expansions = 0
+
+        # Functions that are called as listener(node, direction, oldPath, newPath) whenever
+        # add_path(...) or updateWeight(...) change the path leaving node in direction
+        self.listeners = []
+
 
     def add_path(self, start: Tuple[Tuple[int, int], Direction], target: Tuple[Tuple[int, int], Direction],
                  weight: int):
@@ -88,13 +235,25 @@ class Planet:
         dir1 = Direction(start[1])
         dir2 = Direction(target[1])
 
-        pathsFromNode1 = self.paths.get(node1, dict())
-        pathsFromNode2 = self.paths.get(node2, dict())
+        # setdefault makes sure both are the same dictionary if node1 == node2
+        pathsFromNode1 = self.paths.setdefault(node1, dict())
+        pathsFromNode2 = self.paths.setdefault(node2, dict())
+        oldPath1 = pathsFromNode1.get(dir1)
+        oldPath2 = pathsFromNode2.get(dir2)
+
         pathsFromNode1[dir1] = node2, dir2, weight
         pathsFromNode2[dir2] = node1, dir1, weight
         self.paths[node1] = pathsFromNode1
         self.paths[node2] = pathsFromNode2
 
+        self.__pathChanged(node1, dir1, oldPath1, pathsFromNode1[dir1])
+        self.__pathChanged(node2, dir2, oldPath2, pathsFromNode2[dir2])
+
+        # Paths that start and end at the same node don't tell anything about the grid
+        steps = manhattan(node1, node2)
+        if weight > 0 and steps > 0:
+            self.minStepWeight = min(self.minStepWeight, weight / steps)
+
 
     def get_paths(self) -> Dict[Tuple[int, int], Dict[Direction, Tuple[Tuple[int, int], Direction, Weight]]]:
 
@@ -120,33 +279,178 @@ class Planet:
         return self.paths
 
 
-    def shortest_path(self, start: Tuple[int, int], target: Tuple[int, int]) -> Union[None, List[Tuple[Tuple[int, int], Direction]]]:
+    def shortest_path(self, start: Tuple[int, int], target: Tuple[int, int], astar: bool = False,
+                      heuristic: Callable[[Tuple[int, int], Tuple[int, int]], float] = None) -> Union[None, List[Tuple[Tuple[int, int], Direction]]]:
 
         """
         Returns a shortest path between two nodes
 
+        By default the shortest path tree from start is computed (and cached) with Dijkstra's algorithm
+        With astar=True a single A* search towards target is run instead, heuristic(node, target) must
+        never overestimate the remaining cost and defaults to Planet.gridHeuristic
+
         Examples:
             shortest_path((0,0), (2,2)) returns: [((0, 0), Direction.EAST), ((1, 0), Direction.NORTH)]
             shortest_path((0,0), (1,2)) returns: None
         :param start: 2-Tuple
         :param target: 2-Tuple
+        :param astar: Boolean
+        :param heuristic: Function
         :return: 2-Tuple[List, Direction]
         """
 
-        # Implementation of Djikstra's algorithm
+        if astar:
+            tree = self.__astar(start, target, heuristic or self.gridHeuristic)
+        else:
+            tree = self.__shortestPathTree(start)
+            self.__growTree(tree, [target])
+
+        return tree.path(target)
+
+
+    def gridHeuristic(self, node: Tuple[int, int], target: Tuple[int, int]) -> float:
+
+        """
+        Lower bound for the cost of any route from node to target
+
+        Every free path costs at least minStepWeight per grid step it covers, so the
+        Manhattan distance times minStepWeight can't overestimate
+        """
+
+        if self.minStepWeight == inf:
+            return 0
+
+        return manhattan(node, target) * self.minStepWeight
+
+
+    def shortest_path_to_any(self, start: Tuple[int, int], targets) -> Union[None, Tuple[List[Tuple[Tuple[int, int], Direction]], Tuple[int, int]]]:
+
+        """
+        Returns a shortest path to the closest reachable node in targets together with that node,
+        ties are broken by the order of targets. A single search is run for all targets
+
+        Examples:
+            shortest_path_to_any((0,0), [(1,2), (2,2)]) returns: ([((0, 0), Direction.EAST), ((1, 0), Direction.NORTH)], (2, 2))
+            shortest_path_to_any((0,0), [(1,2)]) returns: None
+        :param start: 2-Tuple
+        :param targets: Iterable of 2-Tuples
+        :return: 2-Tuple[List, 2-Tuple]
+        """
 
-        # Initialize data structures 
-        allNodes = list(self.paths.keys())
-        queue = PriorityQueue()
-        queue.push(start, 0)
+        targets = list(targets)
+        tree = self.__shortestPathTree(start)
+        self.__growTree(tree, targets)
 
-        distance = {x : (0 if x == start else inf) for x in allNodes}
-        predecessor = {x: (x if x == start else None) for x in allNodes}
+        closest = None
+        for target in targets:
+            if target in tree.settled and (closest is None or tree.distance[target] < tree.distance[closest]):
+                closest = target
+
+        if closest is None:
+            return None
+
+        return tree.path(closest), closest
+
+
+    def __astar(self, start: Tuple[int, int], target: Tuple[int, int], heuristic):
+
+        """
+        Helper method for shortest_path(...)
+
+        Runs A* from start until target is settled, priorities in the returned
+        tree's queue include the heuristic
+        """
+
+        tree = ShortestPathTree(start)
+        queue = tree.queue
+        distance = tree.distance
+        predecessor = tree.predecessor
+        settled = tree.settled
+
+        while not queue.empty():
+            currentNode = queue.pop()
+            settled.add(currentNode)
+            self.expansions += 1
+
+            if currentNode == target:
+                break
+
+            for neighbour, neighbourDir, neighbourWeight in self.__getNeighbourDatas(currentNode):
+
+                if neighbour in settled:
+                    continue
+
+                newDistance = distance[currentNode] + neighbourWeight
+
+                if neighbour in queue and distance[neighbour] > newDistance:
+                    queue.update(neighbour, distance[neighbour] + heuristic(neighbour, target), newDistance + heuristic(neighbour, target))
+                    distance[neighbour] = newDistance
+                    predecessor[neighbour] = currentNode, neighbourDir
+
+                elif neighbour not in queue:
+                    queue.push(neighbour, newDistance + heuristic(neighbour, target))
+                    distance[neighbour] = newDistance
+                    predecessor[neighbour] = currentNode, neighbourDir
+
+        return tree
+
+
+    def __shortestPathTree(self, start: Tuple[int, int]):
+
+        """
+        Helper method for shortest_path(...)
+
+        Returns the cached shortest path tree from start or a new one
+        Trees are cached per start node until an edge they depend on changes
+        """
+
+        # Moved to the end, so the least recently used tree is the first one
+        tree = self.shortestPathTrees.pop(start, None)
+        if tree is not None:
+            self.shortestPathTrees[start] = tree
+            return tree
+
+        if len(self.shortestPathTrees) >= Planet.TREE_CACHE_SIZE:
+            del self.shortestPathTrees[next(iter(self.shortestPathTrees))]
+
+        tree = ShortestPathTree(start)
+        self.shortestPathTrees[start] = tree
+        return tree
+
+
+    def __growTree(self, tree, targets):
+
+        """
+        Helper method for shortest_path(...)
+
+        Advances Dijkstra's algorithm on tree until the closest node in targets (and every 
+        target that is just as close) is settled or no reachable node is left
+        """
+
+        queue = tree.queue
+        distance = tree.distance
+        predecessor = tree.predecessor
+        settled = tree.settled
+
+        # Settled nodes are never further away than the ones in the queue
+        targets = set(targets)
+        reached = [distance[target] for target in targets if target in settled]
+        closestDistance = min(reached) if len(reached) > 0 else None
 
 
         # Core loop
         while not queue.empty():
+
+            if closestDistance is not None and queue.minPriority() > closestDistance:
+                break
+
             currentNode = queue.pop()
+            settled.add(currentNode)
+            tree.radius = distance[currentNode]
+            self.expansions += 1
+
+            if closestDistance is None and currentNode in targets:
+                closestDistance = distance[currentNode]
 
             for neighbourData in self.__getNeighbourDatas(currentNode):
 
@@ -160,17 +464,58 @@ class Planet:
                     distance[neighbour] = newDistance
                     predecessor[neighbour] = currentNode, neighbourDir
 
-                elif predecessor[neighbour] is None:
+                elif neighbour not in settled and neighbour not in queue:
                     queue.push(neighbour, newDistance)
                     distance[neighbour] = newDistance
                     predecessor[neighbour] = currentNode, neighbourDir
-        
 
-        # Piece together a shortest path or return None if no shortest path can be found
-        print("Shortest path wird berechnet")
-        getPath = lambda node: getPath(predecessor[node][0]) + [predecessor[node]] if node != start else []
-        try: return getPath(target)
-        except: return None
+
+    def __pathChanged(self, node: Tuple[int, int], direction: Direction, oldPath, newPath):
+
+        """
+        Repairs or drops every cached shortest path tree after the path leaving node in the
+        given direction changed from oldPath to newPath (both (node, direction, weight) or None)
+        """
+
+        if oldPath == newPath:
+            return
+
+        for listener in self.listeners:
+            listener(node, direction, oldPath, newPath)
+
+        for start, tree in list(self.shortestPathTrees.items()):
+
+            # The tree used the old path, distances behind it are wrong now
+            if oldPath is not None and tree.predecessor.get(oldPath[0]) == (node, direction):
+                del self.shortestPathTrees[start]
+                continue
+
+            # Nodes that haven't been expanded yet will see the new path once they are
+            if newPath[2] <= 0 or node not in tree.settled:
+                continue
+
+            neighbour = newPath[0]
+            newDistance = tree.distance[node] + newPath[2]
+
+            # A shortcut to a settled node invalidates the tree, everything else is an ordinary relaxation
+            if neighbour in tree.settled:
+                if newDistance < tree.distance[neighbour]:
+                    del self.shortestPathTrees[start]
+
+            # A neighbour closer than the radius may lead to shorter routes to nodes that are settled already
+            elif newDistance < tree.radius:
+                del self.shortestPathTrees[start]
+
+            elif neighbour in tree.queue:
+                if newDistance < tree.distance[neighbour]:
+                    tree.queue.update(neighbour, tree.distance[neighbour], newDistance)
+                    tree.distance[neighbour] = newDistance
+                    tree.predecessor[neighbour] = node, direction
+
+            else:
+                tree.queue.push(neighbour, newDistance)
+                tree.distance[neighbour] = newDistance
+                tree.predecessor[neighbour] = node, direction
 
 
     def __getNeighbourDatas(self, node: Tuple[int, int]):
@@ -179,7 +524,7 @@ class Planet:
         Helper method for shortest_path(...)
         """
 
-        nodeData = self.paths[node].items()
+        nodeData = self.paths.get(node, dict()).items()
         return [(path[0], dir, path[2]) for dir, path in nodeData if path[2] > 0]
 
 
@@ -201,10 +546,16 @@ class Planet:
             dir2 = Direction(dir2)
 
             pathsFromNode2 = self.paths[node2]
+            oldPath1 = pathsFromNode1[dir1]
+            oldPath2 = pathsFromNode2.get(dir2)
+
             pathsFromNode1[dir1] = node2, dir2, -1
             pathsFromNode2[dir2] = node1, dir1, -1
             self.paths[node1] = pathsFromNode1
             self.paths[node2] = pathsFromNode2
 
+            self.__pathChanged(node1, dir1, oldPath1, pathsFromNode1[dir1])
+            self.__pathChanged(node2, dir2, oldPath2, pathsFromNode2[dir2])
+
         except:
             return
\ No newline at end of file
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+from math import inf
+from typing import List, Tuple, Union
+
+from planet import Direction, Planet, PriorityQueue
+
+
+class Planner:
+
+    """
+    Incremental route planner towards a fixed target (D* Lite)
+
+    The search runs backwards from the target, so the robot's position can change between
+    queries. The planner listens to the planet: when add_path(...) or updateWeight(...) change
+    a path, only the nodes whose cost to the target is affected are searched again on the next
+    call of route(...)
+
+    Call detach() once the planner isn't needed anymore
+    """
+
+    def __init__(self, planet: Planet, target: Tuple[int, int]):
+
+        self.planet = planet
+        self.target = target
+
+        # Number of nodes expanded by this planner so far, for benchmarks
+        self.expansions = 0
+
+        # Node -> nodes with a path to it, may contain nodes whose path has been replaced since
+        self.predecessors = dict()
+        for node, pathsFromNode in self.planet.paths.items():
+            for path in pathsFromNode.values():
+                self.predecessors.setdefault(path[0], set()).add(node)
+
+        self.__reset()
+        self.planet.listeners.append(self.__pathChanged)
+
+
+    def detach(self):
+
+        """
+        Stops listening to the planet
+        """
+
+        if self.__pathChanged in self.planet.listeners:
+            self.planet.listeners.remove(self.__pathChanged)
+
+
+    def route(self, start: Tuple[int, int]) -> Union[None, List[Tuple[Tuple[int, int], Direction]]]:
+
+        """
+        Returns a shortest path from start to the target in the format of Planet.shortest_path(...)
+        or None if the target can't be reached
+        """
+
+        # The heuristic may only ever get weaker, otherwise the queued keys would be too small
+        if self.planet.minStepWeight < self.stepWeight:
+            self.__reset()
+
+        if self.lastStart is None:
+            self.lastStart = start
+
+        # Moving the start lowers all heuristic values by at most h(lastStart, start)
+        self.keyModifier += self.__heuristic(self.lastStart, start)
+        self.lastStart = start
+        self.start = start
+
+        self.__computeShortestPath()
+
+        if self.__g(start) == inf:
+            return None
+
+        # Follow the cheapest successors, every step brings us strictly closer to the target
+        route = []
+        node = start
+
+        while node != self.target:
+
+            if len(route) > len(self.planet.paths):
+                return None
+
+            bestCost, bestDirection, bestNeighbour = inf, None, None
+            for neighbour, direction, weight in self.__successors(node):
+                cost = weight + self.__g(neighbour)
+                if cost < bestCost:
+                    bestCost, bestDirection, bestNeighbour = cost, direction, neighbour
+
+            if bestNeighbour is None:
+                return None
+
+            route.append((node, bestDirection))
+            node = bestNeighbour
+
+        return route
+
+
+    # Helper methods for D* Lite
+
+    def __reset(self):
+
+        self.g = dict()
+        self.rhs = {self.target: 0}
+        self.queue = PriorityQueue()
+        self.keyModifier = 0
+        self.lastStart = None
+        self.start = None
+        self.stepWeight = self.planet.minStepWeight
+        self.queue.push(self.target, self.__key(self.target))
+
+
+    def __heuristic(self, node1: Tuple[int, int], node2: Tuple[int, int]):
+
+        if node1 is None or node2 is None or self.stepWeight == inf:
+            return 0
+
+        return (abs(node1[0] - node2[0]) + abs(node1[1] - node2[1])) * self.stepWeight
+
+
+    def __g(self, node):
+        return self.g.get(node, inf)
+
+
+    def __rhs(self, node):
+        return self.rhs.get(node, inf)
+
+
+    def __key(self, node):
+        cost = min(self.__g(node), self.__rhs(node))
+        return cost + self.__heuristic(self.start, node) + self.keyModifier, cost
+
+
+    def __successors(self, node):
+        return [(path[0], direction, path[2]) for direction, path in self.planet.paths.get(node, dict()).items() if path[2] > 0]
+
+
+    def __predecessors(self, node):
+        return self.predecessors.get(node, set())
+
+
+    def __updateNode(self, node):
+
+        if node != self.target:
+            self.rhs[node] = min([weight + self.__g(neighbour) for neighbour, direction, weight in self.__successors(node)],
+                                 default=inf)
+
+        if node in self.queue:
+            self.queue.remove(node)
+
+        if self.__g(node) != self.__rhs(node):
+            self.queue.push(node, self.__key(node))
+
+
+    def __computeShortestPath(self):
+
+        queue = self.queue
+        start = self.start
+
+        while not queue.empty() and (queue.minPriority() < self.__key(start) or self.__rhs(start) != self.__g(start)):
+
+            oldKey = queue.minPriority()
+            node = queue.pop()
+            newKey = self.__key(node)
+            self.expansions += 1
+
+            if oldKey < newKey:
+                queue.push(node, newKey)
+
+            elif self.__g(node) > self.__rhs(node):
+                self.g[node] = self.__rhs(node)
+                for predecessor in self.__predecessors(node):
+                    self.__updateNode(predecessor)
+
+            else:
+                self.g[node] = inf
+                for predecessor in self.__predecessors(node) | {node}:
+                    self.__updateNode(predecessor)
+
+
+    def __pathChanged(self, node, direction, oldPath, newPath):
+
+        self.predecessors.setdefault(newPath[0], set()).add(node)
+
+        # Only the cost to the target of the node the changed path leaves from is affected directly
+        self.__updateNode(node)
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+
+# Replays a recorded session against the current explorer, run with:
+#   python3 replay.py [--session N] [--output decisions.json] [logs/project.log]
+# Attention: Do not import the ev3dev.ev3 module in this file
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from typing import List
+
+from communication import Communication
+from explorer import Explorer
+from loopback import LoopbackMessage
+from planet import Direction
+
+
+# Every record of logs/project.log starts with the time, see main.run()
+RECORD_START = re.compile(r'^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),(\d{3}): (.*)$')
+
+rotate = lambda direction: Direction((direction + 180) % 360)
+
+
+class LogRecord:
+    """
+    A message sent or received by Communication, as found in the log
+    """
+
+    def __init__(self, timestamp: float, sent: bool, topic, message: dict):
+        self.timestamp = timestamp  # Seconds since the epoch
+        self.sent = sent            # True for messages of the robot, False for received ones (including echoes)
+        self.topic = topic          # Only known for sent messages
+        self.message = message
+
+
+def parseLog(lines) -> List[List[LogRecord]]:
+
+    """
+    Returns the sessions in a log written by Communication, every session starts with a ready message
+    Records that aren't messages are skipped
+    """
+
+    # Group the lines into (timestamp, text) records, pretty-printed messages span several lines
+    entries = []
+    for line in lines:
+        match = RECORD_START.match(line.rstrip('\n'))
+        if match:
+            timestamp = time.mktime(time.strptime(match.group(1), '%Y-%m-%d %H:%M:%S')) + int(match.group(2)) / 1000
+            entries.append([timestamp, match.group(3)])
+        elif len(entries) > 0:
+            entries[-1][1] += '\n' + line.rstrip('\n')
+
+    sessions = []
+    sendTopic = None
+
+    for timestamp, text in entries:
+
+        if text.startswith('Send to: '):
+            sendTopic = text[len('Send to: '):]
+            continue
+
+        try:
+            message = json.loads(text)
+        except ValueError:
+            continue
+
+        if not isinstance(message, dict) or 'from' not in message:
+            continue
+
+        sent = sendTopic is not None
+        if (sent and message.get('type') == 'ready') or len(sessions) == 0:
+            sessions.append([])
+
+        sessions[-1].append(LogRecord(timestamp, sent, sendTopic, message))
+        sendTopic = None
+
+    return sessions
+
+
+class Decision:
+    """
+    One call of the explorer during a replay
+    """
+
+    def __init__(self, step: int, method: str, arguments, result, cpuSeconds: float, logTime: float):
+        self.step = step
+        self.method = method            # "onNodeReached" or "getNextDirection"
+        self.arguments = arguments
+        self.result = result
+        self.cpuSeconds = cpuSeconds
+        self.logTime = logTime          # Time of the last message delivered before the call, from the log
+        self.divergence = None          # Description of the first message that differs from the recording
+
+    def toDict(self):
+        return {"step": self.step, "method": self.method, "arguments": repr(self.arguments), "result": repr(self.result),
+                "cpuSeconds": self.cpuSeconds, "logTime": self.logTime, "divergence": self.divergence}
+
+
+class ReplayDiverged(Exception):
+    pass
+
+
+class ReplayClient:
+    """
+    Stands in for the paho client of Communication
+
+    Whenever the robot publishes a message, it is compared to the next message the robot sent in the
+    recording and the messages received after that one are passed to on_message right away. No time
+    passes while waiting for answers, the clock is the time of the delivered records
+    """
+
+    def __init__(self, records: List[LogRecord]):
+        self.records = records
+        self.position = 0
+        self.clock = records[0].timestamp if len(records) > 0 else 0.0
+        self.on_message = None
+
+    # Setup calls of Communication.__init__
+    def tls_set(self, *args, **kwargs):
+        pass
+
+    def username_pw_set(self, username, password=None):
+        pass
+
+    def connect(self, host=None, port=None, keepalive=60):
+        return 0
+
+    def subscribe(self, topic, qos=0):
+        return 0, 0
+
+    def loop_start(self):
+        self.__deliverReceived()
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+
+        message = json.loads(payload)
+
+        if self.position >= len(self.records):
+            raise ReplayDiverged("the recording ends before %s" % message.get('type'))
+
+        recorded = self.records[self.position]
+        if (message.get('type'), message.get('payload')) != (recorded.message.get('type'), recorded.message.get('payload')):
+            raise ReplayDiverged("sent %s, recorded %s" % (json.dumps(message), json.dumps(recorded.message)))
+
+        self.position += 1
+        self.__deliverReceived()
+
+    def peekSent(self):
+
+        """
+        Returns the next message the robot sent in the recording or None at the end
+        """
+
+        return self.records[self.position].message if self.position < len(self.records) else None
+
+    # Helper methods
+    def __deliverReceived(self):
+
+        while self.position < len(self.records) and not self.records[self.position].sent:
+            record = self.records[self.position]
+            self.clock = record.timestamp
+            self.position += 1
+
+            data = json.dumps(record.message).encode('utf-8')
+            self.on_message(self, None, LoopbackMessage(0, record.topic or '', data, 1, timestamp=record.timestamp))
+
+
+class Replay:
+    """
+    Drives an Explorer like driving.Driving did during a recorded session
+
+    The robot's position after every path comes from the path messages it sent, the directions
+    found by scanning a node are the ones of all paths at the node that the mothership mentions
+    in the session
+    """
+
+    def __init__(self, records: List[LogRecord], explorerClass=Explorer):
+
+        self.records = records
+        self.client = ReplayClient(records)
+
+        logger = logging.getLogger('RoboLab.replay')
+        logger.setLevel(logging.WARNING)
+        self.communication = Communication(self.client, logger)
+
+        # Answers are delivered before the explorer waits for them, so it never has to wait
+        self.explorer = explorerClass(self.communication, responseTime=0)
+
+        self.directions = dict()
+        for record in records:
+            if not record.sent and record.message.get('type') in ('path', 'pathUnveiled'):
+                payload = record.message['payload']
+                self.directions.setdefault((payload['startX'], payload['startY']), set()).add(Direction(payload['startDirection']))
+                self.directions.setdefault((payload['endX'], payload['endY']), set()).add(Direction(payload['endDirection']))
+
+        self.decisions = []
+        self.divergence = None
+
+    def run(self) -> List[Decision]:
+
+        node, entranceDirection, obstacleFound = None, None, False
+        step = 0
+
+        try:
+            while True:
+                step += 1
+                correctedOdoData = self.__call(step, 'onNodeReached', node, entranceDirection, obstacleFound)
+
+                if correctedOdoData is None:
+                    break
+
+                node, entranceDirection = correctedOdoData
+                scannedDirections = None if self.explorer.wasScanned() else sorted(self.directions.get(node, ()))
+
+                if self.__call(step, 'getNextDirection', scannedDirections) is None:
+                    break
+
+                # The next path message of the robot tells where it ended up
+                sent = self.client.peekSent()
+                if sent is None or sent.get('type') != 'path':
+                    raise ReplayDiverged("the robot left the node, recorded %s" % json.dumps(sent))
+
+                payload = sent['payload']
+                node = payload['endX'], payload['endY']
+                entranceDirection = rotate(payload['endDirection'])
+                obstacleFound = payload['pathStatus'] == 'blocked'
+
+        except ReplayDiverged as error:
+            self.divergence = str(error)
+            if len(self.decisions) > 0:
+                self.decisions[-1].divergence = self.divergence
+
+        return self.decisions
+
+    def __call(self, step, method, *arguments):
+
+        logTime = self.client.clock
+        begin = time.process_time()
+
+        try:
+            result = getattr(self.explorer, method)(*arguments)
+        finally:
+            # Also record the call that diverged
+            self.decisions.append(Decision(step, method, arguments, None, time.process_time() - begin, logTime))
+
+        self.decisions[-1].result = result
+        return result
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Replays a session recorded in the log against the current explorer")
+    parser.add_argument("log", nargs="?", default=os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'logs', 'project.log'))
+    parser.add_argument("--session", type=int, default=-1, help="index of the session in the log, the last one by default")
+    parser.add_argument("--output", help="write the decisions as JSON to this file")
+    arguments = parser.parse_args()
+
+    with open(arguments.log) as file:
+        sessions = parseLog(file)
+
+    if len(sessions) == 0:
+        parser.error("no session found in " + arguments.log)
+
+    replay = Replay(sessions[arguments.session])
+    decisions = replay.run()
+
+    for decision in decisions:
+        print("%4d %-16s %-50s -> %-28s %8.3f ms" % (decision.step, decision.method, repr(decision.arguments)[:50],
+                                                     repr(decision.result)[:28], decision.cpuSeconds * 1000))
+
+    print("%d decisions, %.3f ms CPU time" % (len(decisions), sum(decision.cpuSeconds for decision in decisions) * 1000))
+    if replay.divergence is not None:
+        print("Diverged from the recording: " + replay.divergence)
+
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            json.dump({"divergence": replay.divergence, "decisions": [decision.toDict() for decision in decisions]}, file, indent=2)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+import threading
+import time
+
+
+class BackgroundSampler:
+    """
+    Calls read() on a background thread every interval seconds and keeps the latest value
+
+    latest is a (value, timestamp) tuple that is replaced as a whole, so a reader on another
+    thread never blocks and never sees the value of one read with the timestamp of another.
+    It is (None, None) until the first read. A read that raises is skipped, the value gets
+    older until a read succeeds again; use age() to notice that the sampler falls behind
+    """
+
+    def __init__(self, read, interval, clock=time.monotonic):
+        """
+        :param read: Function without arguments, may block
+        :param interval: Float, seconds between the starts of two reads
+        :param clock: Function returning seconds, the timestamps are in its time
+        """
+        self.read = read
+        self.interval = interval
+        self.clock = clock
+
+        self.latest = (None, None)
+        self.reads = 0
+        self.errors = 0
+
+        self.stopped = threading.Event()
+        self.thread = None
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        """
+        Starts the background thread, does nothing if it is running already
+        """
+        if self.thread is None:
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.__run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread and waits for the current read to end, the latest value is kept
+        """
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
+
+    def age(self):
+        """
+        Returns the seconds since the latest value has been read, infinity before the first read
+        :return: Float
+        """
+        timestamp = self.latest[1]
+        if timestamp is None:
+            return float('inf')
+
+        return self.clock() - timestamp
+
+    # Helper methods
+    def __run(self):
+
+        deadline = self.clock()
+
+        while not self.stopped.is_set():
+
+            try:
+                value = self.read()
+            except Exception:
+                self.errors += 1
+            else:
+                self.latest = (value, self.clock())
+                self.reads += 1
+
+            # A read that took longer than interval delays the next one instead of starting a burst
+            deadline = max(deadline + self.interval, self.clock())
+            self.stopped.wait(deadline - self.clock())
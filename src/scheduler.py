@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+
+# Attention: Do not import the ev3dev.ev3 module in this file
+import time
+
+
+class LoopScheduler:
+    """
+    Runs a control loop at a fixed frequency, call tick() at the start of every iteration:
+
+        loop.start()
+        while running:
+            loop.tick()
+            ...
+
+    tick() sleeps until the next multiple of the period since start(), so the sample period of
+    the PID doesn't depend on how long the sensor reads took. An iteration that takes longer than
+    the period is an overrun: the next one starts right away and the schedule continues from
+    there, missed periods aren't caught up
+
+    Measured for every iteration after the first one since start():
+    - the loop time, the time between two ticks, in a histogram with bins of binWidth seconds,
+      the last bin also counts all longer loop times
+    - the jitter, how late tick() returned compared to the schedule
+    The measurements are kept by start(), reset() clears them
+    """
+
+    def __init__(self, frequency, binWidth=0.001, bins=100, clock=time.perf_counter, sleep=time.sleep):
+        """
+        :param frequency: Float, iterations per second
+        :param binWidth: Float, seconds
+        :param bins: Integer
+        :param clock: Function returning seconds, replaceable for tests
+        :param sleep: Function taking seconds, replaceable for tests
+        """
+        self.period = 1.0 / frequency
+        self.binWidth = binWidth
+        self.clock = clock
+        self.sleep = sleep
+
+        self.loopTimes = [0] * bins
+        self.reset()
+
+        self.deadline = None
+        self.lastTick = None
+
+    def reset(self):
+        """
+        Clears all measurements
+        """
+        for i in range(len(self.loopTimes)):
+            self.loopTimes[i] = 0
+
+        self.iterations = 0
+        self.overruns = 0
+        self.totalLoopTime = 0.0
+        self.maxLoopTime = 0.0
+        self.totalJitter = 0.0
+        self.maxJitter = 0.0
+
+    def start(self):
+        """
+        Starts a new schedule, the next tick() returns right away
+        Call it whenever the loop starts again after a pause, like after driving.Driving stopped on a node
+        """
+        self.deadline = None
+        self.lastTick = None
+
+    def tick(self):
+        """
+        Waits for the start of the next period
+        :return: Float, the time the iteration starts at
+        """
+        now = self.clock()
+
+        if self.deadline is None:
+            self.deadline = now + self.period
+            self.lastTick = now
+            return now
+
+        if now > self.deadline:
+            # The iteration took too long, start the next one right away
+            self.overruns += 1
+            jitter = now - self.deadline
+            self.deadline = now + self.period
+
+        else:
+            self.sleep(self.deadline - now)
+            now = self.clock()
+            jitter = now - self.deadline
+            self.deadline += self.period
+
+        self.__record(now - self.lastTick, jitter)
+        self.lastTick = now
+        return now
+
+    def histogram(self):
+        """
+        Returns the loop times as (lower bound in seconds, iterations) for all bins
+        :return: List of (Float, Integer)
+        """
+        return [(i * self.binWidth, iterations) for i, iterations in enumerate(self.loopTimes)]
+
+    def summary(self):
+        """
+        Returns the measurements as a line of text for the console or the log
+        :return: String
+        """
+        if self.iterations == 0:
+            return "%.1f Hz: no iterations" % (1.0 / self.period)
+
+        return "%.1f Hz: %d iterations, %d overruns, loop time %.2f ms mean %.2f ms max, jitter %.2f ms mean %.2f ms max" % (
+            1.0 / self.period, self.iterations, self.overruns,
+            self.totalLoopTime / self.iterations * 1000, self.maxLoopTime * 1000,
+            self.totalJitter / self.iterations * 1000, self.maxJitter * 1000)
+
+    # Helper methods
+    def __record(self, loopTime, jitter):
+
+        self.iterations += 1
+        self.totalLoopTime += loopTime
+        self.totalJitter += jitter
+
+        if loopTime > self.maxLoopTime:
+            self.maxLoopTime = loopTime
+        if jitter > self.maxJitter:
+            self.maxJitter = jitter
+
+        self.loopTimes[min(int(loopTime / self.binWidth), len(self.loopTimes) - 1)] += 1
@@ -1,28 +1,82 @@
 # Managing the data from the sensor
+# Attention: Do not import the ev3dev.ev3 module in this file, the devices come from hardware.EV3Hardware
 
-import ev3dev.ev3 as ev3
 import math
+import threading
+
+
+# Modes used by the robot
+COLOR_MODE = 'RGB-RAW'
+ULTRASONIC_MODE = 'US-DIST-CM'  # Continuous measurement in centimeters
+
+# Seconds between two reads of the ultrasonic sensor while sampling in the background
+ULTRASONIC_INTERVAL = 0.03
+
+
+# Perceived brightness of raw rgb data
+def brightness(r, g, b):
+    return math.sqrt(0.299*r**2 + 0.587*g**2 + 0.114*b**2)
 
 
 class Sensor:
-    def __init__(self):
-        pass
+
+    # Opens both devices once, every new device object means sysfs lookups and writing the mode again
+    # hardware is a hardware.EV3Hardware or simev3.SimulatedEV3
+    def __init__(self, hardware):
+        self.cs = hardware.colorSensor()
+        self.us = hardware.ultrasonicSensor()
+
+        # The mode last written to each device, it is only written again if it changes
+        self.colorMode = None
+        self.ultrasonicMode = None
+
+        self.setColorMode(COLOR_MODE)
+        self.setUltrasonicMode(ULTRASONIC_MODE)
+
+        # The ultrasonic sensor is read by the sampler's thread and by obstacleTest, never by both at once
+        self.usLock = threading.Lock()
+        self.distances = hardware.sampler(self.obstacleTest, ULTRASONIC_INTERVAL)
+
+    # Reads the distance on a background thread from now on, sample() returns the latest distance
+    def startSampling(self):
+        self.distances.start()
+
+    def stopSampling(self):
+        self.distances.stop()
+
+    def setColorMode(self, mode):
+        if mode != self.colorMode:
+            self.cs.mode = mode
+            self.colorMode = mode
+
+    def setUltrasonicMode(self, mode):
+        if mode != self.ultrasonicMode:
+            self.us.mode = mode
+            self.ultrasonicMode = mode
 
     # Returns the color in raw rgb data
     def getColor(self):
-        cs = ev3.ColorSensor()
-        cs.mode = 'RGB-RAW'
-        return cs.bin_data("hhh")
+        self.setColorMode(COLOR_MODE)
+        return self.cs.bin_data("hhh")
 
     def getBrightness(self):
-        cs = ev3.ColorSensor()
-        cs.mode = 'RGB-RAW'
-        r, g, b = cs.bin_data("hhh")
-        return math.sqrt(0.299*r**2 + 0.587*g**2 + 0.114*b**2)
+        return brightness(*self.getColor())
 
     def obstacleTest(self):
         # Returns the distance in cm that the robot is away from an obstacle
-        us = ev3.UltrasonicSensor()
-        us.mode = 'US-DIST-CM'  # Continuous measurement in centimeters
-        return us.distance_centimeters
+        with self.usLock:
+            self.setUltrasonicMode(ULTRASONIC_MODE)
+            return self.us.distance_centimeters
+
+    # Returns r, g, b, brightness and distance, every device is only read once
+    # While sampling, the distance is the latest one of the background thread and None before its first read,
+    # check self.distances.age() before using it
+    def sample(self):
+        r, g, b = self.getColor()
+
+        if self.distances.running:
+            distance = self.distances.latest[0]
+        else:
+            distance = self.obstacleTest()
 
+        return r, g, b, brightness(r, g, b), distance
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+
+# Runs driving.Driving on a simulated robot, faster than real time, with:
+#   python3 simev3.py [planet.json ...]
+# Attention: Do not import the ev3dev.ev3 module in this file
+import contextlib
+import io
+import math
+import random
+import sys
+import time
+
+from planet import Direction
+from simulator import Mothership, SimulatedPlanet, SimulationResult, generatePlanet
+
+
+# Materials of the floor and the raw rgb data the color sensor reads on them
+WHITE, BLACK, RED, BLUE, OBSTACLE = range(5)
+RGB = [(285, 503, 200), (38, 77, 15), (159, 61, 13), (49, 180, 93), (285, 503, 200)]
+
+# Centimeters between two neighbouring nodes, odometry.Odometry counts 50 cm as 1
+GRID = 50
+
+# The robot as measured for odometry.Odometry
+DISTANCE_PER_TICK = 0.0523  # cm
+WHEEL_GAUGE = 14            # cm
+SENSOR_OFFSET = 5.0         # cm from the middle between the wheels to the color sensor
+MAX_SPEED = 1050            # ticks per second of a LargeMotor
+MAX_DISTANCE = 255.0        # cm, what the ultrasonic sensor reads without an obstacle in front of it
+
+LEFT_PORT, RIGHT_PORT = "outA", "outD"
+
+
+class SimulationTimeout(Exception):
+    pass
+
+
+class RasterPlanet:
+    """
+    The floor of a SimulatedPlanet as an image with resolution cm per pixel
+
+    Node (x, y) is at (x * GRID, y * GRID) cm, x grows to the east and y to the north. Every path
+    is a black line between the centers of its nodes, a blocked one has an obstacle in its middle.
+    Nodes are squares, blue if x + y is even and red otherwise. Paths have to be straight lines:
+    both ends in the same row or column, leaving towards each other. If no path leads into the
+    start node from behind the robot, a line is drawn there for the robot to start on
+    """
+
+    def __init__(self, planet: SimulatedPlanet, resolution=0.25, lineWidth=2.0, nodeSize=4.0,
+                 obstacleSize=5.0, spotRadius=0.5, margin=40):
+
+        self.resolution = resolution
+        self.lineWidth = lineWidth
+
+        nodes = set(node for node, direction in planet.paths) | {planet.start}
+        self.left = min(x for x, y in nodes) * GRID - margin
+        self.bottom = min(y for x, y in nodes) * GRID - margin
+        self.width = int((max(x for x, y in nodes) * GRID + margin - self.left) / resolution) + 1
+        self.height = int((max(y for x, y in nodes) * GRID + margin - self.bottom) / resolution) + 1
+        self.pixels = bytearray(self.width * self.height)
+
+        for (node, direction), (endNode, endDirection, weight) in planet.paths.items():
+            if (node, direction) > (endNode, endDirection):
+                continue
+
+            dx, dy = endNode[0] - node[0], endNode[1] - node[1]
+            ux, uy = unitVector(direction)
+            if dx * uy != dy * ux or dx * ux + dy * uy <= 0 or Direction(endDirection) != Direction((direction + 180) % 360):
+                raise ValueError("The path %s can't be drawn as a straight line" % ((node, direction, endNode, endDirection),))
+
+            self.drawLine(node[0] * GRID, node[1] * GRID, endNode[0] * GRID, endNode[1] * GRID, BLACK)
+
+            if weight < 0:
+                x, y = (node[0] + endNode[0]) * GRID / 2, (node[1] + endNode[1]) * GRID / 2
+                self.fillRect(x - obstacleSize / 2, y - obstacleSize / 2, x + obstacleSize / 2, y + obstacleSize / 2, OBSTACLE)
+
+        # The robot starts behind the start node, looking in the start orientation
+        behind = Direction((planet.startOrientation + 180) % 360)
+        if (planet.start, behind) not in planet.paths:
+            ux, uy = unitVector(behind)
+            x, y = planet.start[0] * GRID, planet.start[1] * GRID
+            self.drawLine(x, y, x + ux * (margin - 5), y + uy * (margin - 5), BLACK)
+
+        for x, y in nodes:
+            color = BLUE if (x + y) % 2 == 0 else RED
+            self.fillRect(x * GRID - nodeSize / 2, y * GRID - nodeSize / 2, x * GRID + nodeSize / 2, y * GRID + nodeSize / 2, color)
+
+        # Pixels the sensor sees, relative to the one under its center
+        radius = int(spotRadius / resolution)
+        self.spot = [(dx, dy) for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)
+                     if dx * dx + dy * dy <= radius * radius]
+
+    def drawLine(self, x1, y1, x2, y2, material):
+
+        """
+        Draws a line of lineWidth from (x1, y1) to (x2, y2), the line has to be horizontal or vertical
+        """
+
+        half = self.lineWidth / 2
+        self.fillRect(min(x1, x2) - half, min(y1, y2) - half, max(x1, x2) + half, max(y1, y2) + half, material)
+
+    def fillRect(self, x1, y1, x2, y2, material):
+
+        column1, row1 = self.pixel(x1, y1)
+        column2, row2 = self.pixel(x2, y2)
+
+        for row in range(max(row1, 0), min(row2, self.height - 1) + 1):
+            start = row * self.width
+            self.pixels[start + max(column1, 0):start + min(column2, self.width - 1) + 1] = \
+                bytes([material]) * (min(column2, self.width - 1) + 1 - max(column1, 0))
+
+    def pixel(self, x, y):
+
+        """
+        Returns (column, row) of the pixel at (x, y) cm
+        """
+
+        return int((x - self.left) / self.resolution), int((y - self.bottom) / self.resolution)
+
+    def material(self, x, y):
+
+        column, row = self.pixel(x, y)
+        if 0 <= column < self.width and 0 <= row < self.height:
+            return self.pixels[row * self.width + column]
+
+        return WHITE
+
+    def color(self, x, y):
+
+        """
+        Returns the raw rgb data the color sensor reads at (x, y), the mean over its spot
+        """
+
+        column, row = self.pixel(x, y)
+        r = g = b = 0
+
+        for dx, dy in self.spot:
+            c, w = column + dx, row + dy
+            material = self.pixels[w * self.width + c] if 0 <= c < self.width and 0 <= w < self.height else WHITE
+            rgb = RGB[material]
+            r += rgb[0]
+            g += rgb[1]
+            b += rgb[2]
+
+        n = len(self.spot)
+        return r // n, g // n, b // n
+
+    def distance(self, x, y, heading):
+
+        """
+        Returns the distance in cm from (x, y) to the next obstacle in direction heading,
+        MAX_DISTANCE if there is none that close
+        """
+
+        ux, uy = math.sin(heading), math.cos(heading)
+        travelled = 0.0
+
+        while travelled < MAX_DISTANCE:
+            if self.material(x + ux * travelled, y + uy * travelled) == OBSTACLE:
+                return travelled
+            travelled += self.resolution
+
+        return MAX_DISTANCE
+
+    def savePPM(self, filename):
+
+        """
+        Writes the image as a PPM file, north is up
+        """
+
+        with open(filename, 'wb') as file:
+            file.write(b"P6 %d %d 255\n" % (self.width, self.height))
+            for row in reversed(range(self.height)):
+                line = self.pixels[row * self.width:(row + 1) * self.width]
+                file.write(b"".join(bytes(min(channel // 2, 255) for channel in RGB[material]) for material in line))
+
+
+def unitVector(direction):
+
+    """
+    Returns (x, y) of one step in direction, like odometry.Odometry north is 0 and east is 90
+    """
+
+    heading = math.radians(direction)
+    return round(math.sin(heading)), round(math.cos(heading))
+
+
+class SimulatedMotor:
+    """
+    Offers the fields and methods of ev3.LargeMotor that driving.Driving uses, speeds in ticks per second
+    """
+
+    def __init__(self, ev3):
+        self.ev3 = ev3
+        self.ticks = 0.0
+        self.speed = 0.0
+        self._speed_sp = 0
+        self._stop_action = "coast"
+
+    @property
+    def position(self):
+        self.ev3.spend()
+        return int(round(self.ticks))
+
+    @property
+    def speed_sp(self):
+        return self._speed_sp
+
+    @speed_sp.setter
+    def speed_sp(self, value):
+        self.ev3.spend()
+        self._speed_sp = max(-MAX_SPEED, min(MAX_SPEED, value))
+
+    @property
+    def stop_action(self):
+        return self._stop_action
+
+    @stop_action.setter
+    def stop_action(self, value):
+        self.ev3.spend()
+        self._stop_action = value
+
+    @property
+    def command(self):
+        return None
+
+    @command.setter
+    def command(self, value):
+        self.ev3.spend()
+        if value == "run-forever":
+            self.speed = self._speed_sp
+
+    def stop(self):
+        self.ev3.spend()
+        self.speed = 0.0
+
+    def reset(self):
+        self.ev3.spend()
+        self.ticks = 0.0
+        self.speed = 0.0
+        self._speed_sp = 0
+
+
+class SimulatedColorSensor:
+    """
+    Offers the fields and methods of ev3.ColorSensor in mode RGB-RAW
+    """
+
+    def __init__(self, ev3):
+        self.ev3 = ev3
+        self._mode = None
+
+    @property
+    def mode(self):
+        return self._mode
+
+    @mode.setter
+    def mode(self, value):
+        self.ev3.spend()
+        self._mode = value
+
+    def bin_data(self, fmt=None):
+        self.ev3.spend()
+        return self.ev3.raster.color(*self.ev3.sensorPosition())
+
+
+class SimulatedUltrasonicSensor:
+    """
+    Offers the fields of ev3.UltrasonicSensor in mode US-DIST-CM
+
+    Reading the distance takes no time, on the robot it is read by a background thread
+    """
+
+    def __init__(self, ev3):
+        self.ev3 = ev3
+        self.mode = None
+
+    @property
+    def distance_centimeters(self):
+        x, y = self.ev3.sensorPosition()
+        return self.ev3.raster.distance(x, y, self.ev3.heading)
+
+
+class SimulatedButton:
+
+    # Nobody has to press a button in a simulation
+    def any(self):
+        return True
+
+
+class SimulatedSound:
+
+    def __init__(self, ev3, duration=0.5):
+        self.ev3 = ev3
+        self.duration = duration
+        self.played = []
+
+    def play(self, filename):
+        self.played.append(filename)
+        return self
+
+    def wait(self):
+        self.ev3.sleep(self.duration)
+
+
+class SimulatedSampler:
+    """
+    Offers the fields and methods of sampler.BackgroundSampler in simulated time, without a thread
+
+    read() is called when latest or age() is used and interval seconds have passed since the last read
+    """
+
+    def __init__(self, ev3, read, interval):
+        self.ev3 = ev3
+        self.read = read
+        self.interval = interval
+
+        self._latest = (None, None)
+        self.reads = 0
+        self.errors = 0
+        self.running = False
+        self.nextRead = 0.0
+
+    @property
+    def latest(self):
+        self.__poll()
+        return self._latest
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.nextRead = self.ev3.now
+
+    def stop(self):
+        self.running = False
+
+    def age(self):
+        timestamp = self.latest[1]
+        if timestamp is None:
+            return float('inf')
+
+        return self.ev3.now - timestamp
+
+    # Helper methods
+    def __poll(self):
+
+        if not self.running or self.ev3.now < self.nextRead:
+            return
+
+        try:
+            value = self.read()
+        except Exception:
+            self.errors += 1
+        else:
+            self._latest = (value, self.ev3.now)
+            self.reads += 1
+
+        self.nextRead = max(self.nextRead + self.interval, self.ev3.now)
+
+
+class SimulatedEV3:
+    """
+    Offers the methods of hardware.EV3Hardware for a robot driving on a RasterPlanet
+
+    Time only passes in sleep(...) and for every access of a motor or the color sensor, accessTime
+    seconds like a sysfs read or write on the robot. The wheels turn at the speed the motors have
+    been set to, the robot moves like a differential drive with WHEEL_GAUGE between the wheels.
+    Like on the robot, the motors are mounted backwards: negative speeds drive forward. With slip,
+    the distance each wheel travels differs randomly from what its motor counts by up to that share
+
+    Every call that lets time pass raises SimulationTimeout once timeLimit seconds have passed
+    """
+
+    def __init__(self, planet: SimulatedPlanet, raster: RasterPlanet = None, accessTime=0.004, slip=0.0,
+                 timeLimit=3600, seed=0):
+
+        self.planet = planet
+        self.raster = raster or RasterPlanet(planet)
+        self.accessTime = accessTime
+        self.slip = slip
+        self.timeLimit = timeLimit
+        self.rng = random.Random(seed)
+        self.now = 0.0
+
+        # The middle between the wheels in cm and the heading like odometry.Odometry's gamma
+        self.heading = math.radians(planet.startOrientation)
+        startX, startY = planet.start[0] * GRID, planet.start[1] * GRID
+        distance = SENSOR_OFFSET + 8
+
+        # The sensor starts on the left edge of the line, the edge driving.lineFollower follows
+        self.x = startX - math.sin(self.heading) * distance - math.cos(self.heading) * self.raster.lineWidth / 2
+        self.y = startY - math.cos(self.heading) * distance + math.sin(self.heading) * self.raster.lineWidth / 2
+
+        self.motors = dict()
+        self.sounds = SimulatedSound(self)
+
+    # Devices
+    def largeMotor(self, port):
+        return self.motors.setdefault(port, SimulatedMotor(self))
+
+    def colorSensor(self):
+        return SimulatedColorSensor(self)
+
+    def ultrasonicSensor(self):
+        return SimulatedUltrasonicSensor(self)
+
+    def button(self):
+        return SimulatedButton()
+
+    def sound(self):
+        return self.sounds
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def sampler(self, read, interval):
+        return SimulatedSampler(self, read, interval)
+
+    # Simulation
+    def sensorPosition(self):
+        return self.x + math.sin(self.heading) * SENSOR_OFFSET, self.y + math.cos(self.heading) * SENSOR_OFFSET
+
+    def spend(self):
+        self.advance(self.accessTime)
+
+    def advance(self, seconds):
+
+        """
+        Moves the robot as far as it gets in seconds with the current motor speeds
+        """
+
+        if seconds <= 0:
+            return
+
+        left = self.motors.get(LEFT_PORT)
+        right = self.motors.get(RIGHT_PORT)
+        leftTicks = left.speed * seconds if left is not None else 0.0
+        rightTicks = right.speed * seconds if right is not None else 0.0
+
+        if left is not None:
+            left.ticks += leftTicks
+        if right is not None:
+            right.ticks += rightTicks
+
+        # Forward distances of the wheels
+        leftDistance = -leftTicks * DISTANCE_PER_TICK * (1 + self.rng.uniform(-self.slip, self.slip))
+        rightDistance = -rightTicks * DISTANCE_PER_TICK * (1 + self.rng.uniform(-self.slip, self.slip))
+
+        # Turning clockwise increases the heading, along an arc the robot moves in the direction of the mean heading
+        alpha = (leftDistance - rightDistance) / WHEEL_GAUGE
+        distance = (leftDistance + rightDistance) / 2
+        if alpha != 0:
+            distance *= math.sin(alpha / 2) / (alpha / 2)
+
+        self.x += math.sin(self.heading + alpha / 2) * distance
+        self.y += math.cos(self.heading + alpha / 2) * distance
+        self.heading += alpha
+
+        self.now += seconds
+        if self.now > self.timeLimit:
+            raise SimulationTimeout("The robot has been driving for %.0f seconds" % self.now)
+
+
+def simulate(planet: SimulatedPlanet, timeLimit=3600, **options):
+
+    """
+    Explores planet with driving.Driving on a SimulatedEV3, returns (SimulationResult, ev3)
+    Only result, obstacles and missingPaths of the SimulationResult are filled in,
+    options are passed on to SimulatedEV3
+    """
+
+    # Imported here, so the ev3-free modules above don't need the driving code
+    from driving import Driving
+
+    mothership = Mothership(planet)
+    ev3 = SimulatedEV3(planet, timeLimit=timeLimit, **options)
+
+    # The simulated sensors read the values driving.Driving uses without calibration
+    robot = Driving(mothership, hardware=ev3, calibrate=False)
+    robot.lineFollower()
+
+    result = SimulationResult()
+    result.result = mothership.result
+    result.obstacles = ev3.sounds.played.count('/home/robot/src/sounds/uhoh.wav')
+
+    known = robot.explorer.planet.paths
+    result.missingPaths = set(path for path in planet.reachablePaths() if path[1] not in known.get(path[0], dict()))
+
+    return result, ev3
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) > 1:
+        planets = [SimulatedPlanet.load(filename) for filename in sys.argv[1:]]
+    else:
+        planets = [generatePlanet(4, 4, seed, loops=0) for seed in range(5)]
+
+    for planet in planets:
+        begin = time.perf_counter()
+        try:
+            # driving.Driving talks a lot, only the summary of every planet is printed
+            with contextlib.redirect_stdout(io.StringIO()):
+                result, ev3 = simulate(planet)
+            summary, simulated = "%s, %d paths missing" % (result.result, len(result.missingPaths)), ev3.now
+        except SimulationTimeout as error:
+            summary, simulated = str(error), float('nan')
+
+        elapsed = time.perf_counter() - begin
+        print("%-14s %-40s %8.1f s simulated %6.1f s wall time" % (planet.name, summary, simulated, elapsed))
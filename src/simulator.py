@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+
+# Headless exploration runs without a mothership or a robot, run with:
+#   python3 simulator.py [planet.json ...]
+# Attention: Do not import the ev3dev.ev3 module in this file
+import json
+import random
+import sys
+from concurrent.futures import Future
+from typing import Tuple
+
+from explorer import Explorer
+from messagequeue import MessageQueue
+from messages import PathMsg, PathUnveiledMsg, PlanetMsg, TargetMsg
+from planet import Direction
+
+
+rotate = lambda direction: Direction((direction + 180) % 360)
+
+
+class SimulatedPlanet:
+
+    """
+    The real planet as the mothership knows it
+
+    paths maps (node, direction) to (node, direction, weight) for both ends of every path,
+    blocked paths have the weight -1 and stop the robot before it reaches the other end
+    """
+
+    def __init__(self, name: str, start: Tuple[int, int], startOrientation: Direction, target=None):
+
+        self.name = name
+        self.start = start
+        self.startOrientation = Direction(startOrientation)
+        self.target = target
+        self.paths = dict()
+        self.directions = dict()
+
+    def add_path(self, start, target, weight: int):
+
+        """
+        Adds a bidirectional path, same arguments as Planet.add_path(...)
+        """
+
+        self.paths[(start[0], Direction(start[1]))] = target[0], Direction(target[1]), weight
+        self.paths[(target[0], Direction(target[1]))] = start[0], Direction(start[1]), weight
+
+        for node, direction in [start, target]:
+            directions = self.directions.setdefault(node, [])
+            if Direction(direction) not in directions:
+                directions.append(Direction(direction))
+
+    def directionsAt(self, node: Tuple[int, int]):
+
+        """
+        Returns the directions of all paths leaving node, what a scan of the node finds
+        """
+
+        return list(self.directions.get(node, []))
+
+    def reachablePaths(self):
+
+        """
+        Returns all (node, direction) pairs at nodes that can be reached from the start over free paths
+        """
+
+        reached = {self.start}
+        stack = [self.start]
+
+        while len(stack) > 0:
+            node = stack.pop()
+            for direction in self.directionsAt(node):
+                endNode, endDirection, weight = self.paths[(node, direction)]
+                if weight > 0 and endNode not in reached:
+                    reached.add(endNode)
+                    stack.append(endNode)
+
+        return set(path for path in self.paths if path[0] in reached)
+
+    @staticmethod
+    def load(filename: str):
+
+        """
+        Reads a planet from a JSON file of the form
+
+            {
+                "name": "Fassaden",
+                "start": [0, 0, 0],
+                "target": [2, 1],
+                "paths": [[0, 0, 90, 2, 1, 270, 3], [0, 0, 0, 0, 0, 270, -1], ...]
+            }
+
+        target is optional, every path is [startX, startY, startDirection, endX, endY, endDirection, weight]
+        """
+
+        with open(filename) as file:
+            data = json.load(file)
+
+        target = tuple(data['target']) if data.get('target') is not None else None
+        planet = SimulatedPlanet(data['name'], tuple(data['start'][:2]), data['start'][2], target)
+
+        for x1, y1, d1, x2, y2, d2, weight in data['paths']:
+            planet.add_path(((x1, y1), d1), ((x2, y2), d2), weight)
+
+        return planet
+
+    def save(self, filename: str):
+
+        """
+        Writes the planet in the format read by load(...)
+        """
+
+        paths = []
+        for (node, direction), (endNode, endDirection, weight) in self.paths.items():
+            if (node, direction) <= (endNode, endDirection):
+                paths.append([*node, int(direction), *endNode, int(endDirection), weight])
+
+        data = {
+            "name": self.name,
+            "start": [*self.start, int(self.startOrientation)],
+            "target": list(self.target) if self.target is not None else None,
+            "paths": paths
+        }
+
+        with open(filename, 'w') as file:
+            json.dump(data, file)
+
+
+def generatePlanet(width: int, height: int, seed: int = 0, missing: float = 0.2, blocked: float = 0.1,
+                   loops: int = 3, withTarget: bool = False):
+
+    """
+    Returns a random SimulatedPlanet on a width x height grid
+
+    Neighbouring nodes are connected unless the path is missing, free paths get weights from 1 to 5,
+    loops are extra paths between random free slots (possibly at the same node)
+    """
+
+    rng = random.Random(seed)
+    planet = SimulatedPlanet("generated-%d" % seed, (0, 0), Direction.NORTH)
+    weight = lambda: -1 if rng.random() < blocked else rng.randint(1, 5)
+
+    for x in range(width):
+        for y in range(height):
+
+            if x + 1 < width and rng.random() >= missing:
+                planet.add_path(((x, y), Direction.EAST), ((x + 1, y), Direction.WEST), weight())
+
+            if y + 1 < height and rng.random() >= missing:
+                planet.add_path(((x, y), Direction.NORTH), ((x, y + 1), Direction.SOUTH), weight())
+
+    nodes = [(x, y) for x in range(width) for y in range(height)]
+
+    for i in range(loops):
+        start = rng.choice(nodes), rng.choice(list(Direction))
+        end = rng.choice(nodes), rng.choice(list(Direction))
+
+        if start != end and start not in planet.paths and end not in planet.paths:
+            planet.add_path(start, end, rng.randint(1, 9))
+
+    startNodes = sorted(set(node for node, direction in planet.paths)) or [(0, 0)]
+    planet.start = rng.choice(startNodes)
+    planet.startOrientation = rng.choice(list(Direction))
+
+    if withTarget:
+        planet.target = rng.choice(startNodes)
+
+    return planet
+
+
+class Mothership:
+
+    """
+    Plays the server's part of the protocol for the explorer
+
+    Offers the same methods and fields as communication.Communication and answers every
+    message immediately, like the real mothership it sends the planet, path, pathUnveiled,
+    target and done messages
+    """
+
+    def __init__(self, planet: SimulatedPlanet, unveilProbability: float = 0.0, targetAfter: int = 0, seed: int = 0):
+
+        """
+        unveilProbability is the chance to unveil a random path with every path message,
+        the target (if the planet has one) is sent after targetAfter path messages
+        """
+
+        self.planet = planet
+        self.unveilProbability = unveilProbability
+        self.targetAfter = targetAfter
+        self.rng = random.Random(seed)
+
+        self.planetName = ''
+        self.planetMessage = None
+        self.pathMessage = None
+        self.correctedDirection = None
+        self.inbox = MessageQueue(['pathUnveiled', 'target'])
+        self.doneMessage = ''
+
+        self.pathMessages = 0
+        self.reportedPaths = set()
+        self.hiddenPaths = sorted(planet.paths)
+        self.result = None
+
+    # getter Methods, see Communication
+    def getPlanetMessage(self):
+        return self.planetMessage
+
+    def getPathMessage(self):
+        return self.pathMessage
+
+    def getCorrectedDirection(self):
+        return self.correctedDirection
+
+    def getDoneMessage(self):
+        return self.doneMessage
+
+    def drain(self, messageType):
+        return self.inbox.drain(messageType)
+
+    def wait_for(self, messageType, timeout):
+
+        # Every answer is sent right away, so there is nothing to wait for
+        return {
+            'planet': self.planetMessage is not None,
+            'path': self.pathMessage is not None,
+            'pathSelect': self.correctedDirection is not None,
+            'pathUnveiled': self.inbox.pending('pathUnveiled') > 0,
+            'target': self.inbox.pending('target') > 0,
+            'done': self.doneMessage != ''
+        }[messageType]
+
+    # Messages from the robot
+    def sendReady(self):
+        self.planetName = self.planet.name
+        self.planetMessage = PlanetMsg(self.planet.name, *self.planet.start, int(self.planet.startOrientation))
+        self.__testSendTarget()
+
+    def subscribePlanet(self):
+        pass
+
+    def sendDiscoveredPath(self, startX, startY, startDirection, endX, endY, endDirection, status):
+
+        start = (startX, startY), Direction(startDirection)
+        endNode, endDirection, weight = self.planet.paths.get(start, (start[0], start[1], -1))
+
+        # Whatever the robot thinks, the mothership answers with the real path
+        if weight == -1:
+            endNode, endDirection, status = start[0], start[1], "blocked"
+        else:
+            status = "free"
+
+        self.pathMessage = PathMsg(startX, startY, int(startDirection), *endNode, int(endDirection), status, weight)
+        self.reportedPaths.update([start, (endNode, endDirection)])
+        self.pathMessages += 1
+
+        if self.rng.random() < self.unveilProbability:
+            self.__unveilPath()
+
+        self.__testSendTarget()
+
+    def reportPath(self, startX, startY, startDirection, endX, endY, endDirection, status):
+        self.sendDiscoveredPath(startX, startY, startDirection, endX, endY, endDirection, status)
+        future = Future()
+        future.set_result(self.pathMessage)
+        return future
+
+    def deferPath(self):
+        # Every answer is sent right away, it is pathMessage already
+        return None
+
+    def sendPathSelected(self, startX, startY, startDirection):
+        pass
+
+    def targetReached(self):
+        self.result = "targetReached"
+        self.doneMessage = "Target reached!"
+
+    def explorationCompleted(self):
+        self.result = "explorationCompleted"
+        self.doneMessage = "Planet explored!"
+
+    # Helper methods
+    def __testSendTarget(self):
+
+        if self.planet.target is not None and self.pathMessages == self.targetAfter:
+            self.inbox.put('target', TargetMsg(*self.planet.target))
+
+    def __unveilPath(self):
+
+        # Paths that have been reported since they were put in hiddenPaths are skipped and dropped here
+        while len(self.hiddenPaths) > 0:
+            index = self.rng.randrange(len(self.hiddenPaths))
+            self.hiddenPaths[index], self.hiddenPaths[-1] = self.hiddenPaths[-1], self.hiddenPaths[index]
+            start = self.hiddenPaths.pop()
+
+            if start not in self.reportedPaths:
+                break
+        else:
+            return
+
+        endNode, endDirection, weight = self.planet.paths[start]
+        status = "blocked" if weight == -1 else "free"
+        self.inbox.put('pathUnveiled', PathUnveiledMsg(*start[0], int(start[1]), *endNode, int(endDirection), status, weight))
+        self.reportedPaths.update([start, (endNode, endDirection)])
+
+
+class SimulationResult:
+
+    """
+    Outcome of Simulator.run()
+    """
+
+    def __init__(self):
+        self.result = None          # "targetReached", "explorationCompleted" or None if the run was aborted
+        self.steps = 0              # Nodes reached
+        self.distance = 0           # Sum of the weights of all paths driven
+        self.obstacles = 0          # Blocked paths driven into
+        self.missingPaths = set()   # Reachable paths the explorer didn't know at the end
+
+
+class Simulator:
+
+    """
+    Moves a virtual robot over a SimulatedPlanet and lets an Explorer decide where to go,
+    calling it exactly like driving.Driving does
+    """
+
+    def __init__(self, planet: SimulatedPlanet, explorer: Explorer = None, mothership: Mothership = None,
+                 maxSteps: int = 10000):
+
+        self.planet = planet
+        self.mothership = mothership or Mothership(planet)
+        self.explorer = explorer or Explorer(self.mothership)
+        self.maxSteps = maxSteps
+
+    def run(self) -> SimulationResult:
+
+        result = SimulationResult()
+        node, entranceDirection, obstacleFound = None, None, False
+
+        while result.steps < self.maxSteps:
+
+            result.steps += 1
+            correctedOdoData = self.explorer.onNodeReached(node, entranceDirection, obstacleFound)
+
+            if correctedOdoData is None:
+                break
+
+            node, entranceDirection = correctedOdoData
+
+            if not self.explorer.wasScanned():
+                exitDirection = self.explorer.getNextDirection(self.planet.directionsAt(node))
+            else:
+                exitDirection = self.explorer.getNextDirection(None)
+
+            if exitDirection is None:
+                break
+
+            node, entranceDirection, obstacleFound = self.drive(node, exitDirection, result)
+
+        result.result = self.mothership.result
+        known = self.explorer.planet.paths
+        result.missingPaths = set(path for path in self.planet.reachablePaths()
+                                  if path[1] not in known.get(path[0], dict()))
+
+        return result
+
+    def drive(self, node: Tuple[int, int], exitDirection: Direction, result: SimulationResult):
+
+        """
+        Returns where the robot ends up as (node, entranceDirection, obstacleFound)
+        """
+
+        if (node, exitDirection) not in self.planet.paths:
+            raise ValueError("There is no path leaving %s in direction %s" % (node, exitDirection))
+
+        endNode, endDirection, weight = self.planet.paths[(node, exitDirection)]
+
+        # The robot turns around at the obstacle and comes back facing the other way
+        if weight == -1:
+            result.obstacles += 1
+            return node, rotate(exitDirection), True
+
+        result.distance += weight
+        return endNode, rotate(endDirection), False
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) > 1:
+        planets = [SimulatedPlanet.load(filename) for filename in sys.argv[1:]]
+    else:
+        planets = [generatePlanet(8, 8, seed, withTarget=(seed % 2 == 0)) for seed in range(100)]
+
+    for planet in planets:
+        result = Simulator(planet, mothership=Mothership(planet, unveilProbability=0.2)).run()
+        print("%-14s %-20s %5d steps %6d distance %3d obstacles %3d paths missing" % (
+              planet.name, result.result, result.steps, result.distance, result.obstacles, len(result.missingPaths)))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+import asyncio
+import json
+import threading
+import unittest.mock
+
+from asynccommunication import AsyncCommunication
+from messages import PathMsg, PathUnveiledMsg, TargetMsg
+
+
+
+class TestAsyncCommunication(unittest.TestCase):
+
+
+    @unittest.mock.patch('logging.Logger')
+    def setUp(self, mock_logger):
+        """
+        Instantiates the communication class on a new event loop with a client that never connects anywhere
+        """
+
+        self.loop = asyncio.new_event_loop()
+        self.client = unittest.mock.MagicMock()
+        self.communication = AsyncCommunication(self.client, mock_logger, self.loop)
+
+
+    def tearDown(self):
+        self.loop.close()
+
+
+    def receive(self, messageType, payload, delay=0.01):
+        """
+        Lets a server message arrive on another thread after delay seconds, like paho's network thread does
+        """
+
+        message = unittest.mock.MagicMock()
+        message.payload = json.dumps({"from": "server", "type": messageType, "payload": payload}).encode('utf-8')
+        threading.Timer(delay, self.communication.on_message, (None, None, message)).start()
+
+
+    def test_path(self):
+        """
+        This test should check that every path request is resolved by the answer for its start
+
+        Result: Corrected paths as PathMsg records
+        """
+
+        async def explore():
+            first = self.communication.sendDiscoveredPath(0, 0, 90, 1, 0, 270, 'free')
+            second = self.communication.sendDiscoveredPath(1, 0, 0, 1, 1, 180, 'free')
+
+            self.receive('path', {"startX": 1, "startY": 0, "startDirection": 0, "endX": 1, "endY": 1,
+                                  "endDirection": 180, "pathStatus": "free", "pathWeight": 2})
+            self.receive('path', {"startX": 0, "startY": 0, "startDirection": 90, "endX": 2, "endY": 0,
+                                  "endDirection": 270, "pathStatus": "free", "pathWeight": 3}, 0.05)
+
+            return await asyncio.wait_for(asyncio.gather(first, second), 3)
+
+        first, second = self.loop.run_until_complete(explore())
+        self.assertEqual(first, PathMsg(0, 0, 90, 2, 0, 270, 'free', 3))
+        self.assertEqual(second, PathMsg(1, 0, 0, 1, 1, 180, 'free', 2))
+        self.assertEqual(self.communication.pendingPaths, dict())
+        self.assertEqual(self.communication.client.publish.call_count, 2)
+
+
+    @unittest.mock.patch('logging.Logger')
+    def test_running_loop(self, mock_logger):
+        """
+        This test should check that the communication uses the running event loop if none is given
+
+        Result: The loop of the coroutine, outside of a running loop a RuntimeError instead of a deprecation warning
+        """
+
+        async def create():
+            return AsyncCommunication(unittest.mock.MagicMock(), mock_logger)
+
+        self.assertIs(self.loop.run_until_complete(create()).loop, self.loop)
+
+        with self.assertRaises(RuntimeError):
+            AsyncCommunication(unittest.mock.MagicMock(), mock_logger)
+
+
+    def test_path_select(self):
+        """
+        This test should check that a path selection is resolved by the correction or by the timeout
+
+        Result: The corrected direction, the selected one if the mothership doesn't answer
+        """
+
+        async def select():
+            corrected = self.communication.sendPathSelected(0, 0, 90)
+            self.receive('pathSelect', {"startX": 0, "startY": 0, "startDirection": 180})
+            corrected = await asyncio.wait_for(corrected, 3)
+
+            selected = await self.communication.sendPathSelected(0, 0, 90, timeout=0.05)
+            return corrected, selected
+
+        self.assertEqual(self.loop.run_until_complete(select()), (180, 90))
+
+
+    def test_messages(self):
+        """
+        This test should check that pathUnveiled and target messages end up in the queue in order of arrival
+        """
+
+        async def listen():
+            self.receive('pathUnveiled', {"startX": 3, "startY": 3, "startDirection": 0, "endX": 3, "endY": 4,
+                                          "endDirection": 180, "pathStatus": "blocked", "pathWeight": -1})
+            self.receive('target', {"targetX": 2, "targetY": 3}, 0.05)
+
+            return [await asyncio.wait_for(self.communication.messages.get(), 3) for i in range(2)]
+
+        self.assertEqual(self.loop.run_until_complete(listen()),
+                         [('pathUnveiled', PathUnveiledMsg(3, 3, 0, 3, 4, 180, 'blocked', -1)), ('target', TargetMsg(2, 3))])
+        self.assertEqual(self.communication.drain('target'), [])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import random
+import tracemalloc
+import unittest
+from colorclassifier import BLACK, BLUE, RED, UNKNOWN, WHITE, ColorClassifier
+
+
+
+class TestColorClassifier(unittest.TestCase):
+
+
+    def setUp(self):
+        """
+        Calibrated values of driving.Driving
+        """
+
+        self.blue = (49, 180, 93)
+        self.red = (159, 61, 13)
+        self.classifier = ColorClassifier(self.blue, self.red, 62, 424)
+
+
+    def test_classify(self):
+        """
+        This test should check the color of single samples
+
+        Result: Node colors by rgb data, black and white by brightness, the edge of the line is unknown
+        """
+
+        self.assertIs(self.classifier.classify(49, 180, 93, 140), BLUE)
+        self.assertIs(self.classifier.classify(20, 151, 122, 140), BLUE)
+        self.assertIs(self.classifier.classify(20, 151, 123, 200), UNKNOWN)
+        self.assertIs(self.classifier.classify(188, 90, 0, 140), RED)
+        self.assertIs(self.classifier.classify(38, 77, 15, 62), BLACK)
+        self.assertIs(self.classifier.classify(285, 503, 200, 424), WHITE)
+        self.assertIs(self.classifier.classify(160, 290, 100, 243), UNKNOWN)
+
+
+    def test_matches_ranges(self):
+        """
+        This test should check that blue and red are the same as with the range(...) tests of lineFollower
+
+        Result: The same result for 20000 random samples around both colors
+        """
+
+        isBlue = lambda r, g, b: r in range(self.blue[0] - 30, self.blue[0] + 30) and g in range(self.blue[1] - 30, self.blue[1] + 30) and b in range(self.blue[2] - 30, self.blue[2] + 30)
+        isRed = lambda r, g, b: r in range(self.red[0] - 30, self.red[0] + 30) and g in range(self.red[1] - 30, self.red[1] + 30) and b in range(self.red[2] - 30, self.red[2] + 30)
+
+        rng = random.Random(0)
+        for i in range(20000):
+            center = rng.choice([self.blue, self.red])
+            r, g, b = [channel + rng.randint(-40, 40) for channel in center]
+
+            color = self.classifier.classify(r, g, b, 200)
+            self.assertEqual(color is BLUE, isBlue(r, g, b))
+            self.assertEqual(color is RED, isRed(r, g, b) and not isBlue(r, g, b))
+
+
+    def test_debounce(self):
+        """
+        This test should check that a color is only reported after enough samples in a row
+
+        Result: A single red sample between black ones is ignored, the third red sample in a row is reported
+        """
+
+        classifier = ColorClassifier(self.blue, self.red, 62, 424, debounce=3)
+        black = (38, 77, 15, 62)
+        red = (159, 61, 13, 170)
+
+        self.assertIs(classifier.update(*black), UNKNOWN)
+        self.assertIs(classifier.update(*black), UNKNOWN)
+        self.assertIs(classifier.update(*black), BLACK)
+        self.assertIs(classifier.update(*red), BLACK)
+        self.assertIs(classifier.update(*black), BLACK)
+        self.assertIs(classifier.update(*red), BLACK)
+        self.assertIs(classifier.update(*red), BLACK)
+        self.assertIs(classifier.update(*red), RED)
+
+        classifier.reset()
+        self.assertIs(classifier.update(*red), UNKNOWN)
+
+
+    def test_no_allocation(self):
+        """
+        This test should check that classifying samples doesn't allocate memory
+
+        Result: No memory in use after 1000 updates that hasn't been in use before
+        """
+
+        samples = [(38, 77, 15, 62.0), (159, 61, 13, 170.0), (49, 180, 93, 140.0), (285, 503, 200, 424.0)] * 250
+        update = self.classifier.update
+
+        # The first calls may fill caches of the interpreter
+        for r, g, b, brightness in samples:
+            update(r, g, b, brightness)
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for r, g, b, brightness in samples:
+            update(r, g, b, brightness)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        self.assertEqual(after, before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 
+import json
+import threading
+import time
 import unittest.mock
 import paho.mqtt.client as mqtt
 import uuid
 
 from communication import Communication
+from loopback import LoopbackBroker, LoopbackClient
 
 
 class TestRoboLabCommunication(unittest.TestCase):
@@ -68,5 +72,126 @@ class TestRoboLabCommunication(unittest.TestCase):
         print(self.communication.listOfErrors)
 
 
+class TestCommunicationOffline(unittest.TestCase):
+    @unittest.mock.patch('logging.Logger')
+    def setUp(self, mock_logger):
+        """
+        Instantiates the communication class with a client of an in-process broker
+        """
+        broker = LoopbackBroker()
+        self.client = LoopbackClient(broker)
+        self.mothership = LoopbackClient(broker)
+        self.mothership.connect()
+        self.communication = Communication(self.client, mock_logger)
+
+    def tearDown(self):
+        self.client.loop_stop()
+
+    def receive(self, messageType, payload, delay=0.0):
+        """
+        Lets the mothership publish a message after delay seconds
+        """
+        message = json.dumps({"from": "server", "type": messageType, "payload": payload})
+        thread = threading.Timer(delay, self.mothership.publish, ('explorer/113', message, 1))
+        thread.start()
+        return thread
+
+    def test_wait_for(self):
+        """
+        This test should check that wait_for wakes up as soon as the message arrives
+        """
+        self.receive('path', {"startX": 0, "startY": 0, "startDirection": 0, "endX": 0, "endY": 1,
+                              "endDirection": 180, "pathStatus": "free", "pathWeight": 1}, 0.05)
+        begin = time.monotonic()
+        self.assertTrue(self.communication.wait_for('path', 3))
+        self.assertLess(time.monotonic() - begin, 1)
+        self.assertEqual(self.communication.getPathMessage().pathWeight, 1)
+
+        self.receive('target', {"targetX": 2, "targetY": 3}, 0.1)
+        begin = time.monotonic()
+        self.assertTrue(self.communication.wait_for('target', 3))
+        self.assertLess(time.monotonic() - begin, 1)
+
+    def test_report_path(self):
+        """
+        This test should check that answers to several reported paths are matched by their start
+
+        Result: Every future gets the answer for its path, whatever the order of the answers
+        """
+        first = self.communication.reportPath(0, 0, 90, 1, 0, 270, 'free')
+        second = self.communication.reportPath(1, 0, 0, 1, 1, 180, 'free')
+
+        self.receive('path', {"startX": 1, "startY": 0, "startDirection": 0, "endX": 1, "endY": 1,
+                              "endDirection": 180, "pathStatus": "free", "pathWeight": 2})
+        self.receive('path', {"startX": 0, "startY": 0, "startDirection": 90, "endX": 2, "endY": 0,
+                              "endDirection": 270, "pathStatus": "free", "pathWeight": 3}, 0.05)
+
+        self.assertEqual(first.result(3).endX, 2)
+        self.assertEqual(second.result(3).pathWeight, 2)
+        self.assertEqual(len(self.communication.pendingPaths), 0)
+
+    def test_report_path_late(self):
+        """
+        This test should check two overlapping reported paths, one answered late, while the next path is awaited
+
+        Result: An unrelated answer resolves nothing, the late answer only resolves its own future and
+        only the awaited answer becomes pathMessage
+        """
+        first = self.communication.reportPath(0, 0, 90, 1, 0, 270, 'free')
+        second = self.communication.reportPath(1, 0, 0, 1, 1, 180, 'free')
+
+        self.receive('path', {"startX": 1, "startY": 0, "startDirection": 0, "endX": 1, "endY": 1,
+                              "endDirection": 180, "pathStatus": "free", "pathWeight": 2})
+        self.assertEqual(second.result(3).pathWeight, 2)
+
+        # The robot drives on and waits for the answer of the next path
+        self.communication.pathMessage = None
+        self.communication.sendDiscoveredPath(1, 1, 90, 2, 1, 270, 'free')
+
+        self.receive('path', {"startX": 5, "startY": 5, "startDirection": 0, "endX": 5, "endY": 6,
+                              "endDirection": 180, "pathStatus": "free", "pathWeight": 9})
+        self.receive('path', {"startX": 0, "startY": 0, "startDirection": 90, "endX": 2, "endY": 0,
+                              "endDirection": 270, "pathStatus": "free", "pathWeight": 3}, 0.05)
+
+        self.assertEqual(first.result(3).endX, 2)
+        self.assertIsNone(self.communication.getPathMessage())
+
+        self.receive('path', {"startX": 1, "startY": 1, "startDirection": 90, "endX": 2, "endY": 1,
+                              "endDirection": 270, "pathStatus": "free", "pathWeight": 4})
+        self.assertTrue(self.communication.wait_for('path', 3))
+        self.assertEqual(self.communication.getPathMessage().pathWeight, 4)
+        self.assertEqual(len(self.communication.pendingPaths), 0)
+
+    def test_defer_path(self):
+        """
+        This test should check that the answer to a path that is no longer awaited resolves the future of deferPath()
+
+        Result: The late answer resolves the future and doesn't become pathMessage, nothing to defer once the
+        answer arrived
+        """
+        self.communication.sendDiscoveredPath(0, 0, 90, 1, 0, 270, 'free')
+        self.assertFalse(self.communication.wait_for('path', 0.05))
+        future = self.communication.deferPath()
+
+        self.receive('path', {"startX": 0, "startY": 0, "startDirection": 90, "endX": 1, "endY": 0,
+                              "endDirection": 270, "pathStatus": "free", "pathWeight": 3})
+        self.assertEqual(future.result(3).pathWeight, 3)
+        self.assertIsNone(self.communication.getPathMessage())
+
+        self.communication.sendDiscoveredPath(1, 0, 0, 1, 1, 180, 'free')
+        self.receive('path', {"startX": 1, "startY": 0, "startDirection": 0, "endX": 1, "endY": 1,
+                              "endDirection": 180, "pathStatus": "free", "pathWeight": 2})
+        self.assertTrue(self.communication.wait_for('path', 3))
+        self.assertIsNone(self.communication.deferPath())
+
+    def test_wait_for_timeout(self):
+        """
+        This test should check that wait_for gives up after the timeout if no message arrives
+        """
+        begin = time.monotonic()
+        self.assertFalse(self.communication.wait_for('pathSelect', 0.1))
+        self.assertGreaterEqual(time.monotonic() - begin, 0.1)
+
+
 if __name__ == "__main__":
     unittest.main()
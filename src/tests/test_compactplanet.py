@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+import unittest
+from compactplanet import CompactPlanet
+from planet import Direction, Planet
+
+
+
+class TestCompactPlanet(unittest.TestCase):
+
+
+    def setUp(self):
+        """
+        Instantiates a Planet and a CompactPlanet with the same paths
+
+        planet:
+
+          0,2-----2,2-----4,2
+           |       |       |
+          0,1-----2,1 (blocked)
+           |       |       |
+        +-0,0-----2,0-----4,0-+
+        |                     |
+        +---------------------+
+
+        """
+
+        self.pathlist = [
+
+            (((0, 0), Direction.NORTH), ((0, 1), Direction.SOUTH), 1),
+            (((0, 1), Direction.NORTH), ((0, 2), Direction.SOUTH), 1),
+            (((0, 0), Direction.EAST ), ((2, 0), Direction.WEST ), 2),
+            (((2, 0), Direction.EAST ), ((4, 0), Direction.WEST ), 2),
+            (((0, 1), Direction.EAST ), ((2, 1), Direction.WEST ), 5),
+            (((2, 0), Direction.NORTH), ((2, 1), Direction.SOUTH), 1),
+            (((2, 1), Direction.NORTH), ((2, 2), Direction.SOUTH), 1),
+            (((0, 2), Direction.EAST ), ((2, 2), Direction.WEST ), 3),
+            (((2, 2), Direction.EAST ), ((4, 2), Direction.WEST ), 3),
+            (((4, 0), Direction.NORTH), ((4, 2), Direction.SOUTH), -1),
+            (((0, 0), Direction.SOUTH), ((4, 0), Direction.SOUTH), 7),
+
+        ]
+
+        self.planet = Planet()
+        self.compactPlanet = CompactPlanet()
+
+        for path in self.pathlist:
+            self.planet.add_path(*path)
+            self.compactPlanet.add_path(*path)
+
+
+    def test_get_paths(self):
+        """
+        This test should check that get_paths() returns the same structure as Planet.get_paths()
+        """
+
+        self.assertEqual(self.compactPlanet.get_paths(), self.planet.get_paths())
+
+        for node, pathdict in self.compactPlanet.get_paths().items():
+            for direction, path in pathdict.items():
+                self.assertIsInstance(direction, Direction)
+                self.assertIsInstance(path[1], Direction)
+
+
+    def test_update_weight(self):
+        """
+        This test should check that blocking a path blocks both of its directions
+        """
+
+        self.planet.updateWeight((2, 1), Direction.SOUTH)
+        self.compactPlanet.updateWeight((2, 1), Direction.SOUTH)
+        self.compactPlanet.updateWeight((5, 5), Direction.SOUTH)
+
+        self.assertEqual(self.compactPlanet.get_paths(), self.planet.get_paths())
+
+
+    def test_invalid_direction(self):
+        """
+        This test should check that directions which aren't a Direction are refused like by Planet
+
+        Result: ValueError, no path of any node changed and no new node
+        """
+
+        paths = self.compactPlanet.get_paths()
+
+        for direction in [360, 45, -90, 450]:
+            with self.assertRaises(ValueError):
+                self.planet.add_path(((0, 0), direction), ((9, 9), Direction.SOUTH), 4)
+            with self.assertRaises(ValueError):
+                self.compactPlanet.add_path(((0, 0), direction), ((9, 9), Direction.SOUTH), 4)
+            with self.assertRaises(ValueError):
+                self.compactPlanet.add_path(((9, 9), Direction.SOUTH), ((0, 0), direction), 4)
+
+        self.assertEqual(self.compactPlanet.get_paths(), paths)
+        self.assertEqual(len(self.compactPlanet), 8)
+
+        # Plain integers of a Direction are fine
+        self.compactPlanet.add_path(((9, 9), 0), ((9, 10), 180), 4)
+        self.assertEqual(self.compactPlanet.get_paths()[(9, 9)], {Direction.NORTH: ((9, 10), Direction.SOUTH, 4)})
+
+
+    def test_update_weight_invalid_direction(self):
+        """
+        This test should check that updateWeight(...) with a direction which isn't a Direction does nothing like Planet
+
+        Result: No exception, both planets still have the same paths as before
+        """
+
+        paths = self.compactPlanet.get_paths()
+
+        for direction in [360, 45, -90, 450, None]:
+            self.planet.updateWeight((0, 0), direction)
+            self.compactPlanet.updateWeight((0, 0), direction)
+
+        self.assertEqual(self.planet.get_paths(), paths)
+        self.assertEqual(self.compactPlanet.get_paths(), paths)
+
+
+    def test_shortest_path(self):
+        """
+        This test should check that shortest paths are as long as the ones found by Planet
+
+        Result: Routes of the same length, None if the target is not reachable
+        """
+
+        paths = self.planet.get_paths()
+        length = lambda route: None if route is None else sum(paths[node][direction][2] for node, direction in route)
+
+        for start in paths:
+            for target in paths:
+                self.assertEqual(length(self.compactPlanet.shortest_path(start, target)),
+                                 length(self.planet.shortest_path(start, target)))
+
+        self.assertIsNone(self.compactPlanet.shortest_path((0, 0), (9, 9)))
+        self.assertEqual(self.compactPlanet.shortest_path((4, 2), (4, 2)), [])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import unittest
+from completion import CompletionTracker
+from frontier import Frontier
+from planet import Direction, Planet
+from simulator import Mothership, Simulator, generatePlanet
+
+
+
+class TestCompletionTracker(unittest.TestCase):
+
+
+    def setUp(self):
+        """
+        Instantiates a tracker for two nodes connected by one path
+
+          0,0-----1,0
+
+        """
+
+        self.planet = Planet()
+        self.frontier = Frontier()
+        self.tracker = CompletionTracker(self.planet, self.frontier)
+        self.planet.add_path(((0, 0), Direction.EAST), ((1, 0), Direction.WEST), 1)
+
+
+    def test_open_frontier(self):
+        """
+        This test should check that frontier paths only count where they can be reached over free paths
+        """
+
+        self.frontier.push(((1, 0), Direction.NORTH))
+        self.frontier.push(((2, 0), Direction.NORTH))
+        self.assertEqual(self.tracker.openFrontier((0, 0)), 1)
+        self.assertEqual(self.tracker.openFrontier((2, 0)), 1)
+
+        self.planet.add_path(((1, 0), Direction.EAST), ((2, 0), Direction.WEST), 2)
+        self.assertEqual(self.tracker.openFrontier((0, 0)), 2)
+
+        self.planet.updateWeight((1, 0), Direction.WEST)
+        self.assertEqual(self.tracker.openFrontier((0, 0)), 0)
+        self.assertEqual(self.tracker.openFrontier((1, 0)), 2)
+
+        self.frontier.discard(((1, 0), Direction.NORTH))
+        self.assertEqual(self.tracker.openFrontier((2, 0)), 1)
+
+        self.tracker.detach()
+        self.assertEqual((self.planet.listeners, self.frontier.listeners), ([], []))
+
+
+    def test_matches_search(self):
+        """
+        This test should check that the counts agree with a search over the explorer's map after every decision
+
+        Result: Same number of reachable frontier paths
+        """
+
+        for seed in range(20):
+            planet = generatePlanet(6, 6, seed)
+            simulator = Simulator(planet, mothership=Mothership(planet, unveilProbability=0.3, seed=seed))
+            explorer = simulator.explorer
+            getNextDirection = explorer.getNextDirection
+
+            def checkedGetNextDirection(scannedDirections):
+                direction = getNextDirection(scannedDirections)
+
+                reached, stack = {explorer.currentNode}, [explorer.currentNode]
+                while len(stack) > 0:
+                    for endNode, endDirection, weight in explorer.planet.paths.get(stack.pop(), dict()).values():
+                        if weight > 0 and endNode not in reached:
+                            reached.add(endNode)
+                            stack.append(endNode)
+
+                self.assertEqual(explorer.completion.openFrontier(explorer.currentNode),
+                                 sum(node in reached for node, direction in explorer.DFSqueue))
+                return direction
+
+            explorer.getNextDirection = checkedGetNextDirection
+            result = simulator.run()
+
+            self.assertEqual(result.result, "explorationCompleted")
+            self.assertEqual(result.missingPaths, set())
+
+
+
+if __name__ == "__main__":
+    unittest.main()
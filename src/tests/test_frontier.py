@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import unittest
+from frontier import Frontier
+from planet import Direction
+
+
+
+class TestFrontier(unittest.TestCase):
+
+
+    def setUp(self):
+        """
+        Instantiates a frontier with paths from two nodes, the front is ((0, 0), Direction.NORTH)
+        """
+
+        self.frontier = Frontier()
+        self.frontier.pushAll([
+            ((0, 0), Direction.NORTH),
+            ((1, 0), Direction.EAST ),
+            ((0, 0), Direction.WEST ),
+            ((1, 0), Direction.SOUTH)
+        ])
+
+
+    def test_order(self):
+        """
+        This test should check that new paths are put in front and that the order of the other paths is kept
+        """
+
+        self.frontier.push(((2, 2), Direction.SOUTH))
+        self.frontier.push(((0, 0), Direction.WEST))
+
+        self.assertEqual(list(self.frontier), [
+            ((0, 0), Direction.WEST ),
+            ((2, 2), Direction.SOUTH),
+            ((0, 0), Direction.NORTH),
+            ((1, 0), Direction.EAST ),
+            ((1, 0), Direction.SOUTH)
+        ])
+        self.assertEqual(self.frontier.nodes(), [(0, 0), (2, 2), (1, 0)])
+
+
+    def test_grouping(self):
+        """
+        This test should check that the paths leaving a node are found in DFS order and follow removals
+        """
+
+        self.assertEqual(self.frontier.directionsFrom((0, 0)), [Direction.NORTH, Direction.WEST])
+        self.assertEqual(self.frontier.directionsFrom((5, 5)), [])
+
+        self.frontier.discard(((1, 0), Direction.EAST))
+        self.frontier.discard(((1, 0), Direction.SOUTH))
+        self.frontier.discard(((1, 0), Direction.SOUTH))
+
+        self.assertNotIn(((1, 0), Direction.EAST), self.frontier)
+        self.assertEqual(self.frontier.directionsFrom((1, 0)), [])
+        self.assertEqual(self.frontier.nodes(), [(0, 0)])
+        self.assertEqual(len(self.frontier), 2)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+import logging
+import os
+import tempfile
+import threading
+import unittest
+from logqueue import PrettyJSON, startLogging
+
+
+
+class RecordingJSON(PrettyJSON):
+    """
+    Remembers the threads it was serialized on
+    """
+
+    __slots__ = ['threads']
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread())
+        return super().__str__()
+
+
+
+class TestLogQueue(unittest.TestCase):
+
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, 'project.log')
+        self.root = logging.getLogger()
+        self.handlers, self.level = list(self.root.handlers), self.root.level
+        self.root.handlers = []  # e.g. the ones of the test runner
+        self.logger = logging.getLogger('RoboLab')
+
+
+    def tearDown(self):
+        self.root.handlers, self.root.level = self.handlers, self.level
+        self.directory.cleanup()
+
+
+    def test_background_write(self):
+        """
+        This test should check that messages are serialized and written by the listener, not by the logging thread
+
+        Result: The pretty-printed message in the log file
+        """
+
+        listener = startLogging(self.filename)
+        message = RecordingJSON({"from": "client", "type": "ready"})
+        self.logger.debug('%s', message)
+        listener.stop()
+
+        self.assertNotIn(threading.current_thread(), message.threads)
+        self.assertEqual(len(message.threads), 1)
+
+        with open(self.filename) as file:
+            self.assertIn('"type": "ready"', file.read())
+
+
+    def test_level_gate(self):
+        """
+        This test should check that messages below the level are never serialized
+        """
+
+        listener = startLogging(self.filename, level=logging.INFO)
+        message = RecordingJSON({"from": "client", "type": "ready"})
+        self.logger.debug('%s', message)
+        listener.stop()
+
+        self.assertEqual(message.threads, [])
+
+
+
+if __name__ == "__main__":
+    unittest.main()
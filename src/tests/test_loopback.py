@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import time
+import unittest
+from communication import Communication
+from loopback import LoopbackBroker, LoopbackClient, topicMatches
+
+
+
+class TestLoopback(unittest.TestCase):
+
+
+    def setUp(self):
+        self.broker = LoopbackBroker()
+        self.mothership = LoopbackClient(self.broker)
+        self.mothership.connect()
+
+
+    def test_topic_matches(self):
+        """
+        This test should check the MQTT wildcards
+        """
+
+        self.assertTrue(topicMatches('explorer/113', 'explorer/113'))
+        self.assertTrue(topicMatches('planet/+/113', 'planet/Fassaden/113'))
+        self.assertTrue(topicMatches('planet/#', 'planet/Fassaden/113'))
+        self.assertFalse(topicMatches('planet/+', 'planet/Fassaden/113'))
+        self.assertFalse(topicMatches('explorer/113', 'explorer/114'))
+        self.assertFalse(topicMatches('explorer/113/+', 'explorer/113'))
+
+
+    def test_qos(self):
+        """
+        This test should check that QoS 1 messages wait for clients with a persistent session and QoS 0 messages don't
+
+        Result: Only the QoS 1 message arrives after reconnecting
+        """
+
+        received = []
+        client = LoopbackClient(self.broker, clean_session=False)
+        client.on_message = lambda client, data, message: received.append((message.payload, message.qos))
+        client.connect()
+        client.subscribe('explorer/113', qos=1)
+        client.disconnect()
+
+        self.mothership.publish('explorer/113', 'lost', qos=0)
+        self.mothership.publish('explorer/113', 'kept', qos=1)
+        client.connect()
+        client.loop(timeout=0)
+
+        self.assertEqual(received, [(b'kept', 1)])
+
+        client.subscribe('explorer/113', qos=0)
+        self.mothership.publish('explorer/113', 'downgraded', qos=1)
+        client.loop(timeout=0)
+        self.assertEqual(received[-1], (b'downgraded', 0))
+
+
+    def test_callback_errors(self):
+        """
+        This test should check that exceptions of on_message aren't swallowed
+
+        Result: loop(...) raises them, the background thread logs them, keeps them and handles the next message
+        """
+
+        received = []
+
+        def onMessage(client, data, message):
+            if message.payload == b'bad':
+                raise ValueError("bad message")
+            received.append(message.payload)
+
+        client = LoopbackClient(self.broker)
+        client.on_message = onMessage
+        client.connect()
+        client.subscribe('explorer/113')
+
+        self.mothership.publish('explorer/113', 'bad')
+        with self.assertRaises(ValueError):
+            client.loop(timeout=0)
+
+        client.loop_start()
+        with self.assertLogs('loopback', logging.ERROR):
+            self.mothership.publish('explorer/113', 'bad')
+            self.mothership.publish('explorer/113', 'good')
+
+            end = time.monotonic() + 3
+            while len(received) == 0 and time.monotonic() < end:
+                time.sleep(0.01)
+        client.loop_stop()
+
+        self.assertEqual(received, [b'good'])
+        self.assertEqual(len(client.errors), 2)
+
+
+    def test_throughput(self):
+        """
+        This test should check that a burst of pathUnveiled messages passes through Communication.on_message
+        on the network thread without losing any
+
+        Result: Every message drained once and in order, at least a few thousand messages per second
+        """
+
+        count = 10000
+        logger = logging.getLogger('RoboLab.loopback')
+        logger.setLevel(logging.WARNING)
+        client = LoopbackClient(self.broker)
+        communication = Communication(client, logger)
+
+        messages = [json.dumps({"from": "server", "type": "pathUnveiled", "payload": {
+            "startX": i, "startY": 0, "startDirection": 90, "endX": i + 1, "endY": 0, "endDirection": 270,
+            "pathStatus": "free", "pathWeight": 1}}) for i in range(count)]
+
+        begin = time.perf_counter()
+        for message in messages:
+            self.mothership.publish('explorer/113', message, qos=1)
+
+        drained = []
+        while len(drained) < count and time.perf_counter() - begin < 10:
+            communication.wait_for('pathUnveiled', 1)
+            drained.extend(communication.drain('pathUnveiled'))
+        elapsed = time.perf_counter() - begin
+        client.loop_stop()
+
+        self.assertEqual([message.startX for sequence, message in drained], list(range(count)))
+        self.assertGreater(count / elapsed, 2000)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+from mapstore import MapStore
+from planet import Direction, Planet
+
+
+
+class TestMapStore(unittest.TestCase):
+
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.tempdir.name)
+
+        # The layout of the robot: the code in src, the maps next to it
+        os.makedirs(os.path.join(self.root, "src"))
+        self.mainFile = os.path.join(self.root, "src", "main.py")
+        open(self.mainFile, 'w').close()
+
+        self.planet = Planet()
+        self.planet.add_path(((0, 0), Direction.NORTH), ((0, 1), Direction.SOUTH), 2)
+
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+
+    def test_main_directory(self):
+        """
+        This test should check a store built like main.py builds it, next to the src directory
+
+        Result: The maps are written to and read from <root>/maps, also with the path through main.py
+        """
+
+        store = MapStore(os.path.join(os.path.dirname(os.path.realpath(self.mainFile)), '..', 'maps'))
+        self.assertEqual(store.directory, os.path.join(self.root, "maps"))
+        self.assertIsNone(store.load("Fassaden"))
+
+        store.save("Fassaden", self.planet, [(0, 0)])
+        self.assertTrue(os.path.isfile(os.path.join(self.root, "maps", "Fassaden.json")))
+
+        throughFile = MapStore(os.path.realpath(self.mainFile) + '/../../maps')
+        self.assertEqual(throughFile.directory, store.directory)
+        self.assertEqual(throughFile.load("Fassaden").planet.paths, self.planet.paths)
+
+
+    def test_unreadable(self):
+        """
+        This test should check that maps which can't be read are ignored
+
+        Result: None for a directory in the place of the store, a directory in the place of a map and broken maps
+        """
+
+        self.assertIsNone(MapStore(os.path.join(self.mainFile, "maps")).load("Fassaden"))
+
+        store = MapStore(os.path.join(self.root, "maps"))
+        os.makedirs(store.filename("Directory"))
+        self.assertIsNone(store.load("Directory"))
+
+        for name, content in [("Truncated", '{"paths": [[0, 0'), ("NoPaths", '{"name": "NoPaths"}'),
+                              ("BadPath", '{"paths": [[0, 0, 45, 0, 1, 180, 2]]}'), ("List", '[]')]:
+            with open(store.filename(name), 'w') as file:
+                file.write(content)
+            self.assertIsNone(store.load(name), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+import threading
+import unittest
+from messagequeue import MessageQueue
+
+
+
+class TestMessageQueue(unittest.TestCase):
+
+
+    def setUp(self):
+        self.queue = MessageQueue(['pathUnveiled'])
+
+
+    def test_drain(self):
+        """
+        This test should check that messages are drained per type in order of arrival
+
+        Result: (sequence, message) tuples, sequence numbers count across all types
+        """
+
+        self.queue.put('pathUnveiled', [0, 0])
+        self.queue.put('target', [2, 3])
+        self.queue.put('pathUnveiled', [1, 1])
+
+        self.assertEqual(self.queue.pending('pathUnveiled'), 2)
+        self.assertEqual(self.queue.drain('pathUnveiled'), [(0, [0, 0]), (2, [1, 1])])
+        self.assertEqual(self.queue.drain('pathUnveiled'), [])
+        self.assertEqual(self.queue.drain('target'), [(1, [2, 3])])
+        self.assertEqual(self.queue.drain('done'), [])
+        self.assertEqual(self.queue.pending('done'), 0)
+
+
+    def test_concurrent_drain(self):
+        """
+        This test should check that no message is lost or drained twice while paho's thread keeps putting messages
+
+        Result: Every sequence number exactly once, in order
+        """
+
+        count = 100000
+        producer = threading.Thread(target=lambda: [self.queue.put('pathUnveiled', i) for i in range(count)])
+        drained = []
+
+        producer.start()
+        while producer.is_alive():
+            drained.extend(self.queue.drain('pathUnveiled'))
+
+        drained.extend(self.queue.drain('pathUnveiled'))
+        self.assertEqual([sequence for sequence, message in drained], list(range(count)))
+        self.assertEqual([message for sequence, message in drained], list(range(count)))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import json
+import unittest
+from messages import PathMsg, PlanetMsg, TargetMsg, decodeMessage, decodePayload
+
+
+
+class TestMessages(unittest.TestCase):
+
+
+    def test_decode(self):
+        """
+        This test should check that payloads are decoded by field name, whatever the order of the keys
+
+        Result: Records that can be unpacked like lists
+        """
+
+        message = json.dumps({"from": "server", "type": "path", "payload": {
+            "pathWeight": 3, "pathStatus": "free", "endDirection": 180, "endY": 1, "endX": 0,
+            "startDirection": 0, "startY": 0, "startX": 0}}).encode('utf-8')
+
+        path = decodePayload('path', decodeMessage(message)['payload'])
+        self.assertEqual(path, PathMsg(0, 0, 0, 0, 1, 180, 'free', 3))
+        self.assertEqual((path.endX, path.endY, path.pathWeight), (0, 1, 3))
+
+        name, x, y, orientation = decodePayload('planet', {"planetName": "Fassaden", "startX": 1, "startY": 2,
+                                                           "startOrientation": 90})
+        self.assertEqual((name, x, y, orientation), ("Fassaden", 1, 2, 90))
+        self.assertEqual(decodePayload('target', {"targetY": 3, "targetX": 2}), TargetMsg(2, 3))
+
+
+    def test_slots(self):
+        """
+        This test should check that records don't carry a __dict__
+        """
+
+        self.assertFalse(hasattr(PlanetMsg("Fassaden", 1, 2, 90), '__dict__'))
+
+        with self.assertRaises(KeyError):
+            decodePayload('target', {"targetX": 2})
+
+
+
+if __name__ == "__main__":
+    unittest.main()
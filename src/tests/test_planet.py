@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
-import unittest
-from planet import Direction, Planet
+import random
+import unittest.mock
+from planet import Direction, Planet, PriorityQueue
 
 
 
@@ -332,6 +333,252 @@ class TestRoboLabPlanet(unittest.TestCase):
         self.assertIsNone(shortestPath)
 
 
+    def test_loop_at_new_node(self):
+        """
+        This test should check that a path leaving and entering the same, previously unknown node is stored in both directions
+        """
+
+        self.planet.add_path(((9, 9), Direction.NORTH), ((9, 9), Direction.SOUTH), 2)
+        self.assertEqual(self.planet.get_paths()[(9, 9)], {
+            Direction.NORTH: ((9, 9), Direction.SOUTH, 2),
+            Direction.SOUTH: ((9, 9), Direction.NORTH, 2)
+        })
+
+
+    def test_cached_tree_invalidation(self):
+        """
+        This test should check that repeated queries from the same node are answered from the cached shortest
+        path tree and that the tree is dropped once a path it depends on is blocked or a shortcut is added
+
+        Result: Routes follow the changed planet
+        """
+
+        self.planet.shortest_path((2, 0), (0, 3))
+        self.assertIn((2, 0), self.planet.shortestPathTrees)
+
+        # Adding a path that is already known with the same weight changes nothing
+        self.planet.add_path(((0, 2), Direction.EAST ), ((2, 2), Direction.WEST ), 1)
+        self.assertIn((2, 0), self.planet.shortestPathTrees)
+
+        self.planet.updateWeight((1, 0), Direction.NORTH)
+        self.assertNotIn((2, 0), self.planet.shortestPathTrees)
+
+        shortestPath = self.planet.shortest_path((2, 0), (0, 3))
+        actualShortestPath = [
+                              ((2, 0), Direction.WEST ), ((1, 0), Direction.WEST ),
+                              ((0, 0), Direction.NORTH), ((0, 1), Direction.NORTH),
+                              ((0, 2), Direction.NORTH)
+                             ]
+        self.assertEqual(shortestPath, actualShortestPath)
+
+        self.planet.add_path(((2, 0), Direction.NORTH), ((0, 3), Direction.SOUTH), 2)
+        shortestPath = self.planet.shortest_path((2, 0), (0, 3))
+        self.assertEqual(shortestPath, [((2, 0), Direction.NORTH)])
+
+
+    def test_tree_cache_eviction(self):
+        """
+        This test should check that at most TREE_CACHE_SIZE shortest path trees are kept
+
+        Result: The least recently used tree is dropped, a tree that has just been used again is kept
+        """
+
+        with unittest.mock.patch.object(Planet, 'TREE_CACHE_SIZE', 2):
+            self.planet.shortest_path((2, 0), (0, 3))
+            self.planet.shortest_path((1, 0), (0, 3))
+            self.planet.shortest_path((2, 0), (0, 3))
+            self.planet.shortest_path((0, 0), (0, 3))
+
+        self.assertEqual(list(self.planet.shortestPathTrees), [(2, 0), (0, 0)])
+
+
+    def test_shortest_path_to_any(self):
+        """
+        This test should check that the closest reachable target is found with a single search
+
+        Result: Route to the cheapest target, None if no target is reachable
+        """
+
+        route, target = self.planet.shortest_path_to_any((2, 0), [(4, 5), (0, 3), (2, 0)])
+        self.assertEqual(target, (2, 0))
+        self.assertEqual(route, [])
+
+        route, target = self.planet.shortest_path_to_any((2, 0), [(4, 5), (0, 3), (7, 2)])
+        self.assertEqual(target, (0, 3))
+        self.assertEqual(route, [((2, 0), Direction.WEST), ((1, 0), Direction.NORTH), ((2, 2), Direction.NORTH)])
+
+        self.assertIsNone(self.planet_loop.shortest_path_to_any((4, -1), [(0, 2), (5, 5)]))
+        self.assertIsNone(self.planet_loop.shortest_path_to_any((4, -1), []))
+
+
+    def test_astar(self):
+        """
+        This test should check that the A* search mode finds the same shortest paths as Dijkstra's algorithm,
+        also with blocked paths and loops, and that it expands fewer nodes on a grid
+
+        Result: Same routes as in test_target, None if the target is not reachable
+        """
+
+        shortestPath = self.planet.shortest_path((2, 0), (4, 5), astar=True)
+        actualShortestPath = [
+                              ((2, 0), Direction.WEST), ((1, 0), Direction.NORTH), 
+                              ((2, 2), Direction.EAST), ((3, 2), Direction.EAST ), 
+                              ((4, 2), Direction.EAST), ((5, 2), Direction.NORTH)
+                             ]
+        self.assertEqual(shortestPath, actualShortestPath)
+
+        shortestPath = self.planet.shortest_path((7, 2), (5, 2), astar=True)
+        actualShortestPath = [
+                              ((7, 2), Direction.SOUTH), ((2, 0), Direction.WEST), 
+                              ((1, 0), Direction.NORTH), ((2, 2), Direction.EAST),
+                              ((3, 2), Direction.EAST ), ((4, 2), Direction.EAST)
+                             ]
+        self.assertEqual(shortestPath, actualShortestPath)
+
+        self.assertEqual(self.planet_loop.shortest_path((4, 1), (4, 1), astar=True), [])
+        self.assertIsNone(self.planet_loop.shortest_path((4, -1), (0, 2), astar=True))
+        self.assertIsNone(self.planet_not_reachable.shortest_path((0, 0), (0, 3), astar=True))
+
+        grid = Planet()
+        for x in range(20):
+            for y in range(20):
+                grid.add_path(((x, y), Direction.EAST ), ((x + 1, y), Direction.WEST ), 2)
+                grid.add_path(((x, y), Direction.NORTH), ((x, y + 1), Direction.SOUTH), 2)
+
+        grid.shortest_path((0, 0), (5, 5))
+        dijkstraExpansions = grid.expansions
+        grid.shortest_path((0, 0), (5, 5), astar=True)
+        self.assertLess(grid.expansions - dijkstraExpansions, dijkstraExpansions)
+
+
+    def test_long_route(self):
+        """
+        This test should check that routes much longer than the recursion limit are found and that a
+        nearby target is found without searching the whole planet
+
+        Result: Route over all 5000 paths, few expansions for the neighbour
+        """
+
+        line = Planet()
+        for x in range(5000):
+            line.add_path(((x, 0), Direction.EAST), ((x + 1, 0), Direction.WEST), 1)
+
+        shortestPath = line.shortest_path((0, 0), (5000, 0))
+        self.assertEqual(len(shortestPath), 5000)
+        self.assertEqual(shortestPath[-1], ((4999, 0), Direction.EAST))
+
+        line.expansions = 0
+        self.assertEqual(line.shortest_path((2500, 0), (2501, 0)), [((2500, 0), Direction.EAST)])
+        self.assertLess(line.expansions, 5)
+
+
+    def test_cached_tree_matches_new_search(self):
+        """
+        This test should check that routes from partially grown and repaired cached trees are as long as
+        the ones found by a new search while paths are added and blocked
+
+        Result: Same route lengths for every seed
+        """
+
+        nodes = [(x, y) for x in range(6) for y in range(6)]
+        length = lambda planet, route: None if route is None else sum(planet.paths[node][direction][2] for node, direction in route)
+
+        for seed in range(200):
+            with self.subTest(seed=seed):
+
+                rng = random.Random(seed)
+                planet = Planet()
+
+                for i in range(100):
+
+                    start, target = rng.choice(nodes), rng.choice(nodes)
+                    planet.add_path((start, rng.choice(list(Direction))), (target, rng.choice(list(Direction))), rng.randint(-1, 9) or 1)
+
+                    if rng.random() < 0.2:
+                        planet.updateWeight(start, rng.choice(list(Direction)))
+
+                    fresh = Planet()
+                    fresh.paths = planet.paths
+
+                    for j in range(3):
+                        start, target = rng.choice(nodes), rng.choice(nodes)
+                        self.assertEqual(length(planet, planet.shortest_path(start, target)),
+                                         length(fresh, fresh.shortest_path(start, target)))
+
+
+    def test_cached_tree_frontier_shortcut(self):
+        """
+        This test should check a partially grown tree after a cheap path from a settled node into its queue
+        that shortens the route to a node settled already
+
+        Result: The new shorter route to the settled node
+        """
+
+        planet = Planet()
+        planet.add_path(((0, 0), Direction.EAST), ((1, 0), Direction.WEST), 1)
+        planet.add_path(((1, 0), Direction.EAST), ((2, 0), Direction.WEST), 10)
+        planet.add_path(((0, 0), Direction.NORTH), ((0, 1), Direction.SOUTH), 20)
+        planet.add_path(((0, 1), Direction.EAST), ((2, 0), Direction.NORTH), 1)
+
+        # Settles (0, 0), (1, 0) and (2, 0), (0, 1) is still in the queue at distance 20
+        self.assertEqual(planet.shortest_path((0, 0), (2, 0)), [((0, 0), Direction.EAST), ((1, 0), Direction.EAST)])
+
+        planet.add_path(((1, 0), Direction.NORTH), ((0, 1), Direction.WEST), 1)
+
+        self.assertEqual(planet.shortest_path((0, 0), (2, 0)),
+                         [((0, 0), Direction.EAST), ((1, 0), Direction.NORTH), ((0, 1), Direction.EAST)])
+
+
+class TestPriorityQueue(unittest.TestCase):
+
+
+    def test_pop_order(self):
+        """
+        This test should check that items are popped in order of their priority
+        """
+
+        queue = PriorityQueue()
+        for item, priority in [("a", 5), ("b", 1), ("c", 4), ("d", 2), ("e", 3)]:
+            queue.push(item, priority)
+
+        self.assertEqual([queue.pop() for i in range(5)], ["b", "d", "e", "c", "a"])
+        self.assertTrue(queue.empty())
+
+
+    def test_update(self):
+        """
+        This test should check that membership follows pushes and pops and that update(...) reorders the queue
+        """
+
+        queue = PriorityQueue()
+        for item, priority in [((0, 0), 7), ((1, 0), 3), ((2, 0), 9)]:
+            queue.push(item, priority)
+
+        self.assertIn((2, 0), queue)
+        queue.update((2, 0), 9, 1)
+        queue.update((1, 0), 3, 8)
+
+        self.assertEqual(queue.pop(), (2, 0))
+        self.assertNotIn((2, 0), queue)
+        self.assertEqual(queue.pop(), (0, 0))
+        self.assertEqual(queue.pop(), (1, 0))
+
+
+    def test_remove(self):
+        """
+        This test should check that removing an item keeps the remaining items in order
+        """
+
+        queue = PriorityQueue()
+        for priority in [5, 3, 8, 1, 9, 2, 7]:
+            queue.push(priority, priority)
+
+        queue.remove(1)
+        queue.remove(9)
+        self.assertNotIn(1, queue)
+        self.assertEqual([queue.pop() for i in range(5)], [2, 3, 5, 7, 8])
+
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
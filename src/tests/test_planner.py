@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+
+import random
+import unittest
+from planet import Direction, Planet
+from planner import Planner
+
+
+
+class TestPlanner(unittest.TestCase):
+
+
+    def setUp(self):
+        """
+        Instantiates a planet with a blocked-off short cut
+
+          0,2-----1,2-----2,2
+           |       |       |
+          0,1-----1,1-----2,1
+           |       |       |
+          0,0-----1,0-----2,0
+
+        """
+
+        self.planet = Planet()
+
+        for x in range(3):
+            for y in range(3):
+                if x < 2:
+                    self.planet.add_path(((x, y), Direction.EAST ), ((x + 1, y), Direction.WEST ), 1)
+                if y < 2:
+                    self.planet.add_path(((x, y), Direction.NORTH), ((x, y + 1), Direction.SOUTH), 1)
+
+        self.length = lambda route: None if route is None else sum(self.planet.paths[node][direction][2] for node, direction in route)
+
+
+    def test_route(self):
+        """
+        This test should check that the planner finds shortest routes and repairs them after paths are blocked
+
+        Result: Routes as long as the ones found by Planet.shortest_path(...)
+        """
+
+        planner = Planner(self.planet, (2, 2))
+        self.assertEqual(self.length(planner.route((0, 0))), 4)
+        self.assertEqual(planner.route((2, 2)), [])
+
+        self.planet.updateWeight((2, 1), Direction.NORTH)
+        self.planet.updateWeight((1, 2), Direction.EAST)
+        self.assertIsNone(planner.route((0, 0)))
+
+        self.planet.add_path(((0, 2), Direction.NORTH), ((2, 2), Direction.NORTH), 3)
+        self.assertEqual(self.length(planner.route((1, 1))), 5)
+
+        planner.detach()
+        self.assertEqual(self.planet.listeners, [])
+
+
+    def test_unknown_target(self):
+        """
+        This test should check that a target that isn't on the map yet becomes reachable once it is discovered
+        """
+
+        planner = Planner(self.planet, (3, 2))
+        self.assertIsNone(planner.route((0, 0)))
+
+        self.planet.add_path(((2, 2), Direction.EAST), ((3, 2), Direction.WEST), 2)
+        self.assertEqual(self.length(planner.route((0, 1))), 5)
+
+
+    def test_matches_new_search(self):
+        """
+        This test should check that routes stay as long as the ones found by a new search while the robot
+        moves and paths are added and blocked
+
+        Result: Same route lengths
+        """
+
+        rng = random.Random(113)
+        nodes = [(x, y) for x in range(5) for y in range(5)]
+        planner = Planner(self.planet, (4, 4))
+
+        for i in range(300):
+
+            start, target = rng.choice(nodes), rng.choice(nodes)
+            self.planet.add_path((start, rng.choice(list(Direction))), (target, rng.choice(list(Direction))), rng.randint(1, 9))
+
+            if rng.random() < 0.3:
+                self.planet.updateWeight(rng.choice(nodes), rng.choice(list(Direction)))
+
+            fresh = Planet()
+            fresh.paths = self.planet.paths
+
+            start = rng.choice(nodes)
+            self.assertEqual(self.length(planner.route(start)), self.length(fresh.shortest_path(start, (4, 4))))
+
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import time
+import unittest
+from communication import Communication
+from loopback import LoopbackBroker, LoopbackClient
+from replay import Replay, parseLog
+from simulator import Mothership, Simulator, generatePlanet
+
+
+
+class CaptureClient(LoopbackClient):
+    """
+    Keeps everything that is published instead of sending it
+    """
+
+    def __init__(self):
+        super().__init__(LoopbackBroker())
+        self.published = []
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        self.published.append((topic, payload))
+
+
+
+class RecordingMothership(Mothership):
+    """
+    Writes the session to a log in the format of logs/project.log, like Communication would
+    """
+
+    def __init__(self, planet):
+        super().__init__(planet, unveilProbability=0.2)
+        self.lines = []
+        self.clock = time.mktime((2020, 3, 9, 10, 0, 0, 0, 0, -1))
+        self.loggedSequence = -1
+
+        # Builds the messages of the robot exactly like they are sent
+        self.client = CaptureClient()
+        self.encoder = Communication(self.client, logging.getLogger('RoboLab.test'))
+
+    def record(self, text):
+        self.clock += 0.25
+        self.lines.extend((time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.clock)) + ',%03d: ' %
+                           int(self.clock % 1 * 1000) + text + '\n').splitlines(True))
+
+    def sent(self, method, *arguments):
+        getattr(self.encoder, method)(*arguments)
+        topic, payload = self.client.published.pop()
+        self.record('Send to: ' + topic)
+        self.record(json.dumps(json.loads(payload), indent=2))
+
+        # The robot is subscribed to its own topics and gets its messages back
+        self.record(json.dumps(json.loads(payload), indent=2))
+
+    def received(self, messageType, payload):
+        self.record(json.dumps({"from": "server", "type": messageType, "payload": payload}, indent=2))
+
+    def receivedInbox(self):
+        queued = [(sequence, messageType, message) for messageType, queue in self.inbox.queues.items()
+                  for sequence, message in queue if sequence > self.loggedSequence]
+
+        for sequence, messageType, message in sorted(queued, key=lambda entry: entry[0]):
+            self.received(messageType, dict(message._asdict()))
+            self.loggedSequence = sequence
+
+    def sendReady(self):
+        self.sent('sendReady')
+        super().sendReady()
+        self.received('planet', dict(self.planetMessage._asdict()))
+        self.receivedInbox()
+
+    def sendDiscoveredPath(self, *arguments):
+        self.sent('sendDiscoveredPath', *arguments)
+        super().sendDiscoveredPath(*arguments)
+        self.received('path', dict(self.pathMessage._asdict()))
+        self.receivedInbox()
+
+    def sendPathSelected(self, *arguments):
+        self.sent('sendPathSelected', *arguments)
+        super().sendPathSelected(*arguments)
+
+    def explorationCompleted(self):
+        self.sent('explorationCompleted')
+        super().explorationCompleted()
+
+    def targetReached(self):
+        self.sent('targetReached')
+        super().targetReached()
+
+
+
+class TestReplay(unittest.TestCase):
+
+
+    def record(self, seed):
+        """
+        Explores a generated planet and returns the simulator and the log of the session
+        """
+
+        planet = generatePlanet(6, 6, seed)
+        mothership = RecordingMothership(planet)
+        simulator = Simulator(planet, mothership=mothership)
+        simulator.run()
+        return simulator, mothership.lines
+
+
+    def test_replay(self):
+        """
+        This test should check that replaying a recorded session makes the same decisions
+
+        Result: No divergence, the same map and one decision per selected path
+        """
+
+        for seed in range(10):
+            simulator, lines = self.record(seed)
+            sessions = parseLog(['2020-03-09 09:59:00,000: Some other record\n'] + lines)
+            self.assertEqual(len(sessions), 1)
+
+            replay = Replay(sessions[0])
+            decisions = replay.run()
+
+            self.assertIsNone(replay.divergence)
+            self.assertEqual(replay.explorer.planet.paths, simulator.explorer.planet.paths)
+            self.assertEqual(sum(decision.method == 'getNextDirection' for decision in decisions),
+                             sum('"pathSelect"' in line for line in lines) // 2 + 1)
+            self.assertTrue(all(decision.cpuSeconds >= 0 for decision in decisions))
+
+
+    def test_divergence(self):
+        """
+        This test should check that the replay stops where the explorer decides differently than recorded
+
+        Result: The divergence is reported at the decision that caused it
+        """
+
+        simulator, lines = self.record(3)
+        sessions = parseLog(lines + lines)
+        self.assertEqual(len(sessions), 2)
+
+        # Make the robot choose another path at the first node
+        records = sessions[1]
+        selected = [record for record in records if record.sent and record.message['type'] == 'pathSelect'][0]
+        selected.message['payload']['startDirection'] = (selected.message['payload']['startDirection'] + 90) % 360
+
+        replay = Replay(records)
+        decisions = replay.run()
+
+        self.assertIsNotNone(replay.divergence)
+        self.assertEqual(decisions[-1].method, 'getNextDirection')
+        self.assertEqual(decisions[-1].divergence, replay.divergence)
+
+
+
+if __name__ == "__main__":
+    unittest.main()
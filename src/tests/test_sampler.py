@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+import unittest
+from sampler import BackgroundSampler
+
+
+
+class TestBackgroundSampler(unittest.TestCase):
+
+
+    def setUp(self):
+        self.values = iter(range(1000000))
+        self.sampler = BackgroundSampler(lambda: next(self.values), 0.005)
+
+
+    def tearDown(self):
+        self.sampler.stop()
+
+
+    def waitFor(self, condition, timeout=5):
+        end = time.monotonic() + timeout
+        while not condition() and time.monotonic() < end:
+            time.sleep(0.001)
+        self.assertTrue(condition())
+
+
+    def test_latest(self):
+        """
+        This test should check that the sampler publishes its reads with a timestamp
+
+        Result: No value and an infinite age before the first read, then increasing values with recent timestamps
+        """
+
+        self.assertEqual(self.sampler.latest, (None, None))
+        self.assertEqual(self.sampler.age(), float('inf'))
+
+        self.sampler.start()
+        self.waitFor(lambda: self.sampler.reads >= 3)
+
+        value, timestamp = self.sampler.latest
+        self.assertGreaterEqual(value, 2)
+        self.assertLessEqual(timestamp, time.monotonic())
+        self.assertLess(self.sampler.age(), 1)
+
+        self.waitFor(lambda: self.sampler.latest[0] > value)
+
+
+    def test_stale(self):
+        """
+        This test should check that a read that blocks or fails makes the latest value older
+
+        Result: The age grows while the read blocks, the value stays, failed reads are counted
+        """
+
+        release = threading.Event()
+        failing = [False]
+
+        def read():
+            release.wait()
+            if failing[0]:
+                raise OSError("sensor unplugged")
+            return 42
+
+        self.sampler = BackgroundSampler(read, 0.001)
+        release.set()
+        self.sampler.start()
+        self.waitFor(lambda: self.sampler.latest[0] == 42)
+
+        release.clear()
+        time.sleep(0.05)
+        self.assertGreaterEqual(self.sampler.age(), 0.04)
+
+        failing[0] = True
+        release.set()
+        self.waitFor(lambda: self.sampler.errors >= 3)
+        self.assertEqual(self.sampler.latest[0], 42)
+        self.assertGreaterEqual(self.sampler.age(), 0.04)
+
+
+    def test_stop(self):
+        """
+        This test should check that stop() ends the thread and that the sampler can be started again
+
+        Result: No reads after stop(), reads again after start()
+        """
+
+        self.sampler.start()
+        self.waitFor(lambda: self.sampler.reads > 0)
+        self.sampler.stop()
+        self.assertFalse(self.sampler.running)
+
+        reads = self.sampler.reads
+        time.sleep(0.02)
+        self.assertEqual(self.sampler.reads, reads)
+
+        self.sampler.start()
+        self.waitFor(lambda: self.sampler.reads > reads)
+
+
+if __name__ == "__main__":
+    unittest.main()
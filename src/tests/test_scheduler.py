@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import unittest
+from scheduler import LoopScheduler
+
+
+
+class FakeClock:
+    """
+    Time that only passes by sleeping or by work() of the loop under test
+    """
+
+    def __init__(self):
+        self.now = 100.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def work(self, seconds):
+        self.now += seconds
+
+
+
+class TestLoopScheduler(unittest.TestCase):
+
+
+    def setUp(self):
+        self.time = FakeClock()
+        self.loop = LoopScheduler(50, binWidth=0.003, bins=10, clock=self.time.clock, sleep=self.time.sleep)
+
+
+    def test_fixed_rate(self):
+        """
+        This test should check that iterations shorter than the period start on a fixed schedule
+
+        Result: Every tick 20 ms after the previous one, no overruns
+        """
+
+        self.loop.start()
+        ticks = []
+
+        for workTime in [0.002, 0.015, 0.008, 0.019, 0.001]:
+            ticks.append(self.loop.tick())
+            self.time.work(workTime)
+
+        for previous, tick in zip(ticks, ticks[1:]):
+            self.assertAlmostEqual(tick - previous, 0.020)
+
+        self.assertEqual(self.loop.iterations, 4)
+        self.assertEqual(self.loop.overruns, 0)
+        self.assertAlmostEqual(self.loop.maxJitter, 0.0)
+
+
+    def test_overrun(self):
+        """
+        This test should check that an iteration longer than the period is counted and not caught up
+
+        Result: The next iteration starts right away, the one after it a full period later
+        """
+
+        self.loop.start()
+        self.loop.tick()
+        self.time.work(0.032)
+
+        late = self.loop.tick()
+        self.assertEqual(self.loop.overruns, 1)
+        self.assertAlmostEqual(self.loop.maxJitter, 0.012)
+
+        self.time.work(0.005)
+        self.assertAlmostEqual(self.loop.tick() - late, 0.020)
+        self.assertEqual(self.loop.overruns, 1)
+
+
+    def test_histogram(self):
+        """
+        This test should check the histogram of loop times and that start() keeps the measurements
+
+        Result: Loop times of 20 ms in the 18-21 ms bin, longer ones than the last bin in the last bin
+        """
+
+        self.loop.start()
+        self.loop.tick()
+        self.time.work(0.010)
+        self.loop.tick()
+        self.time.work(0.070)
+        self.loop.tick()
+
+        # A pause, like on a node, doesn't count as a loop time
+        self.time.work(5)
+        self.loop.start()
+        self.loop.tick()
+        self.time.work(0.001)
+        self.loop.tick()
+
+        histogram = dict((round(lowerBound, 3), iterations) for lowerBound, iterations in self.loop.histogram())
+        self.assertEqual(histogram[0.018], 2)
+        self.assertEqual(histogram[0.027], 1)
+        self.assertEqual(sum(histogram.values()), 3)
+        self.assertAlmostEqual(self.loop.maxLoopTime, 0.070)
+        self.assertIn("3 iterations, 1 overruns", self.loop.summary())
+
+        self.loop.reset()
+        self.assertEqual(sum(iterations for lowerBound, iterations in self.loop.histogram()), 0)
+        self.assertIn("no iterations", self.loop.summary())
+
+
+if __name__ == "__main__":
+    unittest.main()
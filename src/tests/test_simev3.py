@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+
+import contextlib
+import io
+import math
+import unittest
+from odometry import Odometry
+from planet import Direction
+from sensor import brightness
+from simev3 import DISTANCE_PER_TICK, GRID, MAX_DISTANCE, WHEEL_GAUGE, \
+    RasterPlanet, SimulatedEV3, SimulationTimeout, simulate
+from simulator import SimulatedPlanet
+
+
+
+def makePlanet(name, start, startOrientation, paths):
+    """
+    Builds a SimulatedPlanet from (node, direction, endNode, endDirection, weight) tuples
+    """
+
+    planet = SimulatedPlanet(name, start, startOrientation)
+    for node, direction, endNode, endDirection, weight in paths:
+        planet.add_path((node, direction), (endNode, endDirection), weight)
+
+    return planet
+
+
+
+class TestSimulatedEV3(unittest.TestCase):
+
+
+    def setUp(self):
+        # A line from (0, 0) to the east with an obstacle in the middle of its second part
+        self.planet = makePlanet("line", (0, 0), Direction.EAST, [
+            ((0, 0), Direction.EAST, (1, 0), Direction.WEST, 1),
+            ((1, 0), Direction.EAST, (3, 0), Direction.WEST, -1)])
+        # Accessing the devices takes no time, so the robot moves exactly as long as it sleeps
+        self.ev3 = SimulatedEV3(self.planet, accessTime=0)
+        self.lm = self.ev3.largeMotor("outA")
+        self.rm = self.ev3.largeMotor("outD")
+
+
+    def drive(self, lmSpeed, rmSpeed, seconds):
+        for motor, speed in [(self.lm, lmSpeed), (self.rm, rmSpeed)]:
+            motor.speed_sp = speed
+            motor.command = "run-forever"
+
+        self.ev3.sleep(seconds)
+        self.lm.stop()
+        self.rm.stop()
+
+
+    def test_straight(self):
+        """
+        This test should check that negative speeds drive forward and that odometry agrees with the simulated robot
+
+        Result: 2 s at 300 ticks per second move the robot 600 ticks to the east, odometry computes the same position
+        """
+
+        x, y, heading = self.ev3.x, self.ev3.y, self.ev3.heading
+        self.drive(-300, -300, 2)
+
+        self.assertEqual((self.lm.position, self.rm.position), (-600, -600))
+        self.assertAlmostEqual(self.ev3.x - x, 600 * DISTANCE_PER_TICK)
+        self.assertAlmostEqual(self.ev3.y, y)
+        self.assertAlmostEqual(self.ev3.heading, heading)
+
+        # Odometry starts at node (0, 0)
+        odometry = Odometry()
+        odometry.getFromDriving(0, 0, Direction.EAST)
+        odometry.calcPosition(self.lm.position, self.rm.position)
+        self.assertAlmostEqual(odometry.x, self.ev3.x - x, places=3)
+        self.assertAlmostEqual(odometry.y, self.ev3.y - y, places=3)
+
+
+    def test_turn(self):
+        """
+        This test should check turning on the spot like driving.turnToPath
+
+        Result: run(100, -100) turns counterclockwise, the robot doesn't leave its place and odometry agrees
+        """
+
+        x, y, heading = self.ev3.x, self.ev3.y, self.ev3.heading
+        # A quarter turn on the spot moves each wheel along an eighth of the circle with diameter WHEEL_GAUGE
+        ticks = WHEEL_GAUGE * math.pi / 4 / DISTANCE_PER_TICK
+        self.drive(100, -100, ticks / 100)
+
+        self.assertAlmostEqual(self.ev3.heading, heading - math.pi / 2, places=2)
+        self.assertAlmostEqual(self.ev3.x, x)
+        self.assertAlmostEqual(self.ev3.y, y)
+
+        odometry = Odometry()
+        odometry.getFromDriving(0, 0, Direction.EAST)
+        odometry.calcPosition(self.lm.position, self.rm.position)
+        self.assertAlmostEqual(odometry.gamma, self.ev3.heading, places=2)
+
+
+    def test_colors(self):
+        """
+        This test should check what the color sensor reads on the raster of the planet
+
+        Result: The sensor starts on the edge of the line, nodes are blue if x + y is even and red otherwise
+        """
+
+        sensor = self.ev3.colorSensor()
+        raster = self.ev3.raster
+
+        self.assertLess(brightness(*raster.color(-GRID / 2, 0)), 100)
+        self.assertGreater(brightness(*raster.color(-GRID / 2, 10)), 400)
+        self.assertEqual(raster.color(0, 0), (49, 180, 93))
+        self.assertEqual(raster.color(GRID, 0), (159, 61, 13))
+
+        # Half black and half white at the start
+        self.assertTrue(100 < brightness(*sensor.bin_data("hhh")) < 400)
+
+
+    def test_ultrasonic(self):
+        """
+        This test should check the distance to obstacles
+
+        Result: The distance to the obstacle in the middle of the blocked path, nothing behind the robot
+        """
+
+        sensor = self.ev3.ultrasonicSensor()
+        sensorX = self.ev3.sensorPosition()[0]
+
+        self.assertAlmostEqual(sensor.distance_centimeters, 2 * GRID - 2.5 - sensorX, delta=0.5)
+        self.assertEqual(self.ev3.raster.distance(sensorX, 0, -math.pi / 2), MAX_DISTANCE)
+
+
+    def test_time(self):
+        """
+        This test should check that time only passes for device accesses and sleeps
+
+        Result: The clock advances by accessTime per access, the sampler reads in simulated time, the time limit raises
+        """
+
+        ev3 = SimulatedEV3(self.planet, accessTime=0.01, timeLimit=1)
+        motor = ev3.largeMotor("outA")
+        sampler = ev3.sampler(lambda: motor.position, 0.1)
+
+        self.assertEqual(sampler.age(), float('inf'))
+        sampler.start()
+        self.assertEqual(sampler.latest, (0, 0.01))
+        self.assertEqual(ev3.clock(), 0.01)
+
+        ev3.sleep(0.05)
+        self.assertAlmostEqual(sampler.age(), 0.05)
+        self.assertEqual(sampler.reads, 1)
+
+        ev3.sleep(0.05)
+        self.assertEqual(sampler.latest[0], 0)
+        self.assertEqual(sampler.reads, 2)
+
+        with self.assertRaises(SimulationTimeout):
+            ev3.sleep(1)
+
+
+    def test_straight_paths_only(self):
+        """
+        This test should check that paths which aren't straight lines are refused
+
+        Result: ValueError for a path that leaves to the north and arrives from the east
+        """
+
+        planet = makePlanet("bent", (0, 0), Direction.NORTH, [((0, 0), Direction.NORTH, (1, 1), Direction.WEST, 1)])
+
+        with self.assertRaises(ValueError):
+            RasterPlanet(planet)
+
+
+
+class TestSimulatedExploration(unittest.TestCase):
+
+
+    def explore(self, planet):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return simulate(planet, timeLimit=600)
+
+
+    def test_exploration(self):
+        """
+        This test should check that driving.Driving explores a planet on the simulated robot
+
+        Result: Exploration completed without missing paths, faster than on the robot
+        """
+
+        planet = makePlanet("tee", (0, 0), Direction.NORTH, [
+            ((0, 0), Direction.NORTH, (0, 1), Direction.SOUTH, 1),
+            ((0, 1), Direction.EAST, (1, 1), Direction.WEST, 2),
+            ((0, 1), Direction.WEST, (-1, 1), Direction.EAST, 1),
+            ((0, 1), Direction.NORTH, (0, 2), Direction.SOUTH, 3)])
+
+        result, ev3 = self.explore(planet)
+
+        self.assertEqual(result.result, "explorationCompleted")
+        self.assertEqual(result.missingPaths, set())
+        self.assertEqual(result.obstacles, 0)
+        self.assertGreater(ev3.now, 30)
+
+
+    def test_obstacle(self):
+        """
+        This test should check that driving.Driving turns around at an obstacle on the simulated robot
+
+        Result: One obstacle, exploration completed without missing paths
+        """
+
+        planet = makePlanet("blocked", (0, 0), Direction.EAST, [
+            ((0, 0), Direction.EAST, (1, 0), Direction.WEST, 1),
+            ((1, 0), Direction.EAST, (3, 0), Direction.WEST, -1),
+            ((1, 0), Direction.NORTH, (1, 1), Direction.SOUTH, 1)])
+
+        result, ev3 = self.explore(planet)
+
+        self.assertEqual(result.result, "explorationCompleted")
+        self.assertEqual(result.missingPaths, set())
+        self.assertEqual(result.obstacles, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
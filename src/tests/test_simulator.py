@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+import unittest
+from concurrent.futures import Future
+from explorer import Explorer
+from mapstore import MapStore
+from planet import Direction
+from simulator import Mothership, SimulatedPlanet, Simulator, generatePlanet
+
+
+
+class DelayedMothership(Mothership):
+    """
+    Answers reported paths only when the robot selects its next path and
+    makes every known path it is told about one heavier
+    """
+
+    def __init__(self, planet: SimulatedPlanet):
+        super().__init__(planet)
+        self.pendingAnswers = []
+        self.pathWaits = 0
+        self.changedPaths = set()
+        self.answeredPaths = set()
+
+    def wait_for(self, messageType, timeout):
+        self.pathWaits += messageType == 'path'
+        return super().wait_for(messageType, timeout)
+
+    def reportPath(self, startX, startY, startDirection, endX, endY, endDirection, status):
+        start = (startX, startY), Direction(startDirection)
+        endNode, endDirection, weight = self.planet.paths[start]
+
+        if start not in self.changedPaths:
+            self.changedPaths.update([start, (endNode, endDirection)])
+            self.planet.add_path(start, (endNode, endDirection), weight + 1)
+
+        self.sendDiscoveredPath(startX, startY, startDirection, endX, endY, endDirection, status)
+        future = Future()
+        self.pendingAnswers.append((future, self.pathMessage))
+        return future
+
+    def sendPathSelected(self, startX, startY, startDirection):
+        for future, pathMessage in self.pendingAnswers:
+            future.set_result(pathMessage)
+            self.answeredPaths.add(((pathMessage.startX, pathMessage.startY), Direction(pathMessage.startDirection)))
+        self.pendingAnswers = []
+
+
+
+class SilentMothership(Mothership):
+    """
+    Loses the answer of every third path sent with sendDiscoveredPath(...), the answer arrives
+    late through deferPath() if answerLate is set and never otherwise
+    """
+
+    def __init__(self, planet: SimulatedPlanet, answerLate: bool = True):
+        super().__init__(planet)
+        self.answerLate = answerLate
+        self.sentPaths = []
+        self.lostAnswer = None
+        self.lostPaths = set()
+
+    def sendDiscoveredPath(self, startX, startY, startDirection, endX, endY, endDirection, status):
+        super().sendDiscoveredPath(startX, startY, startDirection, endX, endY, endDirection, status)
+        self.sentPaths.append(((startX, startY), Direction(startDirection)))
+
+        if len(self.sentPaths) % 3 == 0:
+            self.lostAnswer, self.pathMessage = self.pathMessage, None
+            self.lostPaths.add(self.sentPaths[-1])
+
+    def reportPath(self, startX, startY, startDirection, endX, endY, endDirection, status):
+        self.sentPaths.append(((startX, startY), Direction(startDirection)))
+        Mothership.sendDiscoveredPath(self, startX, startY, startDirection, endX, endY, endDirection, status)
+        future = Future()
+        future.set_result(self.pathMessage)
+        return future
+
+    def deferPath(self):
+        future = Future()
+        if self.answerLate:
+            future.set_result(self.lostAnswer)
+        return future
+
+
+
+class TestSimulator(unittest.TestCase):
+
+
+    def test_exploration(self):
+        """
+        This test should check that the explorer discovers every reachable path of generated planets
+        with blocked paths, loops and unveiled paths
+
+        Result: Exploration completed without missing paths
+        """
+
+        for seed in range(50):
+            planet = generatePlanet(6, 6, seed)
+            result = Simulator(planet, mothership=Mothership(planet, unveilProbability=0.3, seed=seed)).run()
+
+            self.assertEqual(result.result, "explorationCompleted")
+            self.assertEqual(result.missingPaths, set())
+
+
+    def test_target(self):
+        """
+        This test should check that a target that is sent later during the exploration is reached
+        """
+
+        for seed in range(50):
+            planet = generatePlanet(6, 6, seed, withTarget=True)
+            result = Simulator(planet, mothership=Mothership(planet, targetAfter=3)).run()
+
+            self.assertIn(result.result, ["targetReached", "explorationCompleted"])
+            if result.result == "explorationCompleted":
+                self.assertNotIn(planet.target, set(node for node, direction in planet.reachablePaths()))
+
+
+    def test_pipelined_reports(self):
+        """
+        This test should check that known paths are reported without waiting for the answer and that corrected
+        answers are applied later
+
+        Result: Exploration completed with the corrected weights, fewer waits than path messages
+        """
+
+        for seed in range(20):
+            planet = generatePlanet(6, 6, seed, blocked=0.0)
+            mothership = DelayedMothership(planet)
+            simulator = Simulator(planet, mothership=mothership)
+            result = simulator.run()
+
+            self.assertEqual(result.result, "explorationCompleted")
+            self.assertEqual(result.missingPaths, set())
+            self.assertLess(mothership.pathWaits, mothership.pathMessages)
+            self.assertGreater(len(mothership.changedPaths & mothership.answeredPaths), 0)
+
+            for start in mothership.changedPaths & mothership.answeredPaths:
+                node, direction = start
+                self.assertEqual(simulator.explorer.planet.paths[node][direction], planet.paths[start])
+
+
+    def test_path_timeout(self):
+        """
+        This test should check that the explorer goes on with its own estimate if the answer for a path doesn't arrive
+
+        Result: Exploration completed with the weights of the planet once the late answers arrived,
+        no path has been sent twice in a row
+        """
+
+        for seed in range(20):
+            planet = generatePlanet(6, 6, seed)
+            mothership = SilentMothership(planet)
+            simulator = Simulator(planet, mothership=mothership)
+            result = simulator.run()
+
+            self.assertEqual(result.result, "explorationCompleted")
+            self.assertEqual(result.missingPaths, set())
+            self.assertGreater(len(mothership.lostPaths), 0)
+            self.assertEqual(simulator.explorer.unconfirmedPaths, set())
+
+            for previous, path in zip(mothership.sentPaths, mothership.sentPaths[1:]):
+                self.assertNotEqual(previous, path)
+
+            # The mothership answers blocked paths as leading back to their start
+            for node, direction in planet.reachablePaths():
+                endNode, endDirection, weight = simulator.explorer.planet.paths[node][direction]
+                if weight > 0:
+                    self.assertEqual((endNode, endDirection, weight), planet.paths[(node, direction)])
+                else:
+                    self.assertEqual(weight, planet.paths[(node, direction)][2])
+
+
+    def test_path_timeout_unanswered(self):
+        """
+        This test should check that estimates for paths that are never answered are not saved as known paths
+
+        Result: The saved map has the unanswered free paths as paths to be driven instead of known
+        paths, a second run completes the map with the weights of the planet
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = MapStore(directory)
+
+            for seed in range(10):
+                planet = generatePlanet(6, 6, seed)
+                mothership = SilentMothership(planet, answerLate=False)
+                explorer = Explorer(mothership, mapStore=store)
+                result = Simulator(planet, explorer, mothership).run()
+
+                self.assertEqual(result.result, "explorationCompleted")
+                self.assertGreater(len(explorer.unconfirmedPaths), 0)
+
+                storedMap = store.load(planet.name)
+                for node, direction in explorer.unconfirmedPaths:
+                    self.assertNotIn(direction, storedMap.planet.paths.get(node, dict()))
+                    self.assertIn((node, direction), storedMap.frontier)
+
+                mothership = Mothership(planet)
+                explorer = Explorer(mothership, mapStore=store)
+                result = Simulator(planet, explorer, mothership).run()
+
+                self.assertEqual(result.result, "explorationCompleted")
+                self.assertEqual(result.missingPaths, set())
+                for node, direction in planet.reachablePaths():
+                    if planet.paths[(node, direction)][2] > 0:
+                        self.assertEqual(explorer.planet.paths[node][direction], planet.paths[(node, direction)])
+
+
+    def test_warm_start(self):
+        """
+        This test should check that a second run on the same planet starts with the saved map,
+        also when the first run stopped at the target before the planet was explored
+
+        Result: Complete maps with far fewer path messages in the second run
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = MapStore(directory)
+
+            for seed in range(20):
+                planet = generatePlanet(6, 6, seed, withTarget=(seed % 2 == 0))
+                runs = []
+
+                for run in range(3):
+                    mothership = Mothership(planet, targetAfter=3)
+                    result = Simulator(planet, Explorer(mothership, mapStore=store), mothership).run()
+                    runs.append((result, mothership.pathMessages))
+
+                    # Explore the whole planet in the second run
+                    planet.target = None
+
+                (first, firstMessages), (second, secondMessages), (third, thirdMessages) = runs
+                self.assertEqual(second.result, "explorationCompleted")
+                self.assertEqual(second.missingPaths, set())
+                self.assertEqual(third.missingPaths, set())
+                self.assertLessEqual(thirdMessages, max(secondMessages // 4, 1))
+
+
+    def test_save_and_load(self):
+        """
+        This test should check that a planet is written and read back unchanged
+        """
+
+        planet = generatePlanet(4, 4, 113, withTarget=True)
+        planet.add_path(((9, 9), Direction.NORTH), ((9, 9), Direction.WEST), -1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "planet.json")
+            planet.save(filename)
+            loaded = SimulatedPlanet.load(filename)
+
+        self.assertEqual(loaded.paths, planet.paths)
+        self.assertEqual((loaded.name, loaded.start, loaded.startOrientation, loaded.target),
+                         (planet.name, planet.start, planet.startOrientation, planet.target))
+
+
+
+if __name__ == "__main__":
+    unittest.main()